@@ -0,0 +1,7 @@
+"""
+Benchmarks de la capa de datos.
+
+    python -m benchmarks generate --scale small --db /tmp/bench.db
+    python -m benchmarks run --db /tmp/bench.db --output resultados.json
+    python -m benchmarks compare base.json nuevo.json
+"""
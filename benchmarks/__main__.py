@@ -0,0 +1,67 @@
+"""
+Línea de comandos de los benchmarks.
+
+    python -m benchmarks generate --scale medium --db data/bench_1m.db
+    python -m benchmarks run --db data/bench_1m.db --output bench.json
+    python -m benchmarks compare base.json bench.json
+"""
+import argparse
+import json
+import logging
+import sys
+
+from .generator import DEFAULT_SEED, SCALES, generate
+from .suite import BENCHMARKS, DEFAULT_REGRESSION_THRESHOLD, compare, print_report, run
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip().split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="Crear una base con datos sintéticos")
+    gen.add_argument('--db', required=True, help="Ruta de la base a crear")
+    gen.add_argument('--scale', choices=list(SCALES), default='small')
+    gen.add_argument('--rows', type=int, help="Filas de ventas_detalle (reemplaza --scale)")
+    gen.add_argument('--seed', type=int, default=DEFAULT_SEED)
+
+    bench = commands.add_parser('run', help="Ejecutar los benchmarks")
+    bench.add_argument('--db', required=True, help="Base generada con 'generate'")
+    bench.add_argument('--output', help="Archivo JSON de resultados")
+    bench.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks a ejecutar")
+    bench.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    bench.add_argument('--iterations', type=float, default=1.0, help="Factor sobre las iteraciones")
+    bench.add_argument('--in-place', action='store_true', help="No copiar la base antes de medir")
+
+    cmp = commands.add_parser('compare', help="Comparar dos resultados JSON")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    logging.getLogger('database.slow').setLevel(logging.ERROR)
+
+    if args.command == 'generate':
+        result = generate(args.db, args.scale, args.seed, args.rows)
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if args.command == 'run':
+        report = run(args.db, args.output, args.only, args.seed, args.iterations, args.in_place)
+        print_report(report)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        mark = 'REGRESIÓN' if row['regression'] else ''
+        print(f"{row['benchmark']:32} {row['base_p50'] * 1000:9.3f} ms -> {row['p50'] * 1000:9.3f} ms "
+              f"({row['ratio']:.2f}x) {mark}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
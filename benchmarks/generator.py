@@ -0,0 +1,333 @@
+"""
+Generador de datos sintéticos para todo el esquema de inventario.
+
+Llena cada tabla con datos reproducibles (misma semilla, mismos datos)
+respetando las foreign keys. El volumen se define por el número de filas de
+ventas_detalle; el resto de tablas se dimensiona en proporción. Las
+inserciones pasan por `bulk_insert`, así que los triggers de saldos,
+resumen diario y kardex trabajan igual que en producción.
+"""
+import datetime
+import random
+import time
+import logging
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Filas de ventas_detalle por escala
+SCALES = {
+    'small': 10_000,
+    'medium': 1_000_000,
+    'large': 10_000_000,
+}
+DEFAULT_SEED = 42
+
+# Ventas generadas e insertadas por bloque
+SALES_BLOCK = 5_000
+
+LINES_PER_SALE = 4
+START_DATE = datetime.date(2023, 7, 1)
+END_DATE = datetime.date(2026, 6, 30)
+
+PRESENTATIONS = (('Unidad', 1, 1), ('Paquete x 12', 0, 12), ('Cartón x 24', 0, 24))
+MATERIAL_TYPES = (('Azúcar', 'bultos'), ('Ácido Cítrico', 'kg'), ('Saborizante', 'mL'),
+                  ('Envase', 'unidades'), ('Etiqueta', 'unidades'), ('Cinta', 'unidades'),
+                  ('Tapa', 'unidades'), ('Otro', 'unidades'))
+SUPPLIER_TYPES = ('Materia Prima', 'Insumos', 'Servicios', 'Activos', 'No Clasificado')
+
+# Proporción de ventas a crédito y de esas, las que reciben abono
+CREDIT_RATIO = 0.25
+PAYMENT_RATIO = 0.6
+
+
+class SyntheticData:
+    """Datos sintéticos dimensionados a partir de las filas de ventas_detalle."""
+
+    def __init__(self, detail_rows: int, seed: int = DEFAULT_SEED):
+        self.detail_rows = detail_rows
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.sales = max(1, detail_rows // LINES_PER_SALE)
+        self.clients = max(50, self.sales // 100)
+        self.suppliers = max(10, self.clients // 50)
+        self.products = min(500, max(20, detail_rows // 20_000))
+        self.materials = len(MATERIAL_TYPES) * 5
+        self.purchases = max(100, self.sales // 20)
+        self.lots = max(50, self.sales // 40)
+        self.departments = 10
+        self.towns_per_department = 5
+
+        self._days = (END_DATE - START_DATE).days
+        self._prices: dict[int, tuple] = {}
+        self._methods: dict[str, int] = {}
+
+    @classmethod
+    def for_scale(cls, scale: str, seed: int = DEFAULT_SEED) -> 'SyntheticData':
+        if scale not in SCALES:
+            raise ValueError(f"Escala inválida: {scale} (opciones: {', '.join(SCALES)})")
+        return cls(SCALES[scale], seed)
+
+    # ===== UTILIDADES =====
+
+    def _date(self, fraction: Optional[float] = None) -> str:
+        """Fecha del rango; `fraction` (0..1) la ubica en orden cronológico."""
+        if fraction is None:
+            fraction = self.rng.random()
+        return (START_DATE + datetime.timedelta(days=int(fraction * self._days))).isoformat()
+
+    def _phone(self) -> str:
+        return f"3{self.rng.randint(100000000, 999999999)}"
+
+    def _presentation_id(self, producto_id: int, index: int) -> int:
+        return (producto_id - 1) * len(PRESENTATIONS) + index + 1
+
+    # ===== TABLAS MAESTRAS =====
+
+    def departamentos(self) -> Iterator[tuple]:
+        for i in range(1, self.departments + 1):
+            yield (i, f"Departamento {i}")
+
+    def municipios(self) -> Iterator[tuple]:
+        town_id = 0
+        for dep in range(1, self.departments + 1):
+            for i in range(1, self.towns_per_department + 1):
+                town_id += 1
+                yield (town_id, f"Municipio {dep}-{i}", dep)
+
+    def clientes(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.clients + 1):
+            dep = rng.randint(1, self.departments)
+            yield (i, f"Departamento {dep}", f"Municipio {dep}-{rng.randint(1, self.towns_per_department)}",
+                   f"Cliente {i:06d}", str(rng.randint(10_000_000, 1_999_999_999)),
+                   f"Calle {rng.randint(1, 200)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}",
+                   None, self._phone(), f"cliente{i}@example.com")
+
+    def proveedores(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.suppliers + 1):
+            dep = rng.randint(1, self.departments)
+            yield (i, f"Proveedor {i:04d}", rng.choice(SUPPLIER_TYPES), str(rng.randint(800_000_000, 999_999_999)),
+                   f"Departamento {dep}", f"Municipio {dep}-1", self._phone())
+
+    def productos(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.products + 1):
+            precio_min = round(rng.uniform(500, 5000), -1)
+            precio_max = round(precio_min * rng.uniform(1.05, 1.4), -1)
+            self._prices[i] = (precio_min, precio_max)
+            yield (i, f"Producto {i:03d}", precio_min, precio_max)
+
+    def presentaciones(self) -> Iterator[tuple]:
+        for producto_id in range(1, self.products + 1):
+            for index, (nombre, es_moq, unidades) in enumerate(PRESENTATIONS):
+                yield (self._presentation_id(producto_id, index), producto_id, nombre, es_moq, unidades)
+
+    def stock_productos(self) -> Iterator[tuple]:
+        for producto_id in range(1, self.products + 1):
+            for index in range(len(PRESENTATIONS)):
+                presentacion_id = self._presentation_id(producto_id, index)
+                yield (presentacion_id, producto_id, presentacion_id, 0, 'Bodega')
+
+    def materia_prima(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.materials + 1):
+            tipo, unidad = MATERIAL_TYPES[(i - 1) % len(MATERIAL_TYPES)]
+            yield (i, f"{tipo} {i:02d}", tipo, unidad, rng.randint(1, self.suppliers),
+                   rng.randint(10, 100), round(rng.uniform(100, 50_000), 2))
+
+    # ===== MOVIMIENTOS =====
+
+    def compras(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.purchases + 1):
+            cantidad = round(rng.uniform(10, 500), 2)
+            precio = round(rng.uniform(100, 50_000), 2)
+            total = round(cantidad * precio, 2)
+            descuento = rng.choice((0, 0, 0, 5, 10))
+            yield (i, rng.randint(1, self.materials), rng.randint(1, self.suppliers), cantidad,
+                   f"FC-{i:08d}", precio, total, descuento, round(total * (1 - descuento / 100), 2),
+                   self._date(i / self.purchases))
+
+    def lotes(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.lots + 1):
+            producto_id = rng.randint(1, self.products)
+            yield (i, f"L-{i:07d}", self._date(i / self.lots), producto_id,
+                   self._presentation_id(producto_id, 0), rng.randint(500, 5000),
+                   round(rng.uniform(1, 20), 2), round(rng.uniform(50, 500), 2), rng.randint(30, 240),
+                   rng.random() < 0.3, 95.0, round(rng.uniform(85, 100), 2))
+
+    def produccion_detalle(self) -> Iterator[tuple]:
+        rng = self.rng
+        detail_id = 0
+        for lote_id in range(1, self.lots + 1):
+            for materia_prima_id in rng.sample(range(1, self.materials + 1), 4):
+                detail_id += 1
+                yield (detail_id, lote_id, materia_prima_id, round(rng.uniform(0.5, 10), 4))
+
+    def analisis_muestras(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i, lote_id in enumerate(range(1, self.lots + 1, 5), start=1):
+            yield (i, lote_id, self._date(lote_id / self.lots), 'Ámbar', 'Homogénea', 'Conforme',
+                   round(rng.uniform(2.5, 4), 2), round(rng.uniform(8, 14), 2),
+                   round(rng.uniform(80, 90), 2), round(rng.uniform(1.0, 1.1), 4), round(rng.uniform(1, 5), 2))
+
+    def sales_blocks(self) -> Iterator[dict]:
+        """
+        Ventas con sus líneas, pagos y abonos, en bloques de SALES_BLOCK.
+
+        Las ventas van en orden cronológico (como se registran en la
+        práctica). Cada bloque es un dict tabla -> lista de filas, en el
+        orden de inserción que exigen las foreign keys y los triggers.
+        """
+        rng = self.rng
+        contado = [self._methods['EFECTIVO'], self._methods['NEQUI'], self._methods['CAJA_SOCIAL']]
+        credito = self._methods['CREDITO']
+        line_id = pago_id = abono_id = abono_det_id = 0
+        lines_left = self.detail_rows
+
+        for block_start in range(0, self.sales, SALES_BLOCK):
+            block = {'ventas': [], 'ventas_detalle': [], 'pagos_venta': [],
+                     'abonos_credito': [], 'abonos_detalle': []}
+            for venta_id in range(block_start + 1, min(block_start + SALES_BLOCK, self.sales) + 1):
+                fecha = self._date(venta_id / self.sales)
+                cliente_id = rng.randint(1, self.clients)
+                sales_left = self.sales - venta_id + 1
+                # Alrededor del promedio restante, para que el total cuadre exacto
+                average = lines_left / sales_left
+                n_lines = lines_left if sales_left == 1 else max(1, min(
+                    lines_left - (sales_left - 1), int(average * rng.uniform(0.25, 1.75) + 0.5)))
+                lines_left -= n_lines
+
+                total = 0.0
+                for _ in range(n_lines):
+                    line_id += 1
+                    producto_id = rng.randint(1, self.products)
+                    index = rng.randrange(len(PRESENTATIONS))
+                    cantidad_moq = rng.choice((1, 1, 1, 2, 3, 0.5, 1.5))
+                    unidades = max(1, int(cantidad_moq * PRESENTATIONS[index][2]))
+                    precio = round(rng.uniform(*self._prices[producto_id]), -1)
+                    subtotal = round(unidades * precio, 2)
+                    total += subtotal
+                    block['ventas_detalle'].append((
+                        line_id, venta_id, producto_id, self._presentation_id(producto_id, index),
+                        unidades, cantidad_moq, precio, subtotal
+                    ))
+                total = round(total, 2)
+                block['ventas'].append((venta_id, cliente_id, f"FV-{venta_id:08d}", fecha, total))
+
+                if rng.random() < CREDIT_RATIO:
+                    pago_id += 1
+                    block['pagos_venta'].append((pago_id, venta_id, credito, total, fecha))
+                    if rng.random() < PAYMENT_RATIO:
+                        abono_id += 1
+                        abono_det_id += 1
+                        monto = total if rng.random() < 0.7 else round(total / 2, 2)
+                        block['abonos_credito'].append((abono_id, cliente_id, fecha, monto))
+                        block['abonos_detalle'].append((abono_det_id, abono_id, venta_id,
+                                                        rng.choice(contado), monto))
+                elif rng.random() < 0.1:
+                    # Pago dividido en dos métodos de contado
+                    mitad = round(total / 2, 2)
+                    for monto in (mitad, round(total - mitad, 2)):
+                        pago_id += 1
+                        block['pagos_venta'].append((pago_id, venta_id, rng.choice(contado), monto, fecha))
+                else:
+                    pago_id += 1
+                    block['pagos_venta'].append((pago_id, venta_id, rng.choice(contado), total, fecha))
+            yield block
+
+    # ===== CARGA =====
+
+    def populate(self, connection) -> dict:
+        """
+        Inserta todos los datos en una base recién migrada.
+
+        Args:
+            connection: DatabaseConnection (normalmente `db` configurado con
+                        una ruta de benchmark)
+
+        Returns:
+            Filas insertadas por tabla y segundos totales
+        """
+        started = time.perf_counter()
+        counts: dict[str, int] = {}
+
+        def insert(table: str, columns: list, rows):
+            counts[table] = counts.get(table, 0) + connection.bulk_insert(table, columns, rows)
+
+        self._methods = {row['codigo']: row['id']
+                         for row in connection.fetch_all("SELECT id, codigo FROM metodos_pago")}
+
+        insert('departamentos', ['id', 'nombre'], self.departamentos())
+        insert('municipios', ['id', 'nombre', 'departamento_id'], self.municipios())
+        insert('clientes', ['id', 'departamento', 'municipio', 'nombre_comercial', 'identificacion',
+                            'direccion', 'telefono_fijo', 'telefono_celular', 'correo'], self.clientes())
+        insert('proveedores', ['id', 'nombre_comercial', 'tipo', 'identificacion', 'departamento',
+                               'municipio', 'telefono_celular'], self.proveedores())
+        insert('productos', ['id', 'nombre', 'precio_min', 'precio_max'], self.productos())
+        insert('presentaciones_comerciales', ['id', 'producto_id', 'nombre', 'es_moq', 'unidades_por_moq'],
+               self.presentaciones())
+        insert('stock_productos', ['id', 'producto_id', 'presentacion_id', 'cantidad', 'ubicacion'],
+               self.stock_productos())
+        insert('materia_prima', ['id', 'nombre', 'tipo', 'unidad_medida', 'proveedor_id', 'stock_minimo',
+                                 'costo_promedio'], self.materia_prima())
+        insert('compras_materia_prima', ['id', 'materia_prima_id', 'proveedor_id', 'cantidad',
+                                         'numero_factura', 'precio_unitario', 'precio_total',
+                                         'descuento_porcentaje', 'precio_definitivo', 'fecha_compra'],
+               self.compras())
+        insert('lotes_produccion', ['id', 'codigo_lote', 'fecha_produccion', 'producto_id', 'presentacion_id',
+                                    'cantidad_producida', 'azucar_utilizada', 'agua_utilizada',
+                                    'tiempo_produccion_minutos', 'uso_colorante', 'rendimiento_esperado',
+                                    'rendimiento_real'], self.lotes())
+        insert('produccion_detalle', ['id', 'lote_id', 'materia_prima_id', 'cantidad_utilizada'],
+               self.produccion_detalle())
+        insert('analisis_muestras', ['id', 'lote_id', 'fecha_analisis', 'color', 'textura', 'sabor', 'ph',
+                                     'brix', 'humedad', 'densidad', 'viscosidad'], self.analisis_muestras())
+
+        sales_columns = {
+            'ventas': ['id', 'cliente_id', 'numero_factura', 'fecha_venta', 'total'],
+            'ventas_detalle': ['id', 'venta_id', 'producto_id', 'presentacion_id', 'cantidad_unidades',
+                               'cantidad_moq', 'precio_unitario', 'subtotal'],
+            'pagos_venta': ['id', 'venta_id', 'metodo_pago_id', 'monto', 'fecha_pago'],
+            'abonos_credito': ['id', 'cliente_id', 'fecha_abono', 'monto_total'],
+            'abonos_detalle': ['id', 'abono_id', 'venta_id', 'metodo_pago_id', 'monto'],
+        }
+        for block in self.sales_blocks():
+            for table, columns in sales_columns.items():
+                insert(table, columns, block[table])
+            logger.info(f"Ventas generadas: {counts['ventas']}/{self.sales}")
+
+        counts['seconds'] = round(time.perf_counter() - started, 2)
+        return counts
+
+
+def generate(db_path, scale: str = 'small', seed: int = DEFAULT_SEED,
+             detail_rows: Optional[int] = None) -> dict:
+    """
+    Crea una base nueva en `db_path` con el esquema actual y datos sintéticos.
+
+    Args:
+        db_path: Ruta de la base a crear (no debe existir)
+        scale: 'small' (10k líneas), 'medium' (1M) o 'large' (10M)
+        seed: Semilla del generador
+        detail_rows: Filas de ventas_detalle (reemplaza a `scale`)
+    """
+    from pathlib import Path
+    from src.database import db, migrate
+
+    db_path = Path(db_path)
+    if db_path.exists():
+        raise FileExistsError(f"La base de benchmark ya existe: {db_path}")
+    data = SyntheticData(detail_rows, seed) if detail_rows else SyntheticData.for_scale(scale, seed)
+
+    db.configure(db_path=db_path, headless=True)
+    migrate(db)
+    counts = data.populate(db)
+    with db.writer() as conn:
+        conn.execute("ANALYZE")
+        conn.commit()
+    return {'seed': seed, 'detail_rows': data.detail_rows, 'rows': counts}
@@ -0,0 +1,347 @@
+"""
+Suite de benchmarks de DatabaseConnection sobre una base generada.
+
+Cada benchmark se registra con @benchmark y recibe el contexto; retorna la
+función que se mide en cada iteración. Los resultados (latencias en
+segundos) se escriben en JSON para comparar versiones con `compare`.
+"""
+import datetime
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+from .generator import DEFAULT_SEED, END_DATE, START_DATE
+
+logger = logging.getLogger(__name__)
+
+# nombre -> (función de preparación, iteraciones)
+BENCHMARKS: dict[str, tuple[Callable, int]] = {}
+
+# Un benchmark empeora si su p50 sube más que esto
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def benchmark(name: str, iterations: int):
+    """Registra una función de preparación `setup(ctx) -> callable`."""
+    def register(setup: Callable):
+        BENCHMARKS[name] = (setup, iterations)
+        return setup
+    return register
+
+
+class BenchmarkContext:
+    """Conexión, generador aleatorio y rangos de ids de la base medida."""
+
+    def __init__(self, connection, seed: int = DEFAULT_SEED):
+        self.db = connection
+        self.rng = random.Random(seed)
+        self.max_ids = {
+            table: (connection.fetch_one(f"SELECT MAX(id) AS id FROM {table}") or {}).get('id') or 0
+            for table in ('clientes', 'ventas', 'productos', 'stock_productos', 'materia_prima')
+        }
+        self.work_dir = Path(tempfile.mkdtemp(prefix='bench_'))
+
+    def random_id(self, table: str) -> int:
+        return self.rng.randint(1, max(1, self.max_ids[table]))
+
+    def random_date(self) -> str:
+        days = (END_DATE - START_DATE).days
+        return (START_DATE + datetime.timedelta(days=self.rng.randint(0, days))).isoformat()
+
+    def cleanup(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+# ===== LECTURAS =====
+
+@benchmark('fetch_one_cliente', 2000)
+def _fetch_one_cliente(ctx: BenchmarkContext):
+    return lambda: ctx.db.fetch_one("SELECT * FROM clientes WHERE id = ?", (ctx.random_id('clientes'),))
+
+
+@benchmark('fetch_all_detalle_venta', 2000)
+def _fetch_all_detalle_venta(ctx: BenchmarkContext):
+    from src.database.query_plans import HOT_QUERIES
+    query = HOT_QUERIES['detalle_venta'][0]
+    return lambda: ctx.db.fetch_all(query, (ctx.random_id('ventas'),))
+
+
+@benchmark('fetch_all_ventas_mes', 100)
+def _fetch_all_ventas_mes(ctx: BenchmarkContext):
+    def run():
+        start = datetime.date.fromisoformat(ctx.random_date())
+        end = start + datetime.timedelta(days=30)
+        return ctx.db.fetch_all(
+            "SELECT id, cliente_id, fecha_venta, total, estado FROM ventas WHERE fecha_venta BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat())
+        )
+    return run
+
+
+@benchmark('estado_cuenta_cliente', 500)
+def _estado_cuenta_cliente(ctx: BenchmarkContext):
+    from src.database.query_plans import HOT_QUERIES
+    query = HOT_QUERIES['estado_cuenta_cliente'][0]
+
+    def run():
+        cliente_id = ctx.random_id('clientes')
+        ventas = ctx.db.fetch_all(query, (cliente_id, START_DATE.isoformat(), END_DATE.isoformat()))
+        abonos = ctx.db.fetch_all(HOT_QUERIES['abonos_cliente'][0], (cliente_id,))
+        return ventas, abonos
+    return run
+
+
+@benchmark('facturas_pendientes_cliente', 1000)
+def _facturas_pendientes_cliente(ctx: BenchmarkContext):
+    from src.database.query_plans import HOT_QUERIES
+    query = HOT_QUERIES['facturas_pendientes_cliente'][0]
+    return lambda: ctx.db.fetch_all(query, (ctx.random_id('clientes'),))
+
+
+@benchmark('saldo_cliente', 2000)
+def _saldo_cliente(ctx: BenchmarkContext):
+    from src.database.aggregates import client_balance
+    return lambda: client_balance(ctx.random_id('clientes'))
+
+
+@benchmark('stock_actual_producto', 2000)
+def _stock_actual_producto(ctx: BenchmarkContext):
+    from src.database import stock
+    presentations = ctx.db.fetch_all("SELECT producto_id, presentacion_id FROM stock_productos")
+
+    def run():
+        row = ctx.rng.choice(presentations)
+        return stock.product_stock(row['producto_id'], row['presentacion_id'])
+    return run
+
+
+@benchmark('stock_a_fecha', 500)
+def _stock_a_fecha(ctx: BenchmarkContext):
+    from src.database import stock
+
+    def run():
+        if ctx.rng.random() < 0.5:
+            return stock.stock_at(stock.PRODUCTO, ctx.random_id('stock_productos'), ctx.random_date())
+        return stock.stock_at(stock.MATERIA_PRIMA, ctx.random_id('materia_prima'), ctx.random_date())
+    return run
+
+
+# ===== ESCRITURAS (después de las lecturas: modifican la base) =====
+
+def _sale_queries(ctx: BenchmarkContext) -> Callable[[], tuple]:
+    """Generador de (queries, params) de una venta de 3 líneas pagada en efectivo."""
+    presentations = ctx.db.fetch_all("SELECT producto_id, presentacion_id FROM stock_productos")
+    metodo = ctx.db.fetch_one("SELECT id FROM metodos_pago WHERE codigo = 'EFECTIVO'")['id']
+    fecha = END_DATE.isoformat()
+    sequence = iter(range(1, 10**9))
+
+    def build():
+        n = next(sequence)
+        lines = [ctx.rng.choice(presentations) for _ in range(3)]
+        queries = ["""INSERT INTO ventas (cliente_id, numero_factura, fecha_venta, total)
+                      VALUES (?, ?, ?, 3000)"""]
+        params = [(ctx.random_id('clientes'), f"BENCH-{n:08d}", fecha)]
+        for line in lines:
+            queries.append("""INSERT INTO ventas_detalle (venta_id, producto_id, presentacion_id,
+                                  cantidad_unidades, cantidad_moq, precio_unitario, subtotal)
+                              VALUES ((SELECT MAX(id) FROM ventas), ?, ?, 1, 1, 1000, 1000)""")
+            params.append((line['producto_id'], line['presentacion_id']))
+        queries.append("""INSERT INTO pagos_venta (venta_id, metodo_pago_id, monto)
+                          VALUES ((SELECT MAX(id) FROM ventas), ?, 3000)""")
+        params.append((metodo,))
+        return queries, params
+    return build
+
+
+@benchmark('execute_transaction_venta', 500)
+def _execute_transaction_venta(ctx: BenchmarkContext):
+    sale = _sale_queries(ctx)
+    return lambda: ctx.db.execute_transaction(*sale())
+
+
+# Ventas por iteración de las variantes agrupadas: comparar estas dos entre
+# sí, no contra el p50 de una venta suelta (que deja fuera los checkpoints)
+SALES_PER_BATCH = 50
+
+
+@benchmark('execute_transaction_ventas', 20)
+def _execute_transaction_ventas(ctx: BenchmarkContext):
+    """50 ventas seguidas con execute_transaction (un commit por venta)."""
+    sale = _sale_queries(ctx)
+
+    def run():
+        for _ in range(SALES_PER_BATCH):
+            ctx.db.execute_transaction(*sale())
+    return run
+
+
+@benchmark('write_queue_ventas', 20)
+def _write_queue_ventas(ctx: BenchmarkContext):
+    """50 ventas enviadas juntas a la cola de escrituras (commit agrupado)."""
+    sale = _sale_queries(ctx)
+
+    def run():
+        futures = [ctx.db.submit_write(*sale()) for _ in range(SALES_PER_BATCH)]
+        for future in futures:
+            future.result()
+    return run
+
+
+@benchmark('backup_database', 3)
+def _backup_database(ctx: BenchmarkContext):
+    counter = iter(range(1, 1000))
+
+    def run():
+        path = ctx.work_dir / f"backup_{next(counter)}.db"
+        ctx.db.backup_database(path)
+        path.unlink()
+    return run
+
+
+# ===== EJECUCIÓN =====
+
+def _percentile(values: list, fraction: float) -> float:
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def measure(fn: Callable, iterations: int, warmup: Optional[int] = None) -> dict:
+    """Ejecuta `fn` `iterations` veces (tras un calentamiento) y resume las latencias."""
+    if warmup is None:
+        warmup = min(10, iterations // 10)
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    total = sum(timings)
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'total': total,
+        'mean': total / iterations,
+        'min': timings[0],
+        'p50': _percentile(timings, 0.50),
+        'p95': _percentile(timings, 0.95),
+        'p99': _percentile(timings, 0.99),
+        'max': timings[-1],
+        'ops_per_sec': iterations / total if total else 0.0,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(connection) -> dict:
+    with connection.reader() as conn:
+        user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        rows = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('clientes', 'productos', 'ventas', 'ventas_detalle', 'pagos_venta',
+                              'abonos_detalle', 'compras_materia_prima', 'lotes_produccion',
+                              'movimientos_stock')}
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'schema_version': user_version,
+        'database_bytes': connection.get_database_size(),
+        'rows': rows,
+    }
+
+
+def run(db_path, output: Optional[Path] = None, names: Optional[list] = None,
+        seed: int = DEFAULT_SEED, scale_iterations: float = 1.0, in_place: bool = False) -> dict:
+    """
+    Ejecuta los benchmarks sobre la base de `db_path`.
+
+    Por defecto trabaja sobre una copia temporal, porque los benchmarks de
+    escritura agregan ventas; `in_place=True` usa la base directamente.
+
+    Args:
+        db_path: Base generada con `generator.generate`
+        output: Archivo JSON de resultados (opcional)
+        names: Benchmarks a ejecutar (por defecto todos)
+        seed: Semilla de los ids y fechas consultados
+        scale_iterations: Factor sobre las iteraciones de cada benchmark
+    """
+    from src.database import db
+
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"No existe la base de benchmark: {db_path}")
+    unknown = set(names or ()) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Benchmarks desconocidos: {', '.join(sorted(unknown))}")
+
+    copy_dir = None
+    if not in_place:
+        copy_dir = Path(tempfile.mkdtemp(prefix='bench_db_'))
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(copy_dir / db_path.name)
+        source.backup(target)
+        source.close()
+        target.close()
+        db_path = copy_dir / db_path.name
+
+    db.configure(db_path=db_path, headless=True)
+    ctx = BenchmarkContext(db, seed)
+    report = {'meta': _metadata(db), 'results': {}}
+    try:
+        for name, (setup, iterations) in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            iterations = max(1, int(iterations * scale_iterations))
+            logger.info(f"Benchmark {name} ({iterations} iteraciones)")
+            report['results'][name] = measure(setup(ctx), iterations)
+    finally:
+        ctx.cleanup()
+        db.close_connection()
+        if copy_dir is not None:
+            shutil.rmtree(copy_dir, ignore_errors=True)
+
+    if output is not None:
+        Path(output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+    return report
+
+
+def compare(baseline: dict, current: dict,
+            threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list[dict]:
+    """
+    Compara el p50 de dos reportes.
+
+    Returns:
+        Una fila por benchmark común con la razón actual/base y si es regresión
+    """
+    rows = []
+    for name, base in baseline['results'].items():
+        if name not in current['results']:
+            continue
+        now = current['results'][name]
+        ratio = now['p50'] / base['p50'] if base['p50'] else float('inf')
+        rows.append({'benchmark': name, 'base_p50': base['p50'], 'p50': now['p50'],
+                     'ratio': ratio, 'regression': ratio > 1 + threshold})
+    return rows
+
+
+def print_report(report: dict, stream=sys.stdout):
+    for name, result in report['results'].items():
+        print(f"{name:32} p50 {result['p50'] * 1000:9.3f} ms  p95 {result['p95'] * 1000:9.3f} ms  "
+              f"{result['ops_per_sec']:10.1f} op/s", file=stream)
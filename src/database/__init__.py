@@ -1,12 +1,49 @@
 """
 Módulo de base de datos - Exporta las clases principales.
+
+Los submódulos se importan al primer acceso, así que `import src.database`
+no abre la base, no crea directorios ni carga PySide6.
 """
-from .connection import db, DatabaseConnection
-from .models import models, DatabaseModels
-
-__all__ = [
-    'db',
-    'DatabaseConnection',
-    'models', 
-    'DatabaseModels'
-]
\ No newline at end of file
+from importlib import import_module
+
+_EXPORTS = {
+    'db': '.connection',
+    'DatabaseConnection': '.connection',
+    'models': '.models',
+    'DatabaseModels': '.models',
+    'ExcelImporter': '.importer',
+    'ImportResult': '.importer',
+    'migrate': '.migrations',
+    'SCHEMA_VERSION': '.migrations',
+    'verify_aggregates': '.aggregates',
+    'rebuild_aggregates': '.aggregates',
+    'ReferenceCache': '.cache',
+    'reference_cache': '.cache',
+    'QueryExecutor': '.executor',
+    'get_executor': '.executor',
+    'QueryInstrumentation': '.instrumentation',
+    'search_entities': '.search',
+    'search_all': '.search',
+    'archive_closed_records': '.archive',
+    'history_reader': '.archive',
+    'WriteQueue': '.writer',
+    'get_write_queue': '.writer',
+    'CheckpointPolicy': '.checkpoint',
+    'verify_costs': '.costing',
+    'rebuild_costs': '.costing',
+    'ChangeFeed': '.changes',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
\ No newline at end of file
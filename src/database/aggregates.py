@@ -0,0 +1,274 @@
+"""
+Agregados materializados: consultas O(1) y verificación contra las tablas base.
+
+Los saldos (ventas, clientes, bolsillos) y `resumen_ventas_diario` se
+mantienen con triggers creados por DatabaseModels. Este módulo permite
+leerlos y recalcularlos desde cero para detectar desvíos. Si hay archivo
+histórico, los bolsillos y el resumen se comparan contra las vistas
+`<tabla>_historico`, porque incluyen lo archivado.
+Uso: python -m src.database.aggregates [--rebuild]
+"""
+import argparse
+import re
+import sqlite3
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Máximo de diferencias que se reportan por agregado (se cuentan todas)
+MAX_DRIFT_DETAILS = 50
+
+# Tolerancia para comparar montos DECIMAL guardados como REAL
+TOLERANCE = 0.005
+
+_EXPECTED_SALE_BALANCE = """
+    SELECT v.id AS clave,
+           ROUND(v.total - COALESCE(p.pagado, 0) - COALESCE(a.abonado, 0), 2) AS esperado,
+           v.saldo_pendiente AS actual
+    FROM ventas v
+    LEFT JOIN (SELECT pv.venta_id, SUM(pv.monto) AS pagado
+               FROM pagos_venta pv
+               JOIN metodos_pago m ON m.id = pv.metodo_pago_id
+               WHERE m.codigo <> 'CREDITO'
+               GROUP BY pv.venta_id) p ON p.venta_id = v.id
+    LEFT JOIN (SELECT venta_id, SUM(monto) AS abonado
+               FROM abonos_detalle GROUP BY venta_id) a ON a.venta_id = v.id
+"""
+
+_EXPECTED_CLIENT_BALANCE = """
+    SELECT c.id AS clave,
+           ROUND(COALESCE(s.saldo, 0), 2) AS esperado,
+           c.saldo_credito AS actual
+    FROM clientes c
+    LEFT JOIN (SELECT cliente_id, SUM(saldo_pendiente) AS saldo
+               FROM ventas GROUP BY cliente_id) s ON s.cliente_id = c.id
+"""
+
+_EXPECTED_POCKET_BALANCE = """
+    SELECT b.metodo_pago_id AS clave,
+           ROUND(COALESCE(p.monto, 0) + COALESCE(a.monto, 0), 2) AS esperado,
+           b.saldo_actual AS actual
+    FROM bolsillos b
+    LEFT JOIN (SELECT metodo_pago_id, SUM(monto) AS monto
+               FROM pagos_venta GROUP BY metodo_pago_id) p ON p.metodo_pago_id = b.metodo_pago_id
+    LEFT JOIN (SELECT metodo_pago_id, SUM(monto) AS monto
+               FROM abonos_detalle GROUP BY metodo_pago_id) a ON a.metodo_pago_id = b.metodo_pago_id
+"""
+
+# Resumen diario calculado desde las tablas base
+_EXPECTED_SUMMARY = """
+    SELECT date(fecha_venta) AS fecha, 0 AS producto_id, 0 AS metodo_pago_id,
+           COUNT(*) AS registros, 0 AS cantidad_unidades, ROUND(SUM(total), 2) AS monto
+    FROM ventas GROUP BY date(fecha_venta)
+    UNION ALL
+    SELECT date(v.fecha_venta), d.producto_id, 0,
+           COUNT(*), SUM(d.cantidad_unidades), ROUND(SUM(d.subtotal), 2)
+    FROM ventas_detalle d JOIN ventas v ON v.id = d.venta_id
+    GROUP BY date(v.fecha_venta), d.producto_id
+    UNION ALL
+    SELECT date(v.fecha_venta), 0, p.metodo_pago_id,
+           COUNT(*), 0, ROUND(SUM(p.monto), 2)
+    FROM pagos_venta p JOIN ventas v ON v.id = p.venta_id
+    GROUP BY date(v.fecha_venta), p.metodo_pago_id
+"""
+
+_SUMMARY_DRIFT = f"""
+    WITH esperado AS ({_EXPECTED_SUMMARY}),
+    actual AS (SELECT * FROM resumen_ventas_diario
+               WHERE registros <> 0 OR cantidad_unidades <> 0 OR ABS(monto) > {TOLERANCE})
+    SELECT e.fecha || '/' || e.producto_id || '/' || e.metodo_pago_id AS clave,
+           e.monto AS esperado, a.monto AS actual
+    FROM esperado e LEFT JOIN actual a
+      ON a.fecha = e.fecha AND a.producto_id = e.producto_id AND a.metodo_pago_id = e.metodo_pago_id
+    WHERE a.fecha IS NULL OR a.registros <> e.registros
+       OR a.cantidad_unidades <> e.cantidad_unidades OR ABS(a.monto - e.monto) > {TOLERANCE}
+    UNION ALL
+    SELECT a.fecha || '/' || a.producto_id || '/' || a.metodo_pago_id, NULL, a.monto
+    FROM actual a LEFT JOIN esperado e
+      ON a.fecha = e.fecha AND a.producto_id = e.producto_id AND a.metodo_pago_id = e.metodo_pago_id
+    WHERE e.fecha IS NULL
+"""
+
+# Agregados que acumulan toda la historia (no solo lo que sigue en la base caliente)
+HISTORICAL_CHECKS = ('bolsillos.saldo_actual', 'resumen_ventas_diario')
+_HISTORY_TABLES_RE = re.compile(r'\b(ventas|ventas_detalle|pagos_venta|abonos_detalle)\b')
+
+
+def _historical(query: str, enabled: bool) -> str:
+    """Cambia las tablas base por sus vistas `_historico` si la conexión las tiene."""
+    return _HISTORY_TABLES_RE.sub(r'\1_historico', query) if enabled else query
+
+
+# nombre -> consulta que retorna (clave, esperado, actual) con desvío
+DRIFT_CHECKS = {
+    'ventas.saldo_pendiente': f"SELECT * FROM ({_EXPECTED_SALE_BALANCE}) "
+                              f"WHERE ABS(esperado - COALESCE(actual, 0)) > {TOLERANCE}",
+    'clientes.saldo_credito': f"SELECT * FROM ({_EXPECTED_CLIENT_BALANCE}) "
+                              f"WHERE ABS(esperado - COALESCE(actual, 0)) > {TOLERANCE}",
+    'bolsillos.saldo_actual': f"SELECT * FROM ({_EXPECTED_POCKET_BALANCE}) "
+                              f"WHERE ABS(esperado - COALESCE(actual, 0)) > {TOLERANCE}",
+    'resumen_ventas_diario': _SUMMARY_DRIFT,
+}
+
+
+def verify_aggregates(conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Recalcula los agregados desde las tablas base y los compara.
+
+    Returns:
+        {agregado: {'count': n, 'sample': [(clave, esperado, actual), ...]}}
+        solo para los agregados con desvío (vacío si todo cuadra)
+    """
+    if conn is None:
+        from .archive import history_reader
+        with history_reader() as reader:
+            return verify_aggregates(reader)
+
+    from .archive import has_history_views
+    historical = has_history_views(conn)
+    drift = {}
+    for name, query in DRIFT_CHECKS.items():
+        cursor = conn.execute(_historical(query, historical and name in HISTORICAL_CHECKS))
+        sample = [tuple(row) for row in cursor.fetchmany(MAX_DRIFT_DETAILS)]
+        if not sample:
+            continue
+        count = len(sample) + sum(1 for _ in cursor)
+        drift[name] = {'count': count, 'sample': sample}
+        logger.warning(f"Desvío en {name}: {count} diferencias")
+    return drift
+
+
+def rebuild_aggregates(conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Recalcula todos los agregados desde las tablas base.
+
+    Si `conn` se pasa se usa su transacción actual (no hace commit); si no,
+    corre en una transacción propia con la conexión escritora.
+
+    Returns:
+        Los desvíos encontrados antes de recalcular (ver verify_aggregates)
+    """
+    if conn is None:
+        from .archive import detach_archive, prepare_history
+        from .connection import db
+        with db.writer() as writer:
+            prepare_history(writer)
+            try:
+                drift = rebuild_aggregates(writer)
+                writer.commit()
+                return drift
+            except sqlite3.Error:
+                writer.rollback()
+                raise
+            finally:
+                detach_archive(writer)
+
+    from .archive import has_history_views
+    historical = has_history_views(conn)
+    drift = verify_aggregates(conn)
+
+    conn.execute(f"""
+        UPDATE ventas SET
+            saldo_pendiente = e.esperado,
+            estado = CASE WHEN e.esperado <= 0 THEN 'PAGADA'
+                          WHEN e.esperado < ventas.total THEN 'PARCIAL'
+                          ELSE 'PENDIENTE' END
+        FROM ({_EXPECTED_SALE_BALANCE}) e
+        WHERE e.clave = ventas.id
+    """)
+    # Después de las ventas, porque el trigger de saldo ajusta a los clientes
+    conn.execute(f"""
+        UPDATE clientes SET saldo_credito = e.esperado
+        FROM ({_EXPECTED_CLIENT_BALANCE}) e
+        WHERE e.clave = clientes.id
+    """)
+    conn.execute(f"""
+        UPDATE bolsillos SET saldo_actual = e.esperado
+        FROM ({_historical(_EXPECTED_POCKET_BALANCE, historical)}) e
+        WHERE e.clave = bolsillos.metodo_pago_id
+    """)
+    conn.execute("DELETE FROM resumen_ventas_diario")
+    conn.execute(f"""
+        INSERT INTO resumen_ventas_diario
+            (fecha, producto_id, metodo_pago_id, registros, cantidad_unidades, monto)
+        SELECT fecha, producto_id, metodo_pago_id,
+               SUM(registros), SUM(cantidad_unidades), ROUND(SUM(monto), 2)
+        FROM ({_historical(_EXPECTED_SUMMARY, historical)})
+        GROUP BY fecha, producto_id, metodo_pago_id
+    """)
+
+    if drift:
+        logger.info(f"Agregados recalculados; corregidos: {', '.join(drift)}")
+    return drift
+
+
+# ===== LECTURAS O(1) =====
+
+def client_balance(cliente_id: int) -> float:
+    """Saldo de crédito pendiente del cliente."""
+    from .connection import db
+    row = db.fetch_one("SELECT saldo_credito FROM clientes WHERE id = ?", (cliente_id,))
+    return row['saldo_credito'] if row else 0.0
+
+
+def pocket_balance(codigo: str) -> float:
+    """Saldo del bolsillo de un método de pago ('EFECTIVO', 'NEQUI'...)."""
+    from .connection import db
+    row = db.fetch_one(
+        """SELECT b.saldo_actual FROM bolsillos b
+           JOIN metodos_pago m ON m.id = b.metodo_pago_id
+           WHERE m.codigo = ?""",
+        (codigo,)
+    )
+    return row['saldo_actual'] if row else 0.0
+
+
+def daily_totals(fecha: str) -> dict:
+    """Número de ventas y total facturado del día."""
+    from .connection import db
+    row = db.fetch_one(
+        """SELECT registros AS num_ventas, monto AS total FROM resumen_ventas_diario
+           WHERE fecha = ? AND producto_id = 0 AND metodo_pago_id = 0""",
+        (fecha,)
+    )
+    return row or {'num_ventas': 0, 'total': 0}
+
+
+def daily_totals_by_product(fecha: str) -> list[dict]:
+    """Unidades y subtotal por producto del día."""
+    from .connection import db
+    return db.fetch_all(
+        """SELECT producto_id, registros AS lineas, cantidad_unidades, monto AS subtotal
+           FROM resumen_ventas_diario
+           WHERE fecha = ? AND producto_id <> 0 AND metodo_pago_id = 0""",
+        (fecha,)
+    )
+
+
+def daily_totals_by_payment_method(fecha: str) -> list[dict]:
+    """Pagos recibidos por método en las ventas del día."""
+    from .connection import db
+    return db.fetch_all(
+        """SELECT metodo_pago_id, registros AS pagos, monto
+           FROM resumen_ventas_diario
+           WHERE fecha = ? AND producto_id = 0 AND metodo_pago_id <> 0""",
+        (fecha,)
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Verifica o recalcula los agregados materializados")
+    parser.add_argument('--rebuild', action='store_true', help="Recalcular desde las tablas base")
+    args = parser.parse_args()
+
+    from .connection import db
+    db.configure(headless=True)
+    result = rebuild_aggregates() if args.rebuild else verify_aggregates()
+    if not result:
+        print("Agregados consistentes")
+    for name, info in result.items():
+        print(f"{name}: {info['count']} diferencias")
+        for clave, esperado, actual in info['sample']:
+            print(f"  {clave}: esperado={esperado} actual={actual}")
+    raise SystemExit(1 if result and not args.rebuild else 0)
@@ -0,0 +1,519 @@
+"""
+Archivo histórico: ventas pagadas y compras antiguas en una base aparte.
+
+El trabajo de archivado mueve por lotes las ventas PAGADA (con saldo 0)
+anteriores a una fecha de corte, junto con su detalle, pagos y abonos, y
+las compras de materia prima anteriores al corte, a `<base>_archivo.db`
+junto a la base principal (p. ej. inventario.db -> inventario_archivo.db).
+Así la base caliente y sus backups no crecen con años de historia cerrada.
+El archivo guarda el identificador de su base (ARCHIVE_ID_KEY) y no se
+adjunta a otra.
+
+El archivo se adjunta (ATTACH) bajo demanda. Sobre cada conexión que lo
+usa se crean vistas TEMP `<tabla>_historico` (base caliente UNION ALL
+archivo), de modo que los reportes históricos consultan las vistas y
+funcionan igual con o sin archivo.
+
+Uso: python -m src.database.archive --antes-de 2024-01-01 [--lote 1000]
+"""
+import argparse
+import sqlite3
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = 'archivo'
+ARCHIVE_SUFFIX = '_archivo'
+ARCHIVE_INFO_TABLE = 'archivo_info'
+# Clave en main.configuraciones y en archivo_info con el id de la base dueña
+ARCHIVE_ID_KEY = 'archivo_base_id'
+HISTORY_SUFFIX = '_historico'
+CUTOFF_KEY = 'archivo_fecha_corte'
+DEFAULT_BATCH_SIZE = 1000  # ventas (o compras) por transacción
+DEFAULT_BATCH_SLEEP = 0.05  # pausa entre lotes para ceder el escritor
+
+# tabla -> columnas con índice en el archivo (el id siempre es la clave primaria)
+ARCHIVED_TABLES = {
+    'ventas': ('fecha_venta', 'cliente_id'),
+    'ventas_detalle': ('venta_id', 'producto_id'),
+    'pagos_venta': ('venta_id',),
+    'abonos_credito': ('cliente_id',),
+    'abonos_detalle': ('venta_id', 'abono_id'),
+    'compras_materia_prima': ('fecha_compra', 'materia_prima_id', 'proveedor_id'),
+}
+
+# id(conexión) -> versiones de esquema con que se crearon sus vistas históricas
+_view_schema_versions: dict = {}
+
+# Una venta se puede archivar si está saldada, es anterior al corte y todos
+# los abonos que la tocan solo tocan ventas archivables (el abono se mueve entero)
+_ARCHIVABLE_SALE = """
+    v.estado = 'PAGADA' AND v.saldo_pendiente = 0 AND v.fecha_venta < :cutoff
+"""
+
+_ARCHIVABLE_SALES = f"""
+    SELECT v.id FROM main.ventas v
+    WHERE {_ARCHIVABLE_SALE}
+      AND NOT EXISTS (
+          SELECT 1 FROM main.abonos_detalle d
+          JOIN main.abonos_detalle o ON o.abono_id = d.abono_id
+          JOIN main.ventas ov ON ov.id = o.venta_id
+          WHERE d.venta_id = v.id
+            AND NOT (ov.estado = 'PAGADA' AND ov.saldo_pendiente = 0 AND ov.fecha_venta < :cutoff))
+    LIMIT :limit
+"""
+
+
+def archive_path(db_path: Optional[Path] = None) -> Path:
+    """Ruta del archivo histórico de una base: `<base>_archivo.db` a su lado."""
+    if db_path is None:
+        from .connection import db
+        db_path = db.db_path
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}{ARCHIVE_SUFFIX}.db")
+
+
+def is_attached(conn: sqlite3.Connection) -> bool:
+    return any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+
+
+def attach_archive(conn: sqlite3.Connection, path: Optional[Path] = None,
+                   create: bool = False) -> bool:
+    """
+    Adjunta el archivo a la conexión (sin transacción abierta).
+
+    Args:
+        path: Ruta del archivo (por defecto junto a la base principal)
+        create: Crear el archivo si no existe (solo la conexión escritora)
+
+    Returns:
+        True si el archivo quedó adjunto
+    """
+    if is_attached(conn):
+        return True
+    path = Path(path) if path is not None else archive_path()
+    if not path.exists() and not create:
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (str(path),))
+    try:
+        check_archive_owner(conn, path)
+    except RuntimeError:
+        conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+        raise
+    if create:
+        conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode = WAL")
+    return True
+
+
+def _config_value(conn: sqlite3.Connection, schema: str, table: str, key: str) -> Optional[str]:
+    if not conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone():
+        return None
+    row = conn.execute(f"SELECT valor FROM {schema}.{table} WHERE clave = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def check_archive_owner(conn: sqlite3.Connection, path=None):
+    """
+    Verifica que el archivo adjunto sea de la base principal de `conn`.
+    Un archivo nuevo o anterior al registro del dueño se acepta (el próximo
+    archivado lo marca).
+
+    Raises:
+        RuntimeError: si el archivo registra otra base
+    """
+    owner = _config_value(conn, ARCHIVE_SCHEMA, ARCHIVE_INFO_TABLE, ARCHIVE_ID_KEY)
+    if owner is None:
+        return
+    if owner != _config_value(conn, 'main', 'configuraciones', ARCHIVE_ID_KEY):
+        raise RuntimeError(f"El archivo histórico {path or ''} pertenece a otra base de datos")
+
+
+def _claim_archive(conn: sqlite3.Connection):
+    """Registra el id de la base en el archivo (y lo crea en la base si falta)."""
+    base_id = _config_value(conn, 'main', 'configuraciones', ARCHIVE_ID_KEY)
+    if base_id is None:
+        base_id = uuid.uuid4().hex
+        conn.execute("INSERT INTO main.configuraciones (clave, valor) VALUES (?, ?)",
+                     (ARCHIVE_ID_KEY, base_id))
+    conn.execute(f"""CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{ARCHIVE_INFO_TABLE} (
+                         clave TEXT PRIMARY KEY,
+                         valor TEXT
+                     )""")
+    conn.execute(f"INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.{ARCHIVE_INFO_TABLE} (clave, valor) VALUES (?, ?)",
+                 (ARCHIVE_ID_KEY, base_id))
+
+
+def detach_archive(conn: sqlite3.Connection):
+    """Quita las vistas históricas y desadjunta el archivo."""
+    drop_history_views(conn)
+    if is_attached(conn):
+        conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> list[tuple]:
+    """(nombre, tipo) de las columnas de una tabla."""
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def sync_archive_schema(conn: sqlite3.Connection):
+    """
+    Crea las tablas del archivo o les agrega las columnas nuevas de la
+    base caliente. El archivo no declara claves foráneas: la consistencia
+    la garantiza el archivado, que mueve padres e hijos juntos.
+    """
+    for table, indexed in ARCHIVED_TABLES.items():
+        hot = _columns(conn, 'main', table)
+        archived = {name for name, _ in _columns(conn, ARCHIVE_SCHEMA, table)}
+        if not archived:
+            definitions = ', '.join(
+                f"{name} {col_type} PRIMARY KEY" if name == 'id' else f"{name} {col_type}".rstrip()
+                for name, col_type in hot
+            )
+            conn.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} ({definitions})")
+            logger.info(f"Tabla de archivo creada: {table}")
+        else:
+            for name, col_type in hot:
+                if name not in archived:
+                    conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {col_type}")
+                    logger.info(f"Columna agregada al archivo: {table}.{name}")
+        for column in indexed:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_{table}_{column} "
+                         f"ON {table}({column})")
+
+
+# ===== VISTAS HISTÓRICAS =====
+
+def _schema_versions(conn: sqlite3.Connection) -> tuple:
+    """Versión del esquema de la base caliente y del archivo (si está adjunto)."""
+    versions = (conn.execute("PRAGMA main.schema_version").fetchone()[0],)
+    if is_attached(conn):
+        versions += (conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.schema_version").fetchone()[0],)
+    return versions
+
+
+def create_history_views(conn: sqlite3.Connection):
+    """
+    (Re)crea las vistas TEMP `<tabla>_historico` en la conexión: base
+    caliente UNION ALL archivo si está adjunto, o solo la base caliente.
+    """
+    attached = is_attached(conn)
+    # Los lectores son query_only, que también bloquea el esquema TEMP
+    query_only = conn.execute("PRAGMA query_only").fetchone()[0]
+    if query_only:
+        conn.execute("PRAGMA query_only = OFF")
+    try:
+        for table in ARCHIVED_TABLES:
+            names = [name for name, _ in _columns(conn, 'main', table)]
+            select = f"SELECT {', '.join(names)} FROM main.{table}"
+            if attached:
+                # Columnas que el archivo aún no tiene (hasta el próximo archivado) -> NULL
+                archived = {name for name, _ in _columns(conn, ARCHIVE_SCHEMA, table)}
+                columns = ', '.join(name if name in archived else f"NULL AS {name}" for name in names)
+                # Una fila copiada pero aún no borrada de la base caliente se ve una sola vez
+                select += (f" UNION ALL SELECT {columns} FROM {ARCHIVE_SCHEMA}.{table}"
+                           f" WHERE id NOT IN (SELECT id FROM main.{table})")
+            conn.execute(f"DROP VIEW IF EXISTS temp.{table}{HISTORY_SUFFIX}")
+            conn.execute(f"CREATE TEMP VIEW {table}{HISTORY_SUFFIX} AS {select}")
+    finally:
+        if query_only:
+            conn.execute("PRAGMA query_only = ON")
+    _view_schema_versions[id(conn)] = _schema_versions(conn)
+
+
+def drop_history_views(conn: sqlite3.Connection):
+    _view_schema_versions.pop(id(conn), None)
+    query_only = conn.execute("PRAGMA query_only").fetchone()[0]
+    if query_only:
+        conn.execute("PRAGMA query_only = OFF")
+    try:
+        for table in ARCHIVED_TABLES:
+            conn.execute(f"DROP VIEW IF EXISTS temp.{table}{HISTORY_SUFFIX}")
+    finally:
+        if query_only:
+            conn.execute("PRAGMA query_only = ON")
+
+
+def has_history_views(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = ?",
+        (f"ventas{HISTORY_SUFFIX}",)
+    ).fetchone() is not None
+
+
+def prepare_history(conn: sqlite3.Connection) -> bool:
+    """
+    Deja la conexión lista para consultar las vistas históricas: adjunta
+    el archivo si existe y crea las vistas si faltan, quedaron sin él o
+    cambió el esquema (p. ej. columnas nuevas sincronizadas al archivo).
+
+    Returns:
+        True si el archivo está adjunto
+    """
+    had_views = has_history_views(conn)
+    was_attached = is_attached(conn)
+    attached = attach_archive(conn)
+    if (not had_views or attached != was_attached
+            or _view_schema_versions.get(id(conn)) != _schema_versions(conn)):
+        create_history_views(conn)
+    return attached
+
+
+@contextmanager
+def history_reader() -> Iterator[sqlite3.Connection]:
+    """Conexión de lectura con las vistas `<tabla>_historico` disponibles."""
+    from .connection import db
+    with db.reader() as conn:
+        prepare_history(conn)
+        yield conn
+
+
+def fetch_history(query: str, params: tuple = ()) -> list[dict]:
+    """Ejecuta una consulta sobre las vistas históricas (p. ej. `ventas_historico`)."""
+    with history_reader() as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+# ===== ARCHIVADO =====
+
+@contextmanager
+def _delete_triggers_guarded(conn: sqlite3.Connection) -> Iterator[None]:
+    """
+    Pone la fila de `archivando` mientras se borra lo archivado: los
+    triggers de borrado con ARCHIVE_GUARD (saldos, resumen diario, kardex)
+    no se disparan, porque mover una venta al archivo no es anularla. La
+    fila se quita antes del commit, así que otras conexiones nunca la ven,
+    y el esquema no cambia. Los triggers del registro de cambios no tienen
+    la guarda: las vistas abiertas deben quitar las filas que salen.
+    """
+    conn.execute("INSERT INTO main.archivando (id) VALUES (1)")
+    yield
+    conn.execute("DELETE FROM main.archivando")
+
+
+def _copy(conn: sqlite3.Connection, table: str, where: str):
+    # OR REPLACE: repetir la copia tras una interrupción deja la versión actual de la fila
+    columns = ', '.join(name for name, _ in _columns(conn, 'main', table))
+    conn.execute(f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({columns}) "
+                 f"SELECT {columns} FROM main.{table} WHERE {where}")
+
+
+def _archived(table: str, column: str = 'id') -> str:
+    """Condición: la fila ya está confirmada en el archivo."""
+    return f"{column} IN (SELECT id FROM {ARCHIVE_SCHEMA}.{table})"
+
+
+def _copy_sales_batch(conn: sqlite3.Connection, cutoff: str, batch_size: int) -> int:
+    """
+    Paso 1: elige un lote de ventas (en temp.archivo_ventas/archivo_abonos)
+    y lo copia al archivo con sus hijos. Corre en la transacción del
+    llamador y solo escribe en el archivo.
+
+    Returns:
+        Ventas del lote
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS archivo_ventas (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS archivo_abonos (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.archivo_ventas")
+    conn.execute("DELETE FROM temp.archivo_abonos")
+    conn.execute(f"INSERT INTO temp.archivo_ventas {_ARCHIVABLE_SALES}",
+                 {'cutoff': cutoff, 'limit': batch_size})
+    sales = conn.execute("SELECT COUNT(*) FROM temp.archivo_ventas").fetchone()[0]
+    if not sales:
+        return 0
+
+    in_batch = "venta_id IN (SELECT id FROM temp.archivo_ventas)"
+    # Un abono se mueve cuando ya no le quedan detalles fuera de este lote
+    conn.execute(f"""
+        INSERT INTO temp.archivo_abonos
+        SELECT DISTINCT d.abono_id FROM main.abonos_detalle d
+        WHERE d.{in_batch}
+          AND NOT EXISTS (SELECT 1 FROM main.abonos_detalle o
+                          WHERE o.abono_id = d.abono_id
+                            AND o.venta_id NOT IN (SELECT id FROM temp.archivo_ventas))
+    """)
+
+    _copy(conn, 'ventas', "id IN (SELECT id FROM temp.archivo_ventas)")
+    _copy(conn, 'ventas_detalle', in_batch)
+    _copy(conn, 'pagos_venta', in_batch)
+    _copy(conn, 'abonos_credito', "id IN (SELECT id FROM temp.archivo_abonos)")
+    _copy(conn, 'abonos_detalle', in_batch)
+    return sales
+
+
+def _delete_sales_batch(conn: sqlite3.Connection) -> dict:
+    """
+    Paso 2: borra de la base caliente las ventas del lote que ya están en
+    el archivo con todos sus hijos. Una venta con algún hijo sin copiar (p.
+    ej. agregado por otro proceso entre los dos pasos) se queda para el
+    próximo lote.
+    """
+    conn.execute(f"""
+        DELETE FROM temp.archivo_ventas
+        WHERE NOT {_archived('ventas')}
+           OR EXISTS (SELECT 1 FROM main.ventas_detalle d
+                      WHERE d.venta_id = archivo_ventas.id AND NOT {_archived('ventas_detalle', 'd.id')})
+           OR EXISTS (SELECT 1 FROM main.pagos_venta p
+                      WHERE p.venta_id = archivo_ventas.id AND NOT {_archived('pagos_venta', 'p.id')})
+           OR EXISTS (SELECT 1 FROM main.abonos_detalle a
+                      WHERE a.venta_id = archivo_ventas.id AND NOT {_archived('abonos_detalle', 'a.id')})
+    """)
+    conn.execute(f"""
+        DELETE FROM temp.archivo_abonos
+        WHERE NOT {_archived('abonos_credito')}
+           OR EXISTS (SELECT 1 FROM main.abonos_detalle o
+                      WHERE o.abono_id = archivo_abonos.id
+                        AND o.venta_id NOT IN (SELECT id FROM temp.archivo_ventas))
+    """)
+    in_batch = "venta_id IN (SELECT id FROM temp.archivo_ventas)"
+    in_abonos = "id IN (SELECT id FROM temp.archivo_abonos)"
+
+    counts = {'ventas': conn.execute("SELECT COUNT(*) FROM temp.archivo_ventas").fetchone()[0]}
+    with _delete_triggers_guarded(conn):
+        counts['abonos_detalle'] = conn.execute(f"DELETE FROM main.abonos_detalle WHERE {in_batch}").rowcount
+        counts['abonos_credito'] = conn.execute(f"DELETE FROM main.abonos_credito WHERE {in_abonos}").rowcount
+        counts['ventas_detalle'] = conn.execute(f"DELETE FROM main.ventas_detalle WHERE {in_batch}").rowcount
+        counts['pagos_venta'] = conn.execute(f"DELETE FROM main.pagos_venta WHERE {in_batch}").rowcount
+        conn.execute("DELETE FROM main.ventas WHERE id IN (SELECT id FROM temp.archivo_ventas)")
+    return counts
+
+
+def _copy_purchases_batch(conn: sqlite3.Connection, cutoff: str, batch_size: int) -> int:
+    """Paso 1 de las compras anteriores al corte (en temp.archivo_compras)."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS archivo_compras (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.archivo_compras")
+    selected = conn.execute(
+        """INSERT INTO temp.archivo_compras
+           SELECT id FROM main.compras_materia_prima WHERE fecha_compra < ? LIMIT ?""",
+        (cutoff, batch_size)
+    ).rowcount
+    if selected:
+        _copy(conn, 'compras_materia_prima', "id IN (SELECT id FROM temp.archivo_compras)")
+    return selected
+
+
+def _delete_purchases_batch(conn: sqlite3.Connection) -> dict:
+    """Paso 2 de las compras: borra las que ya están en el archivo."""
+    with _delete_triggers_guarded(conn):
+        moved = conn.execute(
+            f"""DELETE FROM main.compras_materia_prima
+                WHERE id IN (SELECT id FROM temp.archivo_compras) AND {_archived('compras_materia_prima')}"""
+        ).rowcount
+    return {'compras_materia_prima': moved}
+
+
+def _record_cutoff(conn: sqlite3.Connection, cutoff: str):
+    conn.execute(
+        """INSERT INTO main.configuraciones (clave, valor) VALUES (?, ?)
+           ON CONFLICT (clave) DO UPDATE SET valor = MAX(valor, excluded.valor)""",
+        (CUTOFF_KEY, cutoff)
+    )
+
+
+def archive_closed_records(cutoff: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                           batch_sleep: float = DEFAULT_BATCH_SLEEP,
+                           include_purchases: bool = True) -> dict:
+    """
+    Mueve al archivo las ventas saldadas y las compras anteriores a `cutoff`.
+
+    Cada lote son dos transacciones del escritor, porque en WAL un commit
+    que toca dos bases no es atómico entre ellas: primero se copia al
+    archivo y se confirma; después se borran de la base caliente solo las
+    filas que ya están en el archivo. Si se interrumpe entre los dos pasos
+    las filas quedan en ambas bases (las vistas históricas muestran la de
+    la base caliente) y la siguiente corrida las vuelve a copiar y borrar.
+    Entre lotes el escritor queda libre para la aplicación.
+
+    Args:
+        cutoff: Fecha ISO; se archiva lo anterior (estrictamente)
+        batch_size: Ventas o compras por transacción
+        batch_sleep: Pausa en segundos entre lotes
+        include_purchases: Archivar también compras_materia_prima
+
+    Returns:
+        {tabla: filas movidas}
+    """
+    from .connection import db
+
+    phases = [(_copy_sales_batch, _delete_sales_batch)]
+    if include_purchases:
+        phases.append((_copy_purchases_batch, _delete_purchases_batch))
+
+    totals = {table: 0 for table in ARCHIVED_TABLES}
+    start = time.perf_counter()
+    with db.writer() as conn:
+        attach_archive(conn, create=True)
+        try:
+            conn.execute("BEGIN")
+            _claim_archive(conn)
+            sync_archive_schema(conn)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            detach_archive(conn)
+            raise
+
+    try:
+        for copy, delete in phases:
+            while True:
+                with db.writer() as conn:
+                    try:
+                        conn.execute("BEGIN IMMEDIATE")
+                        selected = copy(conn, cutoff, batch_size)
+                        conn.commit()
+                        counts = {}
+                        if selected:
+                            conn.execute("BEGIN IMMEDIATE")
+                            counts = delete(conn)
+                            _record_cutoff(conn, cutoff)
+                            conn.commit()
+                    except sqlite3.Error as e:
+                        conn.rollback()
+                        logger.error(f"Error archivando ({copy.__name__}): {e}")
+                        db.db_logger.error(f"Archive batch failed: {e}")
+                        raise
+                if not selected:
+                    break
+                for table, moved in counts.items():
+                    totals[table] += moved
+                logger.debug(f"Lote archivado: {counts}")
+                if not any(counts.values()):
+                    # Nada del lote quedó confirmado para borrar: no repetir el mismo lote
+                    logger.warning(f"Lote sin filas para borrar ({copy.__name__}); se reintenta en la próxima corrida")
+                    break
+                time.sleep(batch_sleep)
+    finally:
+        with db.writer() as conn:
+            detach_archive(conn)
+
+    logger.info(f"Archivado hasta {cutoff} en {time.perf_counter() - start:.1f}s: {totals}")
+    return totals
+
+
+def archive_cutoff(conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
+    """Fecha de corte más reciente archivada, o None si nunca se archivó."""
+    if conn is None:
+        from .connection import db
+        row = db.fetch_one("SELECT valor FROM configuraciones WHERE clave = ?", (CUTOFF_KEY,))
+        return row['valor'] if row else None
+    row = conn.execute("SELECT valor FROM configuraciones WHERE clave = ?", (CUTOFF_KEY,)).fetchone()
+    return row[0] if row else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mueve la historia cerrada al archivo")
+    parser.add_argument('--antes-de', required=True, help="Fecha de corte (YYYY-MM-DD)")
+    parser.add_argument('--lote', type=int, default=DEFAULT_BATCH_SIZE, help="Filas por transacción")
+    parser.add_argument('--sin-compras', action='store_true', help="No archivar compras")
+    args = parser.parse_args()
+
+    from .connection import db
+    db.configure(headless=True)
+    moved = archive_closed_records(args.antes_de, args.lote, include_purchases=not args.sin_compras)
+    for table, count in moved.items():
+        print(f"{table}: {count}")
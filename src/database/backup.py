@@ -0,0 +1,248 @@
+"""
+Backups en línea sin bloquear la aplicación.
+
+La copia se hace desde una conexión propia que abre una transacción de
+lectura: en modo WAL ve una foto fija de la base, así que las ventas que se
+registren mientras tanto no reinician el backup ni esperan por él. Las
+páginas se copian por tramos con una pausa entre tramos para no competir
+por el disco con la interfaz.
+
+La copia se puede cancelar: `cancelled` se consulta entre tramos (y con el
+progress handler durante VACUUM INTO) y aborta con OperationalError; el
+archivo .partial se borra.
+"""
+import datetime
+import gzip
+import re
+import shutil
+import sqlite3
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = 'inventario_backup_'
+# Con microsegundos: dos backups en el mismo segundo no comparten nombre
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S_%f'
+# <fecha>_<hora>[_<microsegundos>][-<contador>] (los nombres viejos no tienen microsegundos)
+_STAMP_RE = re.compile(r'^(\d{8}_\d{6})(?:_(\d{6}))?(?:-(\d+))?$')
+
+# 1 MB por tramo con páginas de 4 KB
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_STEP_SLEEP = 0.01  # segundos
+
+# Retención de los backups automáticos
+DEFAULT_KEEP_DAILY = 7
+DEFAULT_KEEP_WEEKLY = 4
+
+GZIP_LEVEL = 6
+_COPY_BUFFER = 1024 * 1024
+# Instrucciones de la VM entre revisiones de cancelación durante VACUUM INTO
+CANCEL_CHECK_STEPS = 1000
+
+
+def default_backup_path(backup_dir: Path, compress: bool = False,
+                        now: Optional[datetime.datetime] = None) -> Path:
+    """
+    Ruta con marca de tiempo dentro del directorio de backups. Si ya hay
+    un backup con esa marca (comprimido o no) se agrega un contador.
+    """
+    timestamp = (now or datetime.datetime.now()).strftime(TIMESTAMP_FORMAT)
+    backup_dir = Path(backup_dir)
+    name, counter = f"{BACKUP_PREFIX}{timestamp}", 0
+    while any(backup_dir.glob(f"{name}.db*")):
+        counter += 1
+        name = f"{BACKUP_PREFIX}{timestamp}-{counter}"
+    return backup_dir / f"{name}.db{'.gz' if compress else ''}"
+
+
+def _snapshot_connection(db_path: Path) -> sqlite3.Connection:
+    """Conexión con una transacción de lectura abierta (foto fija de la base)."""
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute("BEGIN")
+    conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    return conn
+
+
+def _check_cancelled(cancelled: Optional[Callable[[], bool]]):
+    if cancelled is not None and cancelled():
+        raise sqlite3.OperationalError("Backup cancelado")
+
+
+def copy_paged(db_path: Path, target: Path,
+               pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+               step_sleep: float = DEFAULT_STEP_SLEEP,
+               progress: Optional[Callable[[int, int], None]] = None,
+               cancelled: Optional[Callable[[], bool]] = None):
+    """
+    Copia la base a `target` con la API de backup, por tramos.
+
+    Args:
+        db_path: Base de origen
+        target: Archivo destino (se sobrescribe)
+        pages_per_step: Páginas copiadas por tramo
+        step_sleep: Pausa entre tramos en segundos
+        progress: Callback (páginas copiadas, páginas totales)
+        cancelled: Retorna True para abortar la copia en el próximo tramo
+    """
+    def on_step(status, remaining, total):
+        # Una excepción en el callback aborta conn.backup() y se propaga
+        _check_cancelled(cancelled)
+        if progress is not None:
+            progress(total - remaining, total)
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+
+    source = _snapshot_connection(db_path)
+    try:
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination, pages=pages_per_step, progress=on_step)
+        finally:
+            destination.close()
+    finally:
+        source.rollback()
+        source.close()
+
+
+def vacuum_into(db_path: Path, target: Path,
+                progress: Optional[Callable[[int, int], None]] = None,
+                cancelled: Optional[Callable[[], bool]] = None):
+    """
+    Copia compactada con VACUUM INTO (sin páginas libres, índices reescritos).
+
+    Es una sola sentencia: no hay progreso intermedio y cuesta más CPU que
+    la copia por páginas, pero tampoco bloquea a los escritores en WAL.
+    """
+    source = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if cancelled is not None:
+            source.set_progress_handler(lambda: 1 if cancelled() else 0, CANCEL_CHECK_STEPS)
+        if progress is not None:
+            progress(0, 1)
+        source.execute("VACUUM INTO ?", (str(target),))
+        if progress is not None:
+            progress(1, 1)
+    finally:
+        source.close()
+
+
+def compress_file(source: Path, target: Path, level: int = GZIP_LEVEL):
+    """Comprime `source` en `target` con gzip, por bloques."""
+    with open(source, 'rb') as src, gzip.open(target, 'wb', compresslevel=level) as dst:
+        shutil.copyfileobj(src, dst, _COPY_BUFFER)
+
+
+def create_backup(db_path: Path, backup_path: Path,
+                  pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+                  step_sleep: float = DEFAULT_STEP_SLEEP,
+                  compress: bool = False, vacuum: bool = False,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  cancelled: Optional[Callable[[], bool]] = None) -> Path:
+    """
+    Crea un backup consistente de `db_path` en `backup_path`.
+
+    El archivo se escribe con sufijo .partial y se renombra al terminar, así
+    que un backup interrumpido nunca parece válido.
+
+    Args:
+        compress: Comprimir con gzip (agrega .gz si la ruta no lo tiene)
+        vacuum: Usar VACUUM INTO en lugar de la copia por páginas
+        cancelled: Retorna True para abortar (OperationalError, sin archivo final)
+
+    Returns:
+        Ruta final del backup
+    """
+    backup_path = Path(backup_path)
+    if compress and backup_path.suffix != '.gz':
+        backup_path = backup_path.with_name(backup_path.name + '.gz')
+    backup_path.parent.mkdir(parents=True, exist_ok=True)
+
+    db_file = backup_path.with_suffix('') if compress else backup_path
+    partial = db_file.with_name(db_file.name + '.partial')
+    partial.unlink(missing_ok=True)
+    started = time.perf_counter()
+    try:
+        if vacuum:
+            vacuum_into(db_path, partial, progress, cancelled)
+        else:
+            copy_paged(db_path, partial, pages_per_step, step_sleep, progress, cancelled)
+
+        _check_cancelled(cancelled)
+        if compress:
+            compressed = backup_path.with_name(backup_path.name + '.partial')
+            try:
+                compress_file(partial, compressed)
+            finally:
+                partial.unlink(missing_ok=True)
+            compressed.replace(backup_path)
+        else:
+            partial.replace(backup_path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        backup_path.with_name(backup_path.name + '.partial').unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Backup de {backup_path.stat().st_size / 1e6:.1f} MB en "
+                f"{time.perf_counter() - started:.1f} s")
+    return backup_path
+
+
+# ===== RETENCIÓN =====
+
+def backup_files(backup_dir: Path) -> list[tuple[datetime.datetime, Path]]:
+    """Backups automáticos del directorio con su fecha, del más nuevo al más viejo."""
+    found = []
+    for path in Path(backup_dir).glob(f"{BACKUP_PREFIX}*.db*"):
+        if path.name.endswith('.partial'):
+            continue
+        match = _STAMP_RE.match(path.name[len(BACKUP_PREFIX):].split('.', 1)[0])
+        if match is None:
+            continue
+        try:
+            stamp = datetime.datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+        except ValueError:
+            continue
+        # El contador desempata: el backup con contador se creó después
+        found.append((stamp.replace(microsecond=int(match.group(2) or 0)), int(match.group(3) or 0), path))
+    found.sort(reverse=True)
+    return [(stamp, path) for stamp, _, path in found]
+
+
+def apply_retention(backup_dir: Path, keep_daily: int = DEFAULT_KEEP_DAILY,
+                    keep_weekly: int = DEFAULT_KEEP_WEEKLY,
+                    keep_paths: Iterable[Path] = ()) -> list[Path]:
+    """
+    Conserva el último backup de cada uno de los `keep_daily` días más
+    recientes y de cada una de las `keep_weekly` semanas más recientes;
+    borra los demás.
+
+    Args:
+        keep_paths: Backups que nunca se borran (p. ej. el recién creado)
+
+    Returns:
+        Archivos eliminados
+    """
+    days, weeks = set(), set()
+    keep = {Path(path) for path in keep_paths}
+    for stamp, path in backup_files(backup_dir):
+        day = stamp.date()
+        week = stamp.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(path)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.add(week)
+            keep.add(path)
+
+    removed = []
+    for _, path in backup_files(backup_dir):
+        if path not in keep:
+            path.unlink(missing_ok=True)
+            removed.append(path)
+    if removed:
+        logger.info(f"Retención de backups: {len(removed)} eliminados")
+    return removed
@@ -0,0 +1,242 @@
+"""
+Caché de lectura para datos maestros (métodos de pago, configuraciones,
+departamentos/municipios, presentaciones).
+
+Cada tabla tiene su propio LRU con TTL. La validez se comprueba con
+`PRAGMA data_version` (cambia si cualquier conexión, incluso de otro
+proceso, confirma cambios) y, solo cuando cambió, se lee `versiones_tablas`
+para invalidar únicamente las tablas modificadas.
+
+Los valores se guardan inmutables (listas como tuplas, dicts como
+MappingProxyType) porque se comparten entre hilos. La consulta de carga
+corre fuera del lock: solo el primer hilo que pide una clave ausente la
+carga y los demás esperan ese mismo resultado.
+"""
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional
+
+from .monitor import ChangeMonitor
+
+logger = logging.getLogger(__name__)
+
+# Segundos de vida por tabla (respaldo por si algo escribe sin triggers)
+DEFAULT_TTL = {
+    'metodos_pago': 3600,
+    'configuraciones': 300,
+    'departamentos': 3600,
+    'municipios': 3600,
+    'presentaciones_comerciales': 600,
+}
+DEFAULT_MAX_ENTRIES = 256
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Any:
+    """Copia inmutable de un resultado (listas -> tuplas, dicts -> MappingProxyType)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+
+class _TableCache:
+    """LRU con TTL de una tabla y sus contadores."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0  # Sube en cada clear(): descarta cargas que empezaron antes
+
+    def get(self, key) -> Any:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            self.misses += 1
+            return _MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        self.entries[key] = (value, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.generation += 1
+
+
+class ReferenceCache:
+    """Caché de lectura de tablas maestras con invalidación por versión."""
+
+    def __init__(self, connection=None, ttl: Optional[dict] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._connection = connection
+        ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self._tables = {table: _TableCache(seconds, max_entries) for table, seconds in ttl.items()}
+        self._lock = threading.RLock()
+        self._loading: dict = {}  # (tabla, clave) -> Future de la carga en curso
+        self._monitor: Optional[ChangeMonitor] = None
+        self._data_version: Optional[int] = None
+        self._versions: dict = {}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from .connection import db
+            self._connection = db
+        return self._connection
+
+    def _check_changes(self):
+        """Invalida las tablas cuya versión cambió desde la última consulta."""
+        if self._monitor is None:
+            self._monitor = ChangeMonitor(self.connection.db_path)
+        data_version = self._monitor.data_version()
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        versions = {row['tabla']: row['version']
+                    for row in self._monitor.query("SELECT tabla, version FROM versiones_tablas")}
+        for table, cache in self._tables.items():
+            if versions.get(table) != self._versions.get(table):
+                cache.clear()
+        self._versions = versions
+
+    def get(self, table: str, key: Any, loader: Callable[[], Any]) -> Any:
+        """
+        Retorna el valor cacheado o lo carga con `loader()` y lo guarda.
+
+        `loader()` corre sin el lock de la caché y una sola vez por clave
+        aunque varios hilos la pidan a la vez. El valor retornado es una
+        copia inmutable (ver _freeze).
+
+        Args:
+            table: Tabla de la que depende el valor (define TTL e invalidación)
+            key: Clave dentro de la tabla
+            loader: Función que consulta la base si no hay valor vigente
+        """
+        slot = (table, key)
+        with self._lock:
+            self._check_changes()
+            cache = self._tables[table]
+            value = cache.get(key)
+            if value is not _MISSING:
+                return value
+            pending = self._loading.get(slot)
+            if pending is None:
+                pending = self._loading[slot] = Future()
+                generation = cache.generation
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = _freeze(loader())
+        except BaseException as e:
+            with self._lock:
+                del self._loading[slot]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[slot]
+            # Si la tabla se invalidó durante la carga el valor puede ser viejo: no se guarda
+            if cache.generation == generation:
+                cache.put(key, value)
+        pending.set_result(value)
+        return value
+
+    def invalidate(self, table: Optional[str] = None):
+        """Descarta una tabla o toda la caché."""
+        with self._lock:
+            for name, cache in self._tables.items():
+                if table is None or name == table:
+                    cache.clear()
+
+    def stats(self) -> dict:
+        """Aciertos, fallos, entradas y desalojos por tabla."""
+        with self._lock:
+            return {
+                table: {
+                    'hits': cache.hits,
+                    'misses': cache.misses,
+                    'entries': len(cache.entries),
+                    'evictions': cache.evictions,
+                    'invalidations': cache.invalidations,
+                }
+                for table, cache in self._tables.items()
+            }
+
+    def close(self):
+        if self._monitor is not None:
+            self._monitor.close()
+            self._monitor = None
+
+    # ===== ACCESORES TIPADOS =====
+
+    def config_value(self, clave: str, default: Any = None, cast: Callable[[str], Any] = str) -> Any:
+        """Valor de `configuraciones` convertido con `cast`."""
+        row = self.get('configuraciones', clave, lambda: self.connection.fetch_one(
+            "SELECT valor FROM configuraciones WHERE clave = ?", (clave,)
+        ))
+        if row is None or row['valor'] is None:
+            return default
+        try:
+            return cast(row['valor'])
+        except (TypeError, ValueError):
+            logger.warning(f"Configuración '{clave}' inválida: {row['valor']!r}")
+            return default
+
+    def payment_methods(self) -> tuple[Mapping, ...]:
+        return self.get('metodos_pago', '*', lambda: self.connection.fetch_all(
+            "SELECT id, nombre, codigo FROM metodos_pago ORDER BY id"
+        ))
+
+    def payment_method_by_code(self, codigo: str) -> Optional[Mapping]:
+        """Método de pago por código ('EFECTIVO', 'NEQUI', 'CAJA_SOCIAL', 'CREDITO')."""
+        return self.get('metodos_pago', ('codigo', codigo), lambda: self.connection.fetch_one(
+            "SELECT id, nombre, codigo FROM metodos_pago WHERE codigo = ?", (codigo,)
+        ))
+
+    def departamentos(self) -> tuple[Mapping, ...]:
+        return self.get('departamentos', '*', lambda: self.connection.fetch_all(
+            "SELECT id, nombre FROM departamentos ORDER BY nombre"
+        ))
+
+    def municipios(self, departamento_id: int) -> tuple[Mapping, ...]:
+        return self.get('municipios', departamento_id, lambda: self.connection.fetch_all(
+            "SELECT id, nombre FROM municipios WHERE departamento_id = ? ORDER BY nombre",
+            (departamento_id,)
+        ))
+
+    def presentations_for_product(self, producto_id: int, solo_activas: bool = True) -> tuple[Mapping, ...]:
+        """Presentaciones comerciales de un producto."""
+        query = """SELECT id, producto_id, nombre, es_moq, unidades_por_moq, activo
+                   FROM presentaciones_comerciales WHERE producto_id = ?"""
+        if solo_activas:
+            query += " AND activo = 1"
+        return self.get('presentaciones_comerciales', (producto_id, solo_activas),
+                        lambda: self.connection.fetch_all(query + " ORDER BY id", (producto_id,)))
+
+
+# Instancia global
+reference_cache = ReferenceCache()
@@ -0,0 +1,243 @@
+"""
+Registro de cambios (tabla `cambios`) y su lector en segundo plano.
+
+Los triggers de la migración 9 anotan (tabla, id, operación) de cada fila
+modificada en las tablas transaccionales, con un `seq` creciente que sigue
+el orden de los commits. El lector consulta `PRAGMA data_version` (no toca
+las tablas si nadie confirmó nada), lee lo nuevo desde el último `seq`,
+lo agrupa por tabla y emite `data_changed(tabla, cambios)` para que las
+vistas abiertas actualicen solo esas filas, también cuando escribe otro
+proceso.
+
+El registro se poda solo: se conservan las filas de los últimos
+`retention` segundos (y como máximo `max_rows`). Un lector que se quedó
+atrás de la poda emite `data_resync` y las vistas recargan completas.
+"""
+import threading
+import time
+import logging
+from typing import Optional
+
+from .monitor import ChangeMonitor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.5  # segundos entre lecturas
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_RETENTION = 600.0  # segundos que se conservan las filas del registro
+DEFAULT_MAX_ROWS = 100000
+DEFAULT_PRUNE_INTERVAL = 60.0
+
+INSERTED = 'inserted'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+_OPERATIONS = {'I': INSERTED, 'U': UPDATED, 'D': DELETED}
+
+
+def coalesce_changes(rows) -> dict:
+    """
+    Agrupa filas (tabla, fila_id, operacion) en orden de seq por tabla,
+    con la operación neta de cada id: insertar y luego modificar es una
+    inserción; cualquier cosa seguida de borrar es un borrado.
+
+    Returns:
+        {tabla: {'inserted': [ids], 'updated': [ids], 'deleted': [ids]}}
+    """
+    net: dict = {}
+    for table, row_id, operation in rows:
+        ops = net.setdefault(table, {})
+        previous = ops.get(row_id)
+        if operation == 'D':
+            ops[row_id] = 'D'
+        elif operation == 'I' or previous == 'I':
+            ops[row_id] = 'I'
+        else:
+            ops[row_id] = 'U'
+
+    changes = {}
+    for table, ops in net.items():
+        grouped = {INSERTED: [], UPDATED: [], DELETED: []}
+        for row_id, operation in ops.items():
+            grouped[_OPERATIONS[operation]].append(row_id)
+        changes[table] = grouped
+    return changes
+
+
+class ChangeFeed:
+    """Hilo que lee el registro de cambios y emite las señales de datos."""
+
+    def __init__(self, connection=None, interval: float = DEFAULT_INTERVAL,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 retention: float = DEFAULT_RETENTION,
+                 max_rows: int = DEFAULT_MAX_ROWS,
+                 prune_interval: float = DEFAULT_PRUNE_INTERVAL):
+        self._connection = connection
+        self.interval = interval
+        self.batch_size = batch_size
+        self.retention = retention
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._monitor: Optional[ChangeMonitor] = None
+        self._data_version: Optional[int] = None
+        self._last_seq: Optional[int] = None
+        self._last_prune = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.counts = {'polls': 0, 'rows': 0, 'emitted': 0, 'resyncs': 0, 'pruned': 0}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from .connection import db
+            self._connection = db
+        return self._connection
+
+    @property
+    def monitor(self) -> ChangeMonitor:
+        if self._monitor is None:
+            self._monitor = ChangeMonitor(self.connection.db_path)
+        return self._monitor
+
+    def current_seq(self) -> int:
+        """Último seq asignado (aunque la poda haya vaciado la tabla)."""
+        rows = self.monitor.query("SELECT seq FROM sqlite_sequence WHERE name = 'cambios'")
+        return rows[0]['seq'] if rows else 0
+
+    @property
+    def last_seq(self) -> int:
+        """Último seq ya emitido (al empezar, el actual: no se reemite la historia)."""
+        if self._last_seq is None:
+            self._last_seq = self.current_seq()
+        return self._last_seq
+
+    # ===== LECTURA =====
+
+    def _read_since(self, seq: int) -> Optional[list]:
+        """Filas nuevas desde `seq`, o None si la poda ya borró algunas."""
+        rows = []
+        while True:
+            batch = self.monitor.query(
+                "SELECT seq, tabla, fila_id, operacion FROM cambios WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, self.batch_size)
+            )
+            if not batch:
+                # Sin filas nuevas: si igual se asignaron seqs, la poda se los llevó
+                if not rows and self.current_seq() > seq:
+                    return None
+                break
+            if not rows and batch[0]['seq'] != seq + 1:
+                return None
+            rows.extend(batch)
+            seq = batch[-1]['seq']
+            if len(batch) < self.batch_size:
+                break
+        return rows
+
+    def poll(self) -> dict:
+        """
+        Lee los cambios confirmados desde la última lectura y emite las señales.
+
+        Returns:
+            Los cambios emitidos por tabla (ver coalesce_changes)
+        """
+        with self._lock:
+            self.counts['polls'] += 1
+            data_version = self.monitor.data_version()
+            if data_version == self._data_version:
+                return {}
+            last_seq = self.last_seq
+            self._data_version = data_version
+
+            rows = self._read_since(last_seq)
+            if rows is None:
+                self._last_seq = self.current_seq()
+                self.counts['resyncs'] += 1
+                logger.warning(f"Registro de cambios podado después de seq {last_seq}: recarga completa")
+                self.connection.signals.data_resync.emit()
+                return {}
+            if not rows:
+                return {}
+            self._last_seq = rows[-1]['seq']
+            self.counts['rows'] += len(rows)
+            changes = coalesce_changes((row['tabla'], row['fila_id'], row['operacion']) for row in rows)
+
+        signal = self.connection.signals.data_changed
+        for table, grouped in changes.items():
+            signal.emit(table, grouped)
+            self.counts['emitted'] += 1
+        return changes
+
+    # ===== PODA =====
+
+    def prune(self) -> int:
+        """
+        Borra las filas más viejas que `retention` o fuera de las últimas
+        `max_rows`, sin pasar de lo que este lector ya emitió.
+
+        Returns:
+            Filas borradas
+        """
+        cursor = self.connection.execute_transaction(
+            ["""DELETE FROM cambios
+                WHERE seq <= :leido
+                  AND (seq <= (SELECT MAX(seq) FROM cambios) - :max_filas
+                       OR seq < COALESCE(
+                           (SELECT seq FROM cambios WHERE fecha_registro >= datetime('now', :edad)
+                            ORDER BY seq LIMIT 1),
+                           (SELECT MAX(seq) + 1 FROM cambios)))"""],
+            [{'leido': self.last_seq, 'max_filas': self.max_rows,
+              'edad': f"-{int(self.retention)} seconds"}]
+        )
+        pruned = cursor.rowcount
+        self._last_prune = time.monotonic()
+        if pruned:
+            self.counts['pruned'] += pruned
+            logger.debug(f"Registro de cambios: {pruned} filas podadas")
+        return pruned
+
+    def run_once(self):
+        """Una vuelta del hilo: lee y, si toca, poda (los errores no detienen el hilo)."""
+        try:
+            self.poll()
+            if time.monotonic() - self._last_prune >= self.prune_interval:
+                self.prune()
+        except Exception as e:
+            logger.warning(f"Lectura del registro de cambios falló: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    # ===== CICLO DE VIDA =====
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if self._last_seq is None:
+            self._last_seq = self.current_seq()  # No se reemite la historia anterior
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-changes", daemon=True)
+        self._thread.start()
+        logger.info(f"Registro de cambios leído cada {self.interval}s desde seq {self._last_seq}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._monitor is not None:
+            self._monitor.close()
+            self._monitor = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self.counts)
+        data['last_seq'] = self._last_seq
+        return data
@@ -0,0 +1,208 @@
+"""
+Política de checkpoints del WAL en segundo plano.
+
+Con `wal_autocheckpoint` el checkpoint corre dentro del commit que cruza
+el umbral, en el hilo que escribe, y en horas pico frena justo a los
+escritores. Esta política lo saca del camino de escritura:
+
+- cada `interval` segundos un checkpoint PASSIVE desde una conexión propia
+  (nunca espera ni bloquea a nadie);
+- si el WAL pasa de `restart_bytes`, un RESTART para que el siguiente
+  escritor vuelva a empezar el archivo desde el principio;
+- si el WAL pasa de `wal_cap` o la base lleva `idle_truncate` segundos sin
+  escrituras, un TRUNCATE que además deja el archivo en cero bytes.
+
+RESTART y TRUNCATE corren con la conexión escritora (se serializan con
+las escrituras de la aplicación) y con un busy_timeout corto: si hay
+lectores viejos se reintenta en la siguiente vuelta en vez de esperar.
+"""
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 5.0  # segundos entre revisiones
+DEFAULT_RESTART_BYTES = 16 * 1024 * 1024
+DEFAULT_WAL_CAP = 64 * 1024 * 1024
+DEFAULT_IDLE_TRUNCATE = 60.0  # segundos sin escrituras
+CHECKPOINT_BUSY_TIMEOUT_MS = 250
+# Autocheckpoint que se restaura al detener la política (el valor por defecto de SQLite)
+SQLITE_AUTOCHECKPOINT = 1000
+
+PASSIVE = 'PASSIVE'
+RESTART = 'RESTART'
+TRUNCATE = 'TRUNCATE'
+
+
+class CheckpointPolicy:
+    """Hilo que decide y ejecuta los checkpoints según el tamaño del WAL."""
+
+    def __init__(self, connection=None, interval: float = DEFAULT_INTERVAL,
+                 restart_bytes: int = DEFAULT_RESTART_BYTES,
+                 wal_cap: int = DEFAULT_WAL_CAP,
+                 idle_truncate: float = DEFAULT_IDLE_TRUNCATE):
+        if restart_bytes > wal_cap:
+            raise ValueError("restart_bytes no puede superar wal_cap")
+        self._connection = connection
+        self.interval = interval
+        self.restart_bytes = restart_bytes
+        self.wal_cap = wal_cap
+        self.idle_truncate = idle_truncate
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._passive_conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.counts = {PASSIVE: 0, RESTART: 0, TRUNCATE: 0, 'busy': 0}
+        self.last_result: Optional[dict] = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from .connection import db
+            self._connection = db
+        return self._connection
+
+    @property
+    def wal_path(self) -> Path:
+        db_path = self.connection.db_path
+        return db_path.with_name(db_path.name + '-wal')
+
+    def wal_size(self) -> int:
+        try:
+            return self.wal_path.stat().st_size
+        except OSError:
+            return 0
+
+    def _idle_seconds(self) -> float:
+        try:
+            return time.time() - self.wal_path.stat().st_mtime
+        except OSError:
+            return 0.0
+
+    # ===== DECISIÓN =====
+
+    def choose_mode(self, wal_size: Optional[int] = None,
+                    idle_seconds: Optional[float] = None) -> Optional[str]:
+        """Modo de checkpoint para el estado actual del WAL (None si no hay nada)."""
+        wal_size = self.wal_size() if wal_size is None else wal_size
+        if not wal_size:
+            return None
+        idle_seconds = self._idle_seconds() if idle_seconds is None else idle_seconds
+        if wal_size > self.wal_cap or idle_seconds >= self.idle_truncate:
+            return TRUNCATE
+        if wal_size > self.restart_bytes:
+            return RESTART
+        return PASSIVE
+
+    def notify_commit(self):
+        """Llamado tras un commit: si el WAL ya pasó el umbral, adelanta la revisión."""
+        if self.wal_size() > self.restart_bytes:
+            self._wake.set()
+
+    # ===== EJECUCIÓN =====
+
+    def checkpoint(self, mode: str = PASSIVE) -> dict:
+        """
+        Ejecuta un checkpoint.
+
+        Returns:
+            {'mode', 'busy', 'log_frames', 'checkpointed_frames', 'elapsed'}
+        """
+        if mode not in (PASSIVE, RESTART, TRUNCATE):
+            raise ValueError(f"Modo de checkpoint inválido: {mode}")
+        start = time.perf_counter()
+        if mode == PASSIVE:
+            if self._passive_conn is None:
+                self._passive_conn = sqlite3.connect(self.connection.db_path, check_same_thread=False)
+            row = self._passive_conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        else:
+            with self.connection.writer() as conn:
+                conn.execute(f"PRAGMA busy_timeout = {CHECKPOINT_BUSY_TIMEOUT_MS}")
+                try:
+                    row = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+                finally:
+                    conn.execute(f"PRAGMA busy_timeout = {int(self.connection.get_pool().timeout * 1000)}")
+        result = {
+            'mode': mode,
+            'busy': bool(row[0]),
+            'log_frames': row[1],
+            'checkpointed_frames': row[2],
+            'elapsed': time.perf_counter() - start,
+        }
+        with self._lock:
+            self.counts[mode] += 1
+            if result['busy']:
+                self.counts['busy'] += 1
+            self.last_result = result
+        if result['busy'] and mode != PASSIVE:
+            logger.info(f"Checkpoint {mode} incompleto (lectores activos): "
+                        f"{result['checkpointed_frames']}/{result['log_frames']} frames")
+        return result
+
+    def run_once(self) -> Optional[dict]:
+        """Revisa el WAL y ejecuta el checkpoint que corresponda."""
+        mode = self.choose_mode()
+        if mode is None:
+            return None
+        try:
+            return self.checkpoint(mode)
+        except sqlite3.Error as e:
+            logger.warning(f"Checkpoint {mode} falló: {e}")
+            return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.run_once()
+
+    # ===== CICLO DE VIDA =====
+
+    def apply_pragmas(self, conn: sqlite3.Connection):
+        """Desactiva el autocheckpoint en la conexión escritora y limita el WAL tras vaciarlo."""
+        conn.execute("PRAGMA wal_autocheckpoint = 0")
+        conn.execute(f"PRAGMA journal_size_limit = {int(self.wal_cap)}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self.connection.writer() as conn:
+            self.apply_pragmas(conn)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-checkpoint", daemon=True)
+        self._thread.start()
+        logger.info(f"Checkpoints en segundo plano cada {self.interval}s "
+                    f"(RESTART > {self.restart_bytes} B, TRUNCATE > {self.wal_cap} B)")
+
+    def stop(self, restore_autocheckpoint: bool = True):
+        """Detiene el hilo y (por defecto) devuelve el autocheckpoint a la escritora."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        if self._passive_conn is not None:
+            self._passive_conn.close()
+            self._passive_conn = None
+        if restore_autocheckpoint:
+            with self.connection.writer() as conn:
+                conn.execute(f"PRAGMA wal_autocheckpoint = {SQLITE_AUTOCHECKPOINT}")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self.counts)
+            data['last'] = dict(self.last_result) if self.last_result else None
+        data['wal_size'] = self.wal_size()
+        return data
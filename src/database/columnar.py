@@ -0,0 +1,125 @@
+"""
+Lectura columnar de resultados hacia arreglos NumPy.
+
+Se usa para consultas analíticas (tableros, reportes) donde crear un
+diccionario por fila es el costo dominante. NumPy y pandas se importan
+solo cuando se usan.
+"""
+import sqlite3
+from typing import Optional
+
+# Columnas de fecha del esquema que se convierten a datetime64
+DATE_COLUMNS = {
+    'fecha_venta', 'fecha_compra', 'fecha_pago', 'fecha_produccion',
+    'fecha_abono', 'fecha_analisis', 'fecha_registro', 'fecha_creacion'
+}
+
+# Columnas DECIMAL del esquema: SQLite las guarda como INTEGER cuando no
+# tienen decimales, así que se fuerzan a float64 para evitar mezclas.
+FLOAT_COLUMNS = {
+    'saldo_credito', 'precio_min', 'precio_max', 'stock_actual', 'stock_minimo',
+    'costo_promedio', 'cantidad_moq', 'precio_unitario', 'precio_total',
+    'descuento_porcentaje', 'precio_definitivo', 'total', 'saldo_pendiente',
+    'subtotal', 'monto', 'monto_total', 'saldo_actual', 'azucar_utilizada',
+    'agua_utilizada', 'rendimiento_esperado', 'rendimiento_real',
+    'cantidad_utilizada', 'ph', 'brix', 'humedad', 'densidad', 'viscosidad'
+}
+
+DATETIME_DTYPE = 'datetime64[s]'
+
+# Orden de promoción cuando un bloque posterior trae tipos más amplios
+_KIND_RANK = {'int64': 0, 'float64': 1, 'object': 2}
+
+
+def _default_dtype(name: str) -> Optional[str]:
+    """Tipo fijo para columnas conocidas del esquema."""
+    if name in DATE_COLUMNS:
+        return DATETIME_DTYPE
+    if name in FLOAT_COLUMNS:
+        return 'float64'
+    return None
+
+
+def _infer_dtype(values: tuple) -> str:
+    """Infiere el tipo de un bloque a partir de los tipos Python presentes."""
+    types = set(map(type, values))
+    has_null = type(None) in types
+    types.discard(type(None))
+    if not types:
+        return 'float64'
+    if types == {int}:
+        # NumPy no tiene enteros con nulos: se usa NaN
+        return 'float64' if has_null else 'int64'
+    if types <= {int, float}:
+        return 'float64'
+    return 'object'
+
+
+def _to_array(np, values: tuple, dtype: str):
+    """Convierte los valores de un bloque al tipo indicado."""
+    if dtype == DATETIME_DTYPE:
+        return np.array(['NaT' if v is None else v for v in values], dtype=dtype)
+    # En float64 los None se convierten a NaN directamente
+    return np.array(values, dtype=dtype)
+
+
+class _ColumnBuilder:
+    """Acumula los bloques de una columna y los une al final."""
+
+    def __init__(self, np, name: str, dtype: Optional[str]):
+        self.np = np
+        self.name = name
+        self.fixed = dtype is not None
+        self.dtype = dtype
+        self.chunks = []
+
+    def append(self, values: tuple):
+        if not self.fixed:
+            inferred = _infer_dtype(values)
+            if self.dtype is None or _KIND_RANK[inferred] > _KIND_RANK[self.dtype]:
+                self._promote(inferred)
+        self.chunks.append(_to_array(self.np, values, self.dtype))
+
+    def _promote(self, dtype: str):
+        if self.dtype is not None and self.dtype != dtype:
+            self.chunks = [chunk.astype(dtype) for chunk in self.chunks]
+        self.dtype = dtype
+
+    def build(self):
+        if not self.chunks:
+            return self.np.empty(0, dtype=self.dtype or 'float64')
+        if len(self.chunks) == 1:
+            return self.chunks[0]
+        return self.np.concatenate(self.chunks)
+
+
+def read_columns(cursor: sqlite3.Cursor, chunk_size: int,
+                 dtypes: Optional[dict] = None) -> dict:
+    """
+    Lee un cursor ya ejecutado y retorna {columna: np.ndarray}.
+
+    Las filas se traen con `fetchmany` y se transponen por bloques, de modo
+    que nunca se crea un objeto por fila más allá de las tuplas del bloque.
+
+    Args:
+        cursor: Cursor con `row_factory = None`
+        chunk_size: Filas por bloque
+        dtypes: Tipos NumPy explícitos por columna (opcional)
+    """
+    import numpy as np
+
+    dtypes = dtypes or {}
+    names = [d[0] for d in cursor.description or ()]
+    builders = [
+        _ColumnBuilder(np, name, dtypes.get(name) or _default_dtype(name))
+        for name in names
+    ]
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for builder, values in zip(builders, zip(*rows)):
+            builder.append(values)
+
+    return {builder.name: builder.build() for builder in builders}
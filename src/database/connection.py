@@ -3,36 +3,80 @@ Módulo para manejo de conexión a la base de datos SQLite.
 """
 import sqlite3
 import sys
+import os
+import re
 import logging
+from collections.abc import Mapping
+from contextlib import contextmanager
+from itertools import chain, islice
 from pathlib import Path
-from typing import Optional, Any
-from PySide6.QtCore import QObject, Signal
+import threading
+import time
+import warnings
+from typing import Callable, Iterable, Iterator, Optional, Any
+
+from .pool import ConnectionPool, DEFAULT_POOL_SIZE
+from .signals import create_signals
+from .instrumentation import QueryInstrumentation
 
 logger = logging.getLogger(__name__)
 
-class DatabaseSignals(QObject):
-    """Señales para comunicación con la UI."""
-    connection_established = Signal()
-    connection_error = Signal(str)
-    backup_created = Signal(str)
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_COLUMN_CHUNK_SIZE = 10000
+DEFAULT_BULK_CHUNK_SIZE = 1000
+DEFAULT_PAGE_SIZE = 200
+# Máximo de filas que cuenta estimate_count con filtros
+DEFAULT_COUNT_CAP = 100000
+
+_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Errores atribuibles a una fila concreta (no a la conexión o al disco)
+_ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError,
+               sqlite3.ProgrammingError, sqlite3.DataError)
+
+
+def check_identifier(name: str) -> str:
+    """Valida un nombre de tabla o columna antes de interpolarlo en SQL."""
+    if not isinstance(name, str) or not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Identificador SQL inválido: {name!r}")
+    return name
+
 
 class DatabaseConnection:
     """Gestor de conexión a la base de datos con señales."""
     
     _instance: Optional['DatabaseConnection'] = None
-    _connection: Optional[sqlite3.Connection] = None
+    _pool: Optional[ConnectionPool] = None
+    _signals = None
+    _write_queue = None
+    _checkpointer = None
+    _change_feed = None
+    _warned_get_connection = False
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.signals = DatabaseSignals()
         return cls._instance
     
     def __init__(self):
+        # No toca disco ni importa Qt: todo se difiere al primer uso
         if not hasattr(self, '_initialized'):
             self._initialized = True
             self.db_path = self._get_db_path()
-            self.setup_logging()
+            self.pool_size = int(os.environ.get('INVENTARIO_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+            self.headless = os.environ.get('INVENTARIO_HEADLESS', '') not in ('', '0')
+            self.db_logger = logging.getLogger('database')
+            self.instrumentation = QueryInstrumentation.from_environment()
+    
+    @property
+    def signals(self):
+        """Señales de la capa de datos (Qt o headless), creadas al primer uso."""
+        if self._signals is None:
+            with self._lock:
+                if self._signals is None:
+                    self._signals = create_signals(self.headless)
+        return self._signals
     
     def setup_logging(self):
         """Configura logging para la base de datos."""
@@ -45,42 +89,178 @@ class DatabaseConnection:
             self.db_logger.setLevel(logging.INFO)
     
     def _get_db_path(self) -> Path:
-        """Determina la ruta de la base de datos."""
+        """Determina la ruta de la base de datos (sin crear directorios)."""
+        if os.environ.get('INVENTARIO_DB_PATH'):
+            return Path(os.environ['INVENTARIO_DB_PATH'])
+
         if getattr(sys, 'frozen', False):
             base_dir = Path(sys.executable).parent
         else:
             base_dir = Path(__file__).parent.parent.parent
         
-        data_dir = base_dir / "data"
-        data_dir.mkdir(exist_ok=True)
-        return data_dir / "inventario.db"
+        return base_dir / "data" / "inventario.db"
     
+    def configure(self, pool_size: Optional[int] = None,
+                  db_path: Optional[Path] = None,
+                  headless: Optional[bool] = None):
+        """
+        Ajusta la configuración antes (o en lugar) del primer uso.
+        Si el pool ya estaba abierto se cierra y se recrea en el próximo uso.
+
+        Args:
+            pool_size: Número máximo de conexiones de lectura simultáneas
+            db_path: Ruta alternativa de la base de datos
+            headless: True para no usar Qt (scripts y workers)
+        """
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if db_path is not None:
+            self.db_path = Path(db_path)
+        if headless is not None and headless != self.headless:
+            if self._signals is not None:
+                raise RuntimeError("Las señales ya fueron creadas; configure el modo antes de usarlas")
+            self.headless = headless
+        if self._pool is not None:
+            self.close_connection()
+
+    def get_pool(self) -> ConnectionPool:
+        """Obtiene o crea el pool de conexiones."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    self.setup_logging()
+                    self._pool = ConnectionPool(
+                        self.db_path,
+                        size=self.pool_size,
+                        on_connect=self._on_pool_connect,
+                        on_error=self._on_pool_error
+                    )
+        return self._pool
+
+    def _on_pool_connect(self, conn: sqlite3.Connection, role: str):
+        logger.info(f"Conexión establecida ({role}): {self.db_path}")
+        if role == 'writer':
+            if self._checkpointer is not None:
+                self._checkpointer.apply_pragmas(conn)
+            self.signals.connection_established.emit()
+
+    def _on_pool_error(self, error_msg: str):
+        self.signals.connection_error.emit(error_msg)
+
     def get_connection(self) -> sqlite3.Connection:
-        """Obtiene o crea la conexión a la base de datos."""
-        if self._connection is None:
-            try:
-                # Timeout para evitar bloqueos en operaciones concurrentes
-                self._connection = sqlite3.connect(
-                    self.db_path,
-                    timeout=30,
-                    check_same_thread=False
-                )
-                self._connection.row_factory = sqlite3.Row
-                self._connection.execute("PRAGMA foreign_keys = ON")
-                self._connection.execute("PRAGMA journal_mode = WAL")  # Mejor rendimiento
-                self._connection.execute("PRAGMA synchronous = NORMAL")
-                
-                logger.info(f"Conexión establecida: {self.db_path}")
-                self.signals.connection_established.emit()
-                
-            except sqlite3.Error as e:
-                error_msg = f"Error conectando a la BD: {e}"
-                logger.error(error_msg)
-                self.signals.connection_error.emit(error_msg)
-                raise
-        
-        return self._connection
-    
+        """
+        Obtiene la conexión escritora compartida (obsoleto).
+
+        Se conserva por compatibilidad y sigue funcionando igual que antes.
+        Dentro de `writer()` es segura. Fuera de él la conexión se usa sin
+        el lock del escritor único, así que lo que se escriba con ella
+        puede mezclarse con las transacciones de otros hilos. El código
+        nuevo debe usar `reader()` para consultas y `writer()` para
+        modificaciones.
+        """
+        warnings.warn("get_connection() está obsoleto; use reader() o writer()",
+                      DeprecationWarning, stacklevel=2)
+        pool = self.get_pool()
+        if not pool.holds_writer() and not self._warned_get_connection:
+            self._warned_get_connection = True
+            logger.warning("get_connection() llamado fuera de writer(): la conexión escritora "
+                           "se usa sin el lock del escritor")
+        return pool.writer_connection()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Conexión de lectura propia del hilo actual."""
+        with self.get_pool().reader() as conn:
+            yield conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Conexión escritora con acceso exclusivo para el hilo actual."""
+        with self.get_pool().writer() as conn:
+            yield conn
+
+    def pool_stats(self) -> dict:
+        """Estadísticas del pool: préstamos, esperas y tiempo retenido."""
+        if self._pool is None:
+            return {}
+        return self._pool.stats.snapshot()
+
+    def query_stats(self, top: Optional[int] = None, sort_by: str = 'total_time') -> list[dict]:
+        """
+        Estadísticas por sentencia normalizada: llamadas, errores, filas,
+        tiempo total y percentiles p50/p95/p99 (en segundos).
+        """
+        return self.instrumentation.stats(top, sort_by)
+
+    def start_stats_dump(self, interval: float = 300, path: Optional[Path] = None):
+        """Vuelca `query_stats()` a JSON cada `interval` segundos (por defecto junto a la base)."""
+        if path is None:
+            path = self.db_path.parent / 'query_stats.json'
+        self.instrumentation.start_periodic_dump(Path(path), interval)
+
+    @property
+    def write_queue(self):
+        """Cola de escrituras con commit agrupado (hilo escritor creado al primer envío)."""
+        if self._write_queue is None:
+            with self._lock:
+                if self._write_queue is None:
+                    from .writer import WriteQueue
+                    self._write_queue = WriteQueue(self)
+        return self._write_queue
+
+    def submit_write(self, queries: list, params: list = None):
+        """
+        Encola las sentencias en la cola de escrituras y retorna un Future.
+
+        A diferencia de `execute_transaction` no espera ni hace commit propio:
+        se confirma junto con las demás escrituras en cola, aislada en su
+        propio SAVEPOINT.
+        """
+        return self.write_queue.submit(queries, params)
+
+    @property
+    def checkpointer(self):
+        """Política de checkpoints activa, o None si no se inició."""
+        return self._checkpointer
+
+    def start_checkpointer(self, **kwargs):
+        """
+        Inicia los checkpoints del WAL en segundo plano y desactiva el
+        autocheckpoint de la conexión escritora (ver CheckpointPolicy).
+        """
+        if self._checkpointer is None:
+            from .checkpoint import CheckpointPolicy
+            self._checkpointer = CheckpointPolicy(self, **kwargs)
+            self._checkpointer.start()
+        return self._checkpointer
+
+    def stop_checkpointer(self):
+        if self._checkpointer is not None:
+            self._checkpointer.stop(restore_autocheckpoint=self._pool is not None)
+            self._checkpointer = None
+
+    @property
+    def change_feed(self):
+        """Lector del registro de cambios activo, o None si no se inició."""
+        return self._change_feed
+
+    def start_change_feed(self, **kwargs):
+        """
+        Inicia el hilo que lee la tabla `cambios` y emite `data_changed` /
+        `data_resync` (ver ChangeFeed).
+        """
+        if self._change_feed is None:
+            from .changes import ChangeFeed
+            self._change_feed = ChangeFeed(self, **kwargs)
+            self._change_feed.start()
+        return self._change_feed
+
+    def stop_change_feed(self):
+        if self._change_feed is not None:
+            self._change_feed.stop()
+            self._change_feed = None
+
     def execute_transaction(self, queries: list, params: list = None):
         """
         Ejecuta múltiples queries en una transacción.
@@ -89,66 +269,491 @@ class DatabaseConnection:
             queries: Lista de queries SQL
             params: Lista de parámetros para cada query (opcional)
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            for i, query in enumerate(queries):
-                if params and i < len(params):
-                    cursor.execute(query, params[i])
-                else:
-                    cursor.execute(query)
+        with self.writer() as conn:
+            cursor = conn.cursor()
             
-            conn.commit()
-            return cursor
-        
-        except sqlite3.Error as e:
-            conn.rollback()
-            logger.error(f"Error en transacción: {e}")
-            self.db_logger.error(f"Transaction failed: {queries}")
-            raise
+            record = self.instrumentation.record
+            try:
+                for i, query in enumerate(queries):
+                    query_params = params[i] if params and i < len(params) else ()
+                    start = time.perf_counter()
+                    try:
+                        cursor.execute(query, query_params)
+                    except sqlite3.Error:
+                        record(query, time.perf_counter() - start, error=True)
+                        raise
+                    record(query, time.perf_counter() - start, cursor.rowcount, conn=conn,
+                           params=query_params)
+                
+                conn.commit()
+                return cursor
+            
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error(f"Error en transacción: {e}")
+                self.db_logger.error(f"Transaction failed: {queries}")
+                raise
+    
+    def execute_many(self, query: str, rows: Iterable,
+                     chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+                     on_row_error: Optional[Callable[[Any, sqlite3.Error], None]] = None) -> int:
+        """
+        Ejecuta `executemany` por bloques dentro de una sola transacción.
+
+        Sin `on_row_error` cualquier fila inválida revierte todo. Con él, el
+        bloque que falla se reintenta fila a fila y cada fila rechazada se
+        reporta al callback sin abortar el resto de la carga.
+
+        Si el llamador ya tiene una transacción abierta en `writer()`, la
+        carga corre en un SAVEPOINT: una falla revierte solo la carga y el
+        commit queda a cargo del llamador.
+
+        Args:
+            query: Sentencia SQL con placeholders
+            rows: Iterable de parámetros (tuplas o diccionarios)
+            chunk_size: Filas por llamada a `executemany`
+            on_row_error: Callback (fila, error) para filas rechazadas
+
+        Returns:
+            Número de filas escritas
+        """
+        rows = iter(rows)
+        written = 0
+        start = time.perf_counter()
+        with self.writer() as conn:
+            nested = conn.in_transaction
+            try:
+                conn.execute("SAVEPOINT bulk_load" if nested else "BEGIN")
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    if on_row_error is None:
+                        conn.executemany(query, chunk)
+                        written += len(chunk)
+                    else:
+                        written += self._execute_chunk_isolated(conn, query, chunk, on_row_error)
+                if nested:
+                    conn.execute("RELEASE bulk_load")
+                else:
+                    conn.commit()
+                self.instrumentation.record(query, time.perf_counter() - start, written)
+                return written
+
+            except sqlite3.Error as e:
+                if nested:
+                    conn.execute("ROLLBACK TO bulk_load")
+                    conn.execute("RELEASE bulk_load")
+                else:
+                    conn.rollback()
+                self.instrumentation.record(query, time.perf_counter() - start, written, error=True)
+                logger.error(f"Error en carga masiva: {e}")
+                self.db_logger.error(f"Bulk write failed: {query}")
+                raise
+
+    @staticmethod
+    def _execute_chunk_isolated(conn: sqlite3.Connection, query: str, chunk: list,
+                                on_row_error: Callable[[Any, sqlite3.Error], None]) -> int:
+        """Intenta el bloque completo y, si falla, lo reintenta fila a fila."""
+        conn.execute("SAVEPOINT bulk_chunk")
+        try:
+            conn.executemany(query, chunk)
+            conn.execute("RELEASE bulk_chunk")
+            return len(chunk)
+        except _ROW_ERRORS:
+            conn.execute("ROLLBACK TO bulk_chunk")
+            conn.execute("RELEASE bulk_chunk")
+
+        written = 0
+        for row in chunk:
+            conn.execute("SAVEPOINT bulk_row")
+            try:
+                conn.execute(query, row)
+                conn.execute("RELEASE bulk_row")
+                written += 1
+            except _ROW_ERRORS as e:
+                conn.execute("ROLLBACK TO bulk_row")
+                conn.execute("RELEASE bulk_row")
+                on_row_error(row, e)
+        return written
+
+    def bulk_insert(self, table: str, columns: list, rows: Iterable,
+                    chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+                    on_conflict: Optional[str] = None,
+                    on_row_error: Optional[Callable[[Any, sqlite3.Error], None]] = None) -> int:
+        """
+        Inserta filas masivamente en `table`.
+
+        Las filas pueden ser tuplas en el orden de `columns` o diccionarios
+        con esas claves (las claves adicionales se ignoran).
+
+        Args:
+            table: Tabla destino
+            columns: Columnas a insertar
+            rows: Iterable de filas
+            chunk_size: Filas por llamada a `executemany`
+            on_conflict: 'IGNORE', 'REPLACE', 'ABORT'... (opcional)
+            on_row_error: Callback (fila, error) para filas rechazadas
+        """
+        rows, placeholders = self._bulk_placeholders(columns, rows)
+        if rows is None:
+            return 0
+        verb = 'INSERT'
+        if on_conflict:
+            if on_conflict.upper() not in ('IGNORE', 'REPLACE', 'ABORT', 'FAIL', 'ROLLBACK'):
+                raise ValueError(f"Resolución de conflicto inválida: {on_conflict}")
+            verb = f'INSERT OR {on_conflict.upper()}'
+        query = (f"{verb} INTO {check_identifier(table)} "
+                 f"({', '.join(map(check_identifier, columns))}) VALUES ({placeholders})")
+        return self.execute_many(query, rows, chunk_size, on_row_error)
+
+    def bulk_upsert(self, table: str, columns: list, rows: Iterable,
+                    conflict_columns: list, update_columns: Optional[list] = None,
+                    chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+                    on_row_error: Optional[Callable[[Any, sqlite3.Error], None]] = None) -> int:
+        """
+        Inserta o actualiza filas masivamente (INSERT ... ON CONFLICT DO UPDATE).
+
+        Args:
+            conflict_columns: Columnas de la restricción UNIQUE/PK en conflicto
+            update_columns: Columnas a actualizar (por defecto las demás)
+        """
+        rows, placeholders = self._bulk_placeholders(columns, rows)
+        if rows is None:
+            return 0
+        if update_columns is None:
+            update_columns = [c for c in columns if c not in conflict_columns]
+        if update_columns:
+            action = "DO UPDATE SET " + ', '.join(
+                f"{check_identifier(c)} = excluded.{c}" for c in update_columns
+            )
+        else:
+            action = "DO NOTHING"
+        query = (f"INSERT INTO {check_identifier(table)} "
+                 f"({', '.join(map(check_identifier, columns))}) VALUES ({placeholders}) "
+                 f"ON CONFLICT ({', '.join(map(check_identifier, conflict_columns))}) {action}")
+        return self.execute_many(query, rows, chunk_size, on_row_error)
+
+    @staticmethod
+    def _bulk_placeholders(columns: list, rows: Iterable) -> tuple:
+        """Elige placeholders posicionales o con nombre según la primera fila."""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return None, ''
+        if isinstance(first, Mapping):
+            placeholders = ', '.join(f":{check_identifier(c)}" for c in columns)
+        else:
+            placeholders = ', '.join('?' for _ in columns)
+        return chain([first], rows), placeholders
     
     def fetch_one(self, query: str, params: tuple = ()) -> Optional[dict]:
         """Ejecuta query y retorna una fila como diccionario."""
-        conn = self.get_connection()
-        cursor = conn.execute(query, params)
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        with self.reader() as conn:
+            start = time.perf_counter()
+            try:
+                row = conn.execute(query, params).fetchone()
+            except sqlite3.Error:
+                self.instrumentation.record(query, time.perf_counter() - start, error=True)
+                raise
+            self.instrumentation.record(query, time.perf_counter() - start, 1 if row else 0,
+                                        conn=conn, params=params)
+            return dict(row) if row else None
     
     def fetch_all(self, query: str, params: tuple = ()) -> list[dict]:
         """Ejecuta query y retorna todas las filas como lista de diccionarios."""
-        conn = self.get_connection()
-        cursor = conn.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
-    
+        with self.reader() as conn:
+            start = time.perf_counter()
+            try:
+                rows = conn.execute(query, params).fetchall()
+            except sqlite3.Error:
+                self.instrumentation.record(query, time.perf_counter() - start, error=True)
+                raise
+            self.instrumentation.record(query, time.perf_counter() - start, len(rows),
+                                        conn=conn, params=params)
+            return [dict(row) for row in rows]
+
+    def fetch_batches(self, query: str, params: tuple = (),
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list[dict]]:
+        """
+        Ejecuta query y entrega las filas en lotes con `fetchmany`.
+
+        Solo un lote vive en memoria a la vez; la conexión de lectura queda
+        prestada hasta que el generador se agota o se cierra.
+
+        Args:
+            query: Consulta SQL
+            params: Parámetros de la consulta
+            batch_size: Filas por lote
+        """
+        with self.reader() as conn:
+            # El tiempo medido excluye lo que tarda el consumidor entre lotes
+            elapsed = 0.0
+            total = 0
+            start = time.perf_counter()
+            cursor = conn.execute(query, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    elapsed += time.perf_counter() - start
+                    if not rows:
+                        break
+                    total += len(rows)
+                    yield [dict(row) for row in rows]
+                    start = time.perf_counter()
+            finally:
+                cursor.close()
+                self.instrumentation.record(query, elapsed, total)
+
+    def fetch_iter(self, query: str, params: tuple = (),
+                   batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[dict]:
+        """Ejecuta query y entrega las filas una a una sin cargarlas todas."""
+        for batch in self.fetch_batches(query, params, batch_size):
+            yield from batch
+
+    def fetch_columns(self, query: str, params: tuple = (),
+                      chunk_size: int = DEFAULT_COLUMN_CHUNK_SIZE,
+                      dtypes: Optional[dict] = None) -> dict:
+        """
+        Ejecuta query y retorna {columna: np.ndarray} sin crear dicts por fila.
+
+        Las fechas conocidas del esquema (fecha_venta, fecha_compra, ...) se
+        entregan como datetime64 y las columnas DECIMAL como float64.
+
+        Args:
+            query: Consulta SQL
+            params: Parámetros de la consulta
+            chunk_size: Filas leídas por bloque
+            dtypes: Tipos NumPy explícitos por columna (opcional)
+        """
+        from .columnar import read_columns
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            start = time.perf_counter()
+            try:
+                cursor.execute(query, params)
+                columns = read_columns(cursor, chunk_size, dtypes)
+            finally:
+                cursor.close()
+            rows = len(next(iter(columns.values()))) if columns else 0
+            self.instrumentation.record(query, time.perf_counter() - start, rows,
+                                        conn=conn, params=params)
+            return columns
+
+    def fetch_frame(self, query: str, params: tuple = (),
+                    chunk_size: int = DEFAULT_COLUMN_CHUNK_SIZE,
+                    dtypes: Optional[dict] = None):
+        """Ejecuta query y retorna un pandas.DataFrame construido por columnas."""
+        import pandas as pd
+
+        columns = self.fetch_columns(query, params, chunk_size, dtypes)
+        return pd.DataFrame(columns, copy=False)
+
+    @staticmethod
+    def _filter_conditions(filters: Optional[dict]) -> tuple[list, list]:
+        """Condiciones de igualdad {columna: valor} (None -> IS NULL)."""
+        conditions, values = [], []
+        for column, value in (filters or {}).items():
+            if value is None:
+                conditions.append(f"{check_identifier(column)} IS NULL")
+            else:
+                conditions.append(f"{check_identifier(column)} = ?")
+                values.append(value)
+        return conditions, values
+
+    def sortable_columns(self, table: str) -> set:
+        """Columnas que sirven de clave de paginación: NOT NULL o la clave primaria."""
+        check_identifier(table)
+        return {row['name'] for row in self.fetch_all(f"PRAGMA table_info({table})")
+                if row['notnull'] or row['pk']}
+
+    def fetch_page(self, table: str, columns: Optional[list] = None,
+                   order_by: Iterable[str] = ('id',), after: Optional[tuple] = None,
+                   page_size: int = DEFAULT_PAGE_SIZE, descending: bool = False,
+                   filters: Optional[dict] = None, where: Optional[str] = None,
+                   params: tuple = ()) -> dict:
+        """
+        Página de `table` por keyset: continúa después de la última clave
+        vista en lugar de usar OFFSET, así que cada página cuesta lo mismo.
+
+        `id` se agrega al final de la clave para desempatar. Las columnas de
+        orden deben ser NOT NULL (con NULL la comparación de la clave nunca
+        es verdadera y la paginación terminaría antes de tiempo; se rechazan
+        con ValueError) y tener un índice (col, ..., id) para que el costo
+        no dependa del tamaño de la tabla.
+
+        Args:
+            table: Tabla a paginar
+            columns: Columnas a retornar (por defecto todas)
+            order_by: Columnas de la clave de orden
+            after: `last_key` de la página anterior (None = primera página)
+            page_size: Filas por página
+            descending: Orden descendente en todas las columnas de la clave
+            filters: Igualdades {columna: valor}
+            where: Condición SQL adicional (solo desde código, nunca del usuario)
+            params: Parámetros de `where`
+
+        Returns:
+            {'rows': [...], 'last_key': tupla para la siguiente página, 'has_more': bool}
+        """
+        check_identifier(table)
+        key = [check_identifier(c) for c in order_by]
+        if 'id' not in key:
+            key.append('id')
+        extra = [c for c in key if c != 'id']
+        nullable = [c for c in extra if c not in self.sortable_columns(table)] if extra else []
+        if nullable:
+            raise ValueError(f"Columnas de orden que admiten NULL en {table}: {', '.join(nullable)}")
+        if columns:
+            selected = [check_identifier(c) for c in columns]
+            selected += [c for c in key if c not in selected]
+            select = ', '.join(selected)
+        else:
+            select = '*'
+
+        conditions, values = self._filter_conditions(filters)
+        if where:
+            conditions.append(f"({where})")
+            values.extend(params)
+        if after is not None:
+            if len(after) != len(key):
+                raise ValueError(f"La clave de paginación debe tener {len(key)} valores")
+            operator = '<' if descending else '>'
+            conditions.append(f"({', '.join(key)}) {operator} ({', '.join('?' for _ in key)})")
+            values.extend(after)
+
+        direction = ' DESC' if descending else ''
+        query = f"SELECT {select} FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {', '.join(c + direction for c in key)} LIMIT ?"
+        values.append(page_size + 1)
+
+        rows = self.fetch_all(query, tuple(values))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        last_key = tuple(rows[-1][c] for c in key) if rows else after
+        return {'rows': rows, 'last_key': last_key, 'has_more': has_more}
+
+    def estimate_count(self, table: str, filters: Optional[dict] = None,
+                       where: Optional[str] = None, params: tuple = (),
+                       cap: int = DEFAULT_COUNT_CAP) -> int:
+        """
+        Número aproximado de filas sin recorrer la tabla.
+
+        Sin filtros usa sqlite_stat1 (tras ANALYZE) o MAX(id); con filtros
+        cuenta hasta `cap` filas, así que el resultado nunca pasa de `cap`.
+        """
+        check_identifier(table)
+        conditions, values = self._filter_conditions(filters)
+        if where:
+            conditions.append(f"({where})")
+            values.extend(params)
+
+        if not conditions:
+            try:
+                stat = self.fetch_one(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,)
+                ) or self.fetch_one("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,))
+            except sqlite3.OperationalError:
+                stat = None  # Todavía no se ha corrido ANALYZE
+            if stat:
+                return int(stat['stat'].split()[0])
+            row = self.fetch_one(f"SELECT MAX(id) AS n FROM {table}")
+            return row['n'] or 0
+
+        row = self.fetch_one(
+            f"SELECT COUNT(*) AS n FROM (SELECT 1 FROM {table} WHERE {' AND '.join(conditions)} LIMIT ?)",
+            tuple(values) + (cap,)
+        )
+        return row['n']
+
     def close_connection(self):
-        """Cierra la conexión a la base de datos."""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        """Cierra todas las conexiones del pool (tras confirmar las escrituras en cola)."""
+        self.instrumentation.stop_periodic_dump()
+        self.stop_change_feed()
+        if self._write_queue is not None:
+            self._write_queue.shutdown()
+            self._write_queue = None
+        if self._checkpointer is not None:
+            self._checkpointer.stop(restore_autocheckpoint=False)
+            self._checkpointer = None
+        if self._pool:
+            self._pool.close()
+            self._pool = None
             logger.info("Conexión cerrada")
     
-    def backup_database(self, backup_path: Optional[Path] = None) -> Path:
-        """Crea un backup de la base de datos."""
-        import shutil
-        import datetime
+    def backup_database(self, backup_path: Optional[Path] = None,
+                        pages_per_step: Optional[int] = None,
+                        step_sleep: Optional[float] = None,
+                        compress: bool = False, vacuum: bool = False,
+                        keep_daily: Optional[int] = None,
+                        keep_weekly: Optional[int] = None,
+                        cancelled: Optional[Callable[[], bool]] = None) -> Path:
+        """
+        Crea un backup de la base de datos sin bloquear a los escritores.
+
+        La copia se hace por tramos desde una foto fija de la base y emite
+        `backup_progress(copiadas, total)`. Sin `backup_path` se guarda en
+        data/backups y después se aplica la política de retención.
+
+        Args:
+            backup_path: Ruta destino (opcional)
+            pages_per_step: Páginas copiadas por tramo
+            step_sleep: Pausa entre tramos en segundos
+            compress: Comprimir con gzip
+            vacuum: Copia compactada con VACUUM INTO
+            keep_daily: Backups diarios a conservar (solo automáticos)
+            keep_weekly: Backups semanales a conservar (solo automáticos)
+            cancelled: Retorna True para abortar la copia entre tramos
+        """
+        from . import backup
         
-        if backup_path is None:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_dir = self.db_path.parent / "backups"
-            backup_dir.mkdir(exist_ok=True)
-            backup_path = backup_dir / f"inventario_backup_{timestamp}.db"
+        self.get_pool()  # Asegura que la base exista
+        automatic = backup_path is None
+        if automatic:
+            backup_path = backup.default_backup_path(self.db_path.parent / "backups", compress)
         
-        # Usar backup API de SQLite para integridad
-        conn = self.get_connection()
-        backup_conn = sqlite3.connect(backup_path)
-        conn.backup(backup_conn)
-        backup_conn.close()
+        backup_path = backup.create_backup(
+            self.db_path, backup_path,
+            pages_per_step=pages_per_step or backup.DEFAULT_PAGES_PER_STEP,
+            step_sleep=backup.DEFAULT_STEP_SLEEP if step_sleep is None else step_sleep,
+            compress=compress, vacuum=vacuum,
+            progress=self.signals.backup_progress.emit,
+            cancelled=cancelled
+        )
         
         logger.info(f"Backup creado en: {backup_path}")
         self.signals.backup_created.emit(str(backup_path))
+        if automatic:
+            backup.apply_retention(
+                backup_path.parent,
+                backup.DEFAULT_KEEP_DAILY if keep_daily is None else keep_daily,
+                backup.DEFAULT_KEEP_WEEKLY if keep_weekly is None else keep_weekly,
+                keep_paths=[backup_path]
+            )
         return backup_path
     
+    def backup_database_async(self, **kwargs):
+        """
+        Ejecuta `backup_database(**kwargs)` en el ejecutor de consultas con
+        prioridad BATCH. Retorna un QueryHandle; el final también llega por
+        la señal backup_created. `handle.cancel()` aborta la copia en el
+        próximo tramo (query_cancelled) y no deja archivo.
+        """
+        from .executor import BATCH, get_executor
+        
+        handle = None
+        
+        def cancelled() -> bool:
+            return handle is not None and handle.cancel_requested
+        
+        handle = get_executor().submit_call(self.backup_database, priority=BATCH,
+                                            cancelled=cancelled, **kwargs)
+        return handle
+    
     def get_database_size(self) -> int:
         """Retorna el tamaño de la base de datos en bytes."""
         if self.db_path.exists():
@@ -156,5 +761,13 @@ class DatabaseConnection:
         return 0
 
 
-# Instancia global
-db = DatabaseConnection()
\ No newline at end of file
+# Instancia global (construirla no abre conexiones ni importa Qt)
+db = DatabaseConnection()
+
+
+def __getattr__(name: str):
+    # Compatibilidad: DatabaseSignals vivía en este módulo
+    if name == 'DatabaseSignals':
+        from . import signals
+        return signals.DatabaseSignals
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
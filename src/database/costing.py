@@ -0,0 +1,274 @@
+"""
+Costeo por promedio ponderado móvil.
+
+Los triggers de la migración 8 mantienen los costos en O(1) por fila:
+cada compra actualiza `materia_prima.costo_promedio`, cada consumo de un
+lote congela el costo de la materia prima en `produccion_detalle` y lo
+suma a `lotes_produccion.costo_total` y al costo promedio del producto
+(`stock_productos.costo_promedio`), y cada línea de venta congela el costo
+del producto en `ventas_detalle.costo_unitario` (costo de lo vendido).
+
+El recálculo completo reproduce el kardex en orden con las mismas fórmulas
+y compara: solo difiere si se editaron o borraron compras, consumos o
+lotes después de registrados (el promedio móvil no se puede deshacer).
+
+Uso: python -m src.database.costing [--rebuild]
+"""
+import argparse
+import sqlite3
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TOLERANCE = 0.005
+MAX_DRIFT_DETAILS = 20
+
+# nombre -> (tabla, columna) que mantienen los triggers
+COST_TARGETS = {
+    'materia_prima.costo_promedio': ('materia_prima', 'costo_promedio'),
+    'stock_productos.costo_promedio': ('stock_productos', 'costo_promedio'),
+    'produccion_detalle.costo_unitario': ('produccion_detalle', 'costo_unitario'),
+    'lotes_produccion.costo_total': ('lotes_produccion', 'costo_total'),
+    'ventas_detalle.costo_unitario': ('ventas_detalle', 'costo_unitario'),
+}
+
+
+# ===== RECÁLCULO =====
+
+def _stock_round(value: float) -> float:
+    """Redondeo del stock de materia prima como lo guarda el kardex (ROUND(x, 4))."""
+    return round(value, 4)
+
+
+def recompute_costs(conn: sqlite3.Connection) -> dict:
+    """
+    Costos esperados reproduciendo el kardex en orden de registro.
+
+    Cada fila de origen cuenta la primera vez que aparece en el kardex (su
+    inserción), igual que los triggers; los contra-asientos de ediciones y
+    borrados solo mueven el stock. Si la conexión tiene las vistas
+    históricas, las compras archivadas también se leen.
+
+    Returns:
+        {nombre en COST_TARGETS: {id: costo esperado}}
+    """
+    from .archive import HISTORY_SUFFIX, has_history_views
+
+    purchases_table = 'compras_materia_prima'
+    if has_history_views(conn):
+        purchases_table += HISTORY_SUFFIX
+    purchases = dict(conn.execute(f"SELECT id, precio_definitivo FROM {purchases_table}").fetchall())
+    # detalle -> (lote, ítem de stock del producto, unidades del lote, cantidad utilizada)
+    consumptions = {
+        row[0]: tuple(row[1:]) for row in conn.execute(
+            """SELECT d.id, d.lote_id, sp.id, l.cantidad_producida, d.cantidad_utilizada
+               FROM produccion_detalle d
+               JOIN lotes_produccion l ON l.id = d.lote_id
+               LEFT JOIN stock_productos sp
+                 ON sp.producto_id = l.producto_id AND sp.presentacion_id = l.presentacion_id"""
+        )
+    }
+    lots = {row[0] for row in conn.execute("SELECT id FROM lotes_produccion")}
+
+    material_cost, product_cost = {}, {}
+    for tipo_item, item_id, costo in conn.execute(
+            "SELECT tipo_item, item_id, costo FROM costos_iniciales"):
+        (material_cost if tipo_item == 'MATERIA_PRIMA' else product_cost)[item_id] = costo
+    material_stock, product_stock = {}, {}
+    detail_cost, lot_cost, line_cost = {}, {}, {}
+    seen = set()
+
+    for tipo_item, item_id, cantidad, origen, origen_id in conn.execute(
+            """SELECT tipo_item, item_id, cantidad, origen, origen_id
+               FROM movimientos_stock ORDER BY id"""):
+        first = (origen, origen_id) not in seen
+        seen.add((origen, origen_id))
+
+        if tipo_item == 'MATERIA_PRIMA':
+            stock = material_stock.get(item_id, 0)
+            if origen == 'COMPRA' and first and origen_id in purchases:
+                base = max(stock, 0)
+                if base + cantidad > 0:
+                    material_cost[item_id] = ((base * material_cost.get(item_id, 0) + purchases[origen_id])
+                                              * 1.0 / (base + cantidad))
+            elif origen == 'CONSUMO' and first and origen_id in consumptions:
+                lote_id, sp_id, producida, utilizada = consumptions[origen_id]
+                unit = material_cost.get(item_id, 0)
+                detail_cost[origen_id] = unit
+                lot_cost[lote_id] = lot_cost.get(lote_id, 0) + utilizada * unit
+                divisor = product_stock.get(sp_id, 0)
+                divisor = divisor if divisor > 0 else producida
+                if sp_id is not None and divisor > 0:
+                    product_cost[sp_id] = product_cost.get(sp_id, 0) + utilizada * unit * 1.0 / divisor
+            material_stock[item_id] = _stock_round(stock + cantidad)
+        else:
+            stock = product_stock.get(item_id, 0)
+            if origen == 'PRODUCCION' and first and origen_id in lots:
+                base = max(stock, 0)
+                if base + cantidad > 0:
+                    product_cost[item_id] = product_cost.get(item_id, 0) * base / (base + cantidad * 1.0)
+            elif origen == 'VENTA' and first:
+                line_cost[origen_id] = product_cost.get(item_id, 0)
+            product_stock[item_id] = stock + cantidad
+
+    # Lotes sin consumos registrados cuestan 0
+    for lote_id in lots:
+        lot_cost.setdefault(lote_id, 0)
+    return {
+        'materia_prima.costo_promedio': material_cost,
+        'stock_productos.costo_promedio': product_cost,
+        'produccion_detalle.costo_unitario': detail_cost,
+        'lotes_produccion.costo_total': lot_cost,
+        'ventas_detalle.costo_unitario': line_cost,
+    }
+
+
+def _stored(conn: sqlite3.Connection, name: str, schema: str = 'main') -> dict:
+    table, column = COST_TARGETS[name]
+    columns = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+    if column not in columns:
+        column = 'NULL'  # Archivo aún sin la columna: todas sus filas cuentan como desvío
+    return dict(conn.execute(f"SELECT id, {column} FROM {schema}.{table}").fetchall())
+
+
+def _differences(expected: dict, stored: dict) -> list[tuple]:
+    """(id, esperado, actual) de las filas existentes que no cuadran (o sin costo)."""
+    return [
+        (key, value, stored[key]) for key, value in expected.items()
+        if key in stored and (stored[key] is None or abs(value - stored[key]) > TOLERANCE)
+    ]
+
+
+def _summarize(name: str, rows: list[tuple]) -> dict:
+    logger.warning(f"Desvío en {name}: {len(rows)} diferencias")
+    return {'count': len(rows), 'sample': rows[:MAX_DRIFT_DETAILS]}
+
+
+def verify_costs(conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Recalcula los costos desde el kardex y los compara con los guardados.
+
+    Returns:
+        {columna: {'count': n, 'sample': [(id, esperado, actual), ...]}}
+        solo para las columnas con desvío (vacío si todo cuadra)
+    """
+    if conn is None:
+        from .archive import history_reader
+        with history_reader() as reader:
+            return verify_costs(reader)
+
+    from .archive import ARCHIVE_SCHEMA, is_attached
+
+    drift = {}
+    for name, values in recompute_costs(conn).items():
+        stored = _stored(conn, name)
+        if name == 'ventas_detalle.costo_unitario' and is_attached(conn):
+            # Una línea que sigue en la base caliente manda sobre su copia archivada
+            stored = {**_stored(conn, name, ARCHIVE_SCHEMA), **stored}
+        rows = _differences(values, stored)
+        if rows:
+            drift[name] = _summarize(name, rows)
+    return drift
+
+
+def rebuild_costs(conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Reemplaza los costos guardados por los del recálculo completo (solo
+    las filas que difieren), incluidas las líneas de venta archivadas.
+
+    Si `conn` se pasa se usa su transacción actual (no hace commit); si no,
+    corre en una transacción propia con la conexión escritora.
+
+    Returns:
+        Los desvíos encontrados antes de recalcular (ver verify_costs)
+    """
+    if conn is None:
+        from .archive import attach_archive, create_history_views, detach_archive, sync_archive_schema
+        from .connection import db
+        with db.writer() as writer:
+            attached = attach_archive(writer)
+            try:
+                writer.execute("BEGIN IMMEDIATE")
+                if attached:
+                    sync_archive_schema(writer)
+                create_history_views(writer)
+                drift = rebuild_costs(writer)
+                writer.commit()
+                return drift
+            except sqlite3.Error:
+                writer.rollback()
+                raise
+            finally:
+                detach_archive(writer)
+
+    from .archive import ARCHIVE_SCHEMA, archive_cutoff, has_history_views, is_attached
+
+    # Solo si esta base archivó algo (su propio corte), no otra del mismo directorio
+    if not has_history_views(conn) and archive_cutoff(conn) is not None:
+        logger.warning("Costos recalculados sin el archivo histórico: "
+                       "ejecute rebuild_costs() para incluir las compras y ventas archivadas")
+    schemas = ['main'] + ([ARCHIVE_SCHEMA] if is_attached(conn) else [])
+
+    drift = {}
+    for name, values in recompute_costs(conn).items():
+        table, column = COST_TARGETS[name]
+        rows = []
+        for schema in schemas if table == 'ventas_detalle' else ['main']:
+            changed = _differences(values, _stored(conn, name, schema))
+            conn.executemany(f"UPDATE {schema}.{table} SET {column} = ? WHERE id = ?",
+                             [(value, key) for key, value, _ in changed])
+            rows += changed
+        if rows:
+            drift[name] = _summarize(name, rows)
+    logger.info(f"Costos recalculados ({len(drift)} columnas con desvío)")
+    return drift
+
+
+# ===== CONSULTAS =====
+
+def sale_line_costs(venta_id: int) -> list[dict]:
+    """Costo de lo vendido y margen de cada línea de una venta (también archivada)."""
+    from .archive import fetch_history
+    return fetch_history(
+        """SELECT d.id, d.producto_id, d.presentacion_id, d.cantidad_unidades, d.subtotal,
+                  d.costo_unitario,
+                  ROUND(d.cantidad_unidades * COALESCE(d.costo_unitario, 0), 2) AS costo_total,
+                  ROUND(d.subtotal - d.cantidad_unidades * COALESCE(d.costo_unitario, 0), 2) AS margen
+           FROM ventas_detalle_historico d WHERE d.venta_id = ? ORDER BY d.id""",
+        (venta_id,)
+    )
+
+
+def lot_cost(lote_id: int) -> Optional[dict]:
+    """Costo total de materiales de un lote y su costo por unidad producida."""
+    from .connection import db
+    return db.fetch_one(
+        """SELECT id, costo_total,
+                  CASE WHEN cantidad_producida > 0
+                       THEN ROUND(costo_total * 1.0 / cantidad_producida, 4) END AS costo_unitario
+           FROM lotes_produccion WHERE id = ?""",
+        (lote_id,)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o recalcula los costos promedio")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Reemplazar los costos guardados por los del recálculo completo")
+    args = parser.parse_args()
+
+    from .connection import db
+    db.configure(headless=True)
+    drift = rebuild_costs() if args.rebuild else verify_costs()
+    if not drift:
+        print("Los costos cuadran con el kardex")
+    for name, detail in drift.items():
+        print(f"{name}: {detail['count']} diferencias")
+        for key, expected, actual in detail['sample']:
+            print(f"  id={key} esperado={expected:.4f} actual={actual}")
+    raise SystemExit(1 if drift and not args.rebuild else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Ejecutor de consultas fuera del hilo de la interfaz.
+
+Las consultas se encolan por prioridad y las ejecutan hilos de trabajo con
+su propia conexión de lectura del pool. Cada envío retorna un QueryHandle
+(con un concurrent.futures.Future) y el resultado también se emite por las
+señales query_finished / query_failed / query_cancelled, que Qt entrega
+encoladas en el hilo de la UI. Las consultas en curso se cancelan con el
+progress handler de sqlite3.
+"""
+import asyncio
+import itertools
+import queue
+import sqlite3
+import threading
+import logging
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: menor número se atiende primero
+INTERACTIVE = 0
+NORMAL = 10
+BATCH = 20
+
+DEFAULT_WORKERS = 2
+# Instrucciones de la VM de SQLite entre revisiones de cancelación
+PROGRESS_STEPS = 1000
+
+_ids = itertools.count(1)
+
+
+class QueryHandle:
+    """Referencia a una consulta enviada al ejecutor."""
+
+    def __init__(self, priority: int, description: str):
+        self.id = next(_ids)
+        self.priority = priority
+        self.description = description
+        self.future: Future = Future()
+        self._cancel_requested = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def cancel(self) -> bool:
+        """Cancela la consulta: si no ha empezado no se ejecuta; si corre, se interrumpe."""
+        self._cancel_requested.set()
+        return self.future.cancel() or not self.future.done()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self.future.result(timeout)
+
+    def add_done_callback(self, callback: Callable[[Future], None]):
+        self.future.add_done_callback(callback)
+
+
+class QueryExecutor:
+    """Cola de prioridad de consultas atendida por hilos de trabajo."""
+
+    def __init__(self, connection=None, workers: int = DEFAULT_WORKERS,
+                 progress_steps: int = PROGRESS_STEPS):
+        self._connection = connection
+        self.workers = workers
+        self.progress_steps = progress_steps
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from .connection import db
+            self._connection = db
+        return self._connection
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("El ejecutor de consultas está detenido")
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker, name=f"db-query-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    # ===== ENVÍO =====
+
+    def submit(self, query: str, params: tuple = (), priority: int = NORMAL,
+               mode: str = 'all') -> QueryHandle:
+        """
+        Encola una consulta de lectura.
+
+        Args:
+            query: Consulta SQL
+            params: Parámetros
+            priority: INTERACTIVE, NORMAL o BATCH (o cualquier entero)
+            mode: 'all' (lista de dicts), 'one' (dict o None),
+                  'columns' (dict de np.ndarray) o 'frame' (DataFrame)
+        """
+        fetchers = {
+            'all': self.connection.fetch_all,
+            'one': self.connection.fetch_one,
+            'columns': self.connection.fetch_columns,
+            'frame': self.connection.fetch_frame,
+        }
+        if mode not in fetchers:
+            raise ValueError(f"Modo inválido: {mode}")
+        fetch = fetchers[mode]
+        return self._enqueue(priority, query.strip().split('\n')[0], lambda: fetch(query, params))
+
+    def submit_call(self, fn: Callable, *args, priority: int = BATCH, **kwargs) -> QueryHandle:
+        """
+        Encola una función arbitraria (p. ej. `db.backup_database`).
+
+        Corre con una conexión de lectura prestada al hilo, así que las
+        consultas que haga vía `db` también se pueden interrumpir.
+        """
+        name = getattr(fn, '__name__', repr(fn))
+        return self._enqueue(priority, name, lambda: fn(*args, **kwargs))
+
+    async def run(self, query: str, params: tuple = (), priority: int = NORMAL,
+                  mode: str = 'all') -> Any:
+        """Variante asyncio para uso headless: `rows = await executor.run(...)`."""
+        handle = self.submit(query, params, priority, mode)
+        try:
+            return await asyncio.wrap_future(handle.future)
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+    def _enqueue(self, priority: int, description: str, job: Callable[[], Any]) -> QueryHandle:
+        self._ensure_workers()
+        handle = QueryHandle(priority, description)
+        self._queue.put((priority, next(self._sequence), handle, job))
+        return handle
+
+    # ===== HILOS DE TRABAJO =====
+
+    def _worker(self):
+        while True:
+            _, _, handle, job = self._queue.get()
+            if handle is None:
+                break
+            if not handle.future.set_running_or_notify_cancel():
+                self._emit('query_cancelled', handle.id)
+                continue
+            self._run(handle, job)
+
+    def _run(self, handle: QueryHandle, job: Callable[[], Any]):
+        try:
+            # La conexión queda prestada al hilo: las consultas del trabajo la reutilizan
+            with self.connection.reader() as conn:
+                conn.set_progress_handler(
+                    lambda: 1 if handle.cancel_requested else 0, self.progress_steps
+                )
+                try:
+                    result = job()
+                finally:
+                    conn.set_progress_handler(None, 0)
+        except sqlite3.OperationalError as e:
+            if handle.cancel_requested:
+                handle.future.set_exception(CancelledError(str(e)))
+                self._emit('query_cancelled', handle.id)
+            else:
+                self._fail(handle, e)
+            return
+        except Exception as e:
+            self._fail(handle, e)
+            return
+
+        if handle.cancel_requested:
+            handle.future.set_exception(CancelledError())
+            self._emit('query_cancelled', handle.id)
+            return
+        handle.future.set_result(result)
+        self._emit('query_finished', handle.id, result)
+
+    def _fail(self, handle: QueryHandle, error: Exception):
+        logger.error(f"Consulta {handle.id} ({handle.description}) falló: {error}")
+        handle.future.set_exception(error)
+        self._emit('query_failed', handle.id, str(error))
+
+    def _emit(self, signal: str, *args):
+        try:
+            getattr(self.connection.signals, signal).emit(*args)
+        except Exception:
+            logger.exception(f"No se pudo emitir {signal}")
+
+    # ===== CIERRE =====
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = True):
+        """Detiene los hilos; opcionalmente cancela lo que siga en cola."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_pending:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                item[2].cancel()
+        for _ in threads:
+            # Centinela con prioridad mínima: se atiende al vaciarse la cola
+            self._queue.put((float('inf'), next(self._sequence), None, None))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_executor: Optional[QueryExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> QueryExecutor:
+    """Ejecutor global, creado al primer uso."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = QueryExecutor()
+    return _executor
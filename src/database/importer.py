@@ -0,0 +1,261 @@
+"""
+Importación masiva de hojas .xlsx hacia las tablas transaccionales.
+
+Las filas se leen con openpyxl en modo solo lectura y se escriben con
+`bulk_insert` por bloques, así que la memoria no crece con el archivo.
+Las filas inválidas se rechazan individualmente sin abortar la carga.
+"""
+import datetime
+import logging
+import sqlite3
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from .connection import db, DatabaseConnection, DEFAULT_BULK_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Máximo de rechazos que se guardan con detalle (se cuentan todos)
+MAX_REJECTED_DETAILS = 1000
+
+
+class RowValueError(ValueError):
+    """Valor de una celda que no se puede convertir al tipo de la columna."""
+
+
+# ===== CONVERSORES =====
+
+def to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise RowValueError(f"no es un entero: {value!r}")
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise RowValueError(f"no es un entero: {value!r}")
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowValueError(f"no es un entero: {value!r}") from None
+
+
+def to_decimal(value: Any) -> float:
+    if isinstance(value, bool):
+        raise RowValueError(f"no es un número: {value!r}")
+    if isinstance(value, str):
+        text = value.strip().replace(' ', '').replace('$', '')
+        # Formato local: 1.234,56
+        if ',' in text and '.' in text:
+            text = text.replace('.', '').replace(',', '.')
+        elif ',' in text:
+            text = text.replace(',', '.')
+        value = text
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RowValueError(f"no es un número: {value!r}") from None
+
+
+def to_date(value: Any) -> str:
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, str):
+        text = value.strip()
+        for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S'):
+            try:
+                return datetime.datetime.strptime(text, fmt).date().isoformat()
+            except ValueError:
+                continue
+    raise RowValueError(f"no es una fecha: {value!r}")
+
+
+def to_text(value: Any) -> Optional[str]:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel guarda los códigos numéricos como float
+    text = str(value).strip()
+    return text or None
+
+
+# ===== ESPECIFICACIONES =====
+
+@dataclass
+class ImportColumn:
+    """Columna destino y cómo se obtiene de la hoja."""
+    name: str
+    converter: Callable[[Any], Any]
+    required: bool = True
+    default: Any = None
+    aliases: tuple = ()
+
+
+@dataclass
+class ImportSpec:
+    """Tabla destino y columnas que acepta la importación."""
+    table: str
+    columns: list
+
+
+IMPORT_SPECS = {
+    'ventas_detalle': ImportSpec('ventas_detalle', [
+        ImportColumn('venta_id', to_int, aliases=('venta', 'factura_id')),
+        ImportColumn('producto_id', to_int, aliases=('producto',)),
+        ImportColumn('presentacion_id', to_int, aliases=('presentacion',)),
+        ImportColumn('cantidad_unidades', to_int, aliases=('unidades',)),
+        ImportColumn('cantidad_moq', to_decimal, aliases=('moq',)),
+        ImportColumn('precio_unitario', to_decimal, aliases=('precio',)),
+        ImportColumn('subtotal', to_decimal),
+    ]),
+    'compras_materia_prima': ImportSpec('compras_materia_prima', [
+        ImportColumn('materia_prima_id', to_int, aliases=('materia_prima',)),
+        ImportColumn('proveedor_id', to_int, aliases=('proveedor',)),
+        ImportColumn('cantidad', to_decimal),
+        ImportColumn('numero_factura', to_text, aliases=('factura',)),
+        ImportColumn('precio_unitario', to_decimal, aliases=('precio',)),
+        ImportColumn('precio_total', to_decimal),
+        ImportColumn('descuento_porcentaje', to_decimal, required=False, default=0,
+                     aliases=('descuento',)),
+        ImportColumn('precio_definitivo', to_decimal),
+        ImportColumn('fecha_compra', to_date, aliases=('fecha',)),
+        ImportColumn('notas', to_text, required=False),
+    ]),
+}
+
+
+# ===== RESULTADO =====
+
+@dataclass
+class RejectedRow:
+    """Fila de la hoja que no se pudo importar."""
+    fila: int
+    motivo: str
+
+
+@dataclass
+class ImportResult:
+    """Resumen de una importación."""
+    table: str
+    total_rows: int = 0
+    inserted: int = 0
+    rejected_count: int = 0
+    rejected: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def reject(self, fila: int, motivo: str):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REJECTED_DETAILS:
+            self.rejected.append(RejectedRow(fila, motivo))
+
+    def summary(self) -> str:
+        return (f"{self.table}: {self.inserted}/{self.total_rows} filas importadas, "
+                f"{self.rejected_count} rechazadas, {self.rows_per_second:,.0f} filas/s")
+
+
+def _normalize_header(value: Any) -> str:
+    """'Fecha Compra' -> 'fecha_compra' (sin tildes, minúsculas)."""
+    text = unicodedata.normalize('NFKD', str(value or '').strip().lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return text.replace(' ', '_').replace('-', '_')
+
+
+class ExcelImporter:
+    """Importa hojas .xlsx hacia una tabla usando la API de carga masiva."""
+
+    def __init__(self, connection: Optional[DatabaseConnection] = None,
+                 chunk_size: int = DEFAULT_BULK_CHUNK_SIZE):
+        self.connection = connection or db
+        self.chunk_size = chunk_size
+
+    def import_file(self, path: Path, table: str, sheet: Optional[str] = None) -> ImportResult:
+        """
+        Importa `path` hacia `table` en una sola transacción.
+
+        Args:
+            path: Archivo .xlsx con encabezados en la primera fila
+            table: Tabla destino (debe estar en IMPORT_SPECS)
+            sheet: Hoja a leer (por defecto la activa)
+        """
+        import openpyxl
+
+        if table not in IMPORT_SPECS:
+            raise ValueError(f"No hay especificación de importación para '{table}'")
+        spec = IMPORT_SPECS[table]
+        result = ImportResult(table)
+
+        start = time.perf_counter()
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.active
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise ValueError(f"La hoja de {path} está vacía")
+            positions = self._map_header(spec, header)
+
+            def on_row_error(row: dict, error: sqlite3.Error):
+                result.reject(row['_fila'], str(error))
+
+            result.inserted = self.connection.bulk_insert(
+                spec.table,
+                [column.name for column in spec.columns],
+                self._iter_valid_rows(spec, positions, rows, result),
+                chunk_size=self.chunk_size,
+                on_row_error=on_row_error
+            )
+        finally:
+            workbook.close()
+        result.elapsed = time.perf_counter() - start
+
+        logger.info(f"Importación de {path}: {result.summary()}")
+        return result
+
+    @staticmethod
+    def _map_header(spec: ImportSpec, header: tuple) -> dict:
+        """Ubica cada columna de la especificación en la fila de encabezados."""
+        normalized = [_normalize_header(h) for h in header]
+        positions = {}
+        for column in spec.columns:
+            for name in (column.name, *column.aliases):
+                if name in normalized:
+                    positions[column.name] = normalized.index(name)
+                    break
+            else:
+                if column.required:
+                    raise ValueError(f"Falta la columna obligatoria '{column.name}'")
+        return positions
+
+    @staticmethod
+    def _iter_valid_rows(spec: ImportSpec, positions: dict, rows: Iterator,
+                         result: ImportResult) -> Iterator[dict]:
+        """Convierte cada fila de la hoja y descarta las que no validan."""
+        for fila, values in enumerate(rows, start=2):
+            if not any(v is not None and v != '' for v in values):
+                continue  # Filas vacías al final de la hoja
+            result.total_rows += 1
+            record = {'_fila': fila}
+            try:
+                for column in spec.columns:
+                    position = positions.get(column.name)
+                    raw = values[position] if position is not None and position < len(values) else None
+                    if raw is None or raw == '':
+                        if column.required:
+                            raise RowValueError(f"falta '{column.name}'")
+                        record[column.name] = column.default
+                    else:
+                        try:
+                            record[column.name] = column.converter(raw)
+                        except RowValueError as e:
+                            raise RowValueError(f"'{column.name}' {e}") from None
+            except RowValueError as e:
+                result.reject(fila, str(e))
+                continue
+            yield record
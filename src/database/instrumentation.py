@@ -0,0 +1,197 @@
+"""
+Instrumentación de consultas: tiempos por sentencia normalizada, registro
+de consultas lentas con su plan y volcado periódico de estadísticas.
+
+El costo por consulta es dos lecturas de reloj, una búsqueda en caché para
+normalizar el SQL y un append a un deque acotado, así que puede quedar
+activa en producción.
+"""
+import json
+import os
+import re
+import threading
+import time
+import logging
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('database.slow')
+
+# Latencias recientes guardadas por sentencia para los percentiles
+SAMPLE_SIZE = 1024
+DEFAULT_SLOW_THRESHOLD = 0.2  # segundos
+# Como máximo un plan por sentencia en este intervalo
+PLAN_CAPTURE_INTERVAL = 300
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(query: str) -> str:
+    """Quita literales, comentarios y espacios para agrupar sentencias iguales."""
+    text = _COMMENT_RE.sub(' ', query)
+    text = _STRING_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('(?...)', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StatementStats:
+    """Acumulados de una sentencia normalizada."""
+
+    __slots__ = ('calls', 'errors', 'rows', 'total_time', 'max_time', 'slow_calls',
+                 'samples', 'plan', 'plan_captured_at')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.slow_calls = 0
+        self.samples: deque = deque(maxlen=SAMPLE_SIZE)
+        self.plan: Optional[list] = None
+        self.plan_captured_at = 0.0
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_time': self.total_time,
+            'avg_time': self.total_time / self.calls if self.calls else 0.0,
+            'max_time': self.max_time,
+            'p50': _percentile(samples, 0.50),
+            'p95': _percentile(samples, 0.95),
+            'p99': _percentile(samples, 0.99),
+            'slow_calls': self.slow_calls,
+            'plan': self.plan,
+        }
+
+
+class QueryInstrumentation:
+    """Registro en memoria de las consultas ejecutadas por DatabaseConnection."""
+
+    def __init__(self, enabled: bool = True, slow_threshold: float = DEFAULT_SLOW_THRESHOLD):
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+        self._stats: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+        self._dump_thread: Optional[threading.Thread] = None
+        self._dump_stop = threading.Event()
+
+    @classmethod
+    def from_environment(cls) -> 'QueryInstrumentation':
+        """INVENTARIO_QUERY_STATS=0 la desactiva; INVENTARIO_SLOW_QUERY_MS fija el umbral."""
+        enabled = os.environ.get('INVENTARIO_QUERY_STATS', '1') != '0'
+        threshold = float(os.environ.get('INVENTARIO_SLOW_QUERY_MS', DEFAULT_SLOW_THRESHOLD * 1000)) / 1000
+        return cls(enabled, threshold)
+
+    def record(self, query: str, elapsed: float, rows: int = 0, error: bool = False,
+               conn=None, params=()):
+        """
+        Registra una ejecución. Si supera el umbral se escribe en el log de
+        consultas lentas con su EXPLAIN QUERY PLAN (si se pasa `conn`).
+        """
+        if not self.enabled:
+            return
+        key = normalize_statement(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.calls += 1
+            stats.rows += rows if rows > 0 else 0
+            stats.total_time += elapsed
+            stats.samples.append(elapsed)
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if error:
+                stats.errors += 1
+            slow = elapsed >= self.slow_threshold
+            capture_plan = False
+            if slow:
+                stats.slow_calls += 1
+                now = time.monotonic()
+                if conn is not None and now - stats.plan_captured_at >= PLAN_CAPTURE_INTERVAL:
+                    stats.plan_captured_at = now
+                    capture_plan = True
+
+        if slow:
+            plan = self._explain(conn, query, params) if capture_plan else None
+            if plan is not None:
+                with self._lock:
+                    stats.plan = plan
+            slow_logger.warning(
+                f"Consulta lenta ({elapsed * 1000:.1f} ms, {rows} filas): {key}"
+                + (f" | plan: {'; '.join(plan)}" if plan else "")
+            )
+
+    @staticmethod
+    def _explain(conn, query: str, params) -> Optional[list]:
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            return [row[3] for row in rows]
+        except Exception:
+            return None
+
+    def stats(self, top: Optional[int] = None, sort_by: str = 'total_time') -> list[dict]:
+        """Estadísticas por sentencia, ordenadas de mayor a menor por `sort_by`."""
+        with self._lock:
+            items = [{'statement': key, **stats.to_dict()} for key, stats in self._stats.items()]
+        items.sort(key=lambda item: item[sort_by], reverse=True)
+        return items[:top] if top else items
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    # ===== VOLCADO PERIÓDICO =====
+
+    def dump(self, path: Path) -> Path:
+        """Escribe las estadísticas actuales en JSON."""
+        data = {'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'statements': self.stats()}
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+        tmp_path.replace(path)
+        return path
+
+    def start_periodic_dump(self, path: Path, interval: float = 300):
+        """Vuelca las estadísticas a `path` cada `interval` segundos en un hilo aparte."""
+        if self._dump_thread is not None:
+            return
+        self._dump_stop.clear()
+
+        def loop():
+            while not self._dump_stop.wait(interval):
+                try:
+                    self.dump(path)
+                    for item in self.stats(top=5):
+                        logger.info(f"{item['calls']} llamadas, p95 {item['p95'] * 1000:.1f} ms: "
+                                    f"{item['statement'][:120]}")
+                except Exception:
+                    logger.exception("No se pudieron volcar las estadísticas de consultas")
+
+        self._dump_thread = threading.Thread(target=loop, name='db-query-stats', daemon=True)
+        self._dump_thread.start()
+
+    def stop_periodic_dump(self):
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
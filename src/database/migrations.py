@@ -0,0 +1,99 @@
+"""
+Migraciones versionadas del esquema con `PRAGMA user_version`.
+
+Cada migración corre en su propia transacción junto con la actualización
+de `user_version`, de modo que una falla deja la base en la versión
+anterior. Si la base ya está en la última versión no se ejecuta ningún DDL.
+
+La migración que deja la base en la última versión también sincroniza los
+índices administrados (`models.sync_indexes`): crea los que falten y borra
+los que ya no están definidos, así que un índice quitado en una versión
+nueva desaparece aunque la base haya pasado la migración 2 hace tiempo.
+"""
+import sqlite3
+import logging
+from typing import Callable, Optional
+
+from .models import models
+
+logger = logging.getLogger(__name__)
+
+
+class Migration:
+    """Paso de esquema identificado por una versión creciente."""
+
+    def __init__(self, version: int, description: str, apply: Callable[[sqlite3.Cursor], None]):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "Esquema base y datos iniciales", models.create_base_schema),
+    Migration(2, "Índices secundarios", models.sync_indexes),
+    Migration(3, "Saldos y resumen diario mantenidos por triggers", models.create_aggregates),
+    Migration(4, "Kardex de movimientos de stock con cortes", models.create_stock_ledger),
+    Migration(5, "Versiones de tablas maestras para la caché", models.create_table_versions),
+    Migration(6, "Búsqueda de texto con FTS5", models.create_search),
+    Migration(7, "Índices para paginación por keyset", models.create_pagination),
+    Migration(8, "Costeo por promedio ponderado y costo por lote", models.create_costing),
+    Migration(9, "Registro de cambios para refrescar las vistas", models.create_change_feed),
+    Migration(10, "Triggers de borrado que respetan el archivado", models.create_archive_guard),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Versión del esquema registrada en la base."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(version: int, target: int = SCHEMA_VERSION) -> list[Migration]:
+    return [m for m in MIGRATIONS if version < m.version <= target]
+
+
+def migrate(connection=None, target: Optional[int] = None) -> int:
+    """
+    Aplica las migraciones pendientes.
+
+    Args:
+        connection: DatabaseConnection (por defecto la global)
+        target: Versión destino (por defecto la última)
+
+    Returns:
+        Número de migraciones aplicadas
+    """
+    if connection is None:
+        from .connection import db as connection
+    target = SCHEMA_VERSION if target is None else target
+
+    # Camino rápido: solo una lectura del encabezado
+    with connection.reader() as conn:
+        version = get_version(conn)
+    if version >= target:
+        if version > SCHEMA_VERSION:
+            logger.warning(f"La base está en la versión {version}, más nueva que la aplicación ({SCHEMA_VERSION})")
+        return 0
+
+    applied = 0
+    with connection.writer() as conn:
+        # Otro proceso pudo migrar mientras esperábamos el escritor
+        version = get_version(conn)
+        for migration in pending_migrations(version, target):
+            logger.info(f"Migración {migration.version}: {migration.description}")
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN")
+                migration.apply(cursor)
+                if migration.version == SCHEMA_VERSION:
+                    models.sync_indexes(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(migration.version)}")
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error(f"Error en migración {migration.version}: {e}")
+                connection.db_logger.error(f"Migration {migration.version} failed: {e}")
+                raise
+            applied += 1
+    return applied
@@ -7,6 +7,131 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# ===== FRAGMENTOS SQL PARA TRIGGERS =====
+
+# Mientras `archivando` tenga su fila (solo dentro de la transacción del
+# archivado) los borrados no tocan saldos, resumen ni kardex: mover una
+# venta al archivo no es anularla. SQLite no deja que un trigger de main
+# lea tablas TEMP, por eso la bandera es una tabla de main.
+ARCHIVE_GUARD = "WHEN NOT EXISTS (SELECT 1 FROM archivando)"
+
+
+def _adjust_sale_balance(venta_id: str, paid: str) -> str:
+    """UPDATE que descuenta `paid` del saldo de una venta y recalcula su estado."""
+    saldo = f"ROUND(saldo_pendiente - ({paid}), 2)"
+    return f"""UPDATE ventas SET
+                       saldo_pendiente = {saldo},
+                       estado = CASE WHEN {saldo} <= 0 THEN 'PAGADA'
+                                     WHEN {saldo} < total THEN 'PARCIAL'
+                                     ELSE 'PENDIENTE' END
+                   WHERE id = {venta_id};"""
+
+
+def _cash_amount(row: str) -> str:
+    """Monto de un pago que cuenta como abonado (los pagos a CREDITO no)."""
+    return (f"(CASE WHEN (SELECT codigo FROM metodos_pago WHERE id = {row}.metodo_pago_id) = 'CREDITO' "
+            f"THEN 0 ELSE {row}.monto END)")
+
+
+def _adjust_pocket(metodo_pago_id: str, amount: str) -> str:
+    return (f"UPDATE bolsillos SET saldo_actual = ROUND(saldo_actual + ({amount}), 2) "
+            f"WHERE metodo_pago_id = {metodo_pago_id};")
+
+
+def _add_to_summary(select: str) -> str:
+    """Suma (fecha, producto, método, registros, unidades, monto) al resumen diario."""
+    if ' WHERE ' not in select:
+        select += " WHERE 1"  # Requerido por el parser de UPSERT con SELECT
+    return f"""INSERT INTO resumen_ventas_diario
+                       (fecha, producto_id, metodo_pago_id, registros, cantidad_unidades, monto)
+                   {select}
+                   ON CONFLICT (fecha, producto_id, metodo_pago_id) DO UPDATE SET
+                       registros = registros + excluded.registros,
+                       cantidad_unidades = cantidad_unidades + excluded.cantidad_unidades,
+                       monto = ROUND(monto + excluded.monto, 2);"""
+
+
+def _line_select(row: str, sign: int) -> str:
+    return (f"SELECT date(v.fecha_venta), {row}.producto_id, 0, {sign}, "
+            f"{sign} * {row}.cantidad_unidades, {sign} * {row}.subtotal "
+            f"FROM ventas v WHERE v.id = {row}.venta_id")
+
+
+def _payment_select(row: str, sign: int) -> str:
+    return (f"SELECT date(v.fecha_venta), 0, {row}.metodo_pago_id, {sign}, 0, {sign} * {row}.monto "
+            f"FROM ventas v WHERE v.id = {row}.venta_id")
+
+
+def _sale_lines_select(row: str, sign: int) -> str:
+    return (f"SELECT date({row}.fecha_venta), d.producto_id, 0, {sign} * COUNT(*), "
+            f"{sign} * SUM(d.cantidad_unidades), {sign} * SUM(d.subtotal) "
+            f"FROM ventas_detalle d WHERE d.venta_id = {row}.id GROUP BY d.producto_id")
+
+
+def _sale_payments_select(row: str, sign: int) -> str:
+    return (f"SELECT date({row}.fecha_venta), 0, p.metodo_pago_id, {sign} * COUNT(*), 0, "
+            f"{sign} * SUM(p.monto) "
+            f"FROM pagos_venta p WHERE p.venta_id = {row}.id GROUP BY p.metodo_pago_id")
+
+
+def _ledger_insert(select: str) -> str:
+    return f"""INSERT INTO movimientos_stock (tipo_item, item_id, fecha, cantidad, origen, origen_id)
+                   {select};"""
+
+
+def _ledger_reverse(origen: str, origen_ids: str) -> str:
+    """Contra-asiento del neto de movimientos de las filas de origen indicadas."""
+    return f"""INSERT INTO movimientos_stock (tipo_item, item_id, fecha, cantidad, origen, origen_id)
+                   SELECT tipo_item, item_id, fecha, ROUND(-SUM(cantidad), 4), origen, origen_id
+                   FROM movimientos_stock
+                   WHERE origen = '{origen}' AND origen_id IN ({origen_ids})
+                   GROUP BY tipo_item, item_id, fecha, origen_id
+                   HAVING ROUND(SUM(cantidad), 4) <> 0;"""
+
+
+def _ensure_product_stock(row: str) -> str:
+    return (f"INSERT OR IGNORE INTO stock_productos (producto_id, presentacion_id, cantidad) "
+            f"VALUES ({row}.producto_id, {row}.presentacion_id, 0);")
+
+
+def _product_stock_join(row: str) -> str:
+    return (f"JOIN stock_productos sp ON sp.producto_id = {row}.producto_id "
+            f"AND sp.presentacion_id = {row}.presentacion_id")
+
+
+def _sale_line_movement(row: str) -> str:
+    return (f"SELECT 'PRODUCTO', sp.id, date(v.fecha_venta), -{row}.cantidad_unidades, 'VENTA', {row}.id "
+            f"FROM ventas v {_product_stock_join(row)} WHERE v.id = {row}.venta_id")
+
+
+def _sale_movements(row: str) -> str:
+    return (f"SELECT 'PRODUCTO', sp.id, date({row}.fecha_venta), -d.cantidad_unidades, 'VENTA', d.id "
+            f"FROM ventas_detalle d {_product_stock_join('d')} WHERE d.venta_id = {row}.id")
+
+
+def _lot_movement(row: str) -> str:
+    return (f"SELECT 'PRODUCTO', sp.id, date({row}.fecha_produccion), {row}.cantidad_producida, "
+            f"'PRODUCCION', {row}.id FROM stock_productos sp "
+            f"WHERE sp.producto_id = {row}.producto_id AND sp.presentacion_id = {row}.presentacion_id")
+
+
+def _consumption_movement(row: str) -> str:
+    return (f"SELECT 'MATERIA_PRIMA', {row}.materia_prima_id, date(l.fecha_produccion), "
+            f"-{row}.cantidad_utilizada, 'CONSUMO', {row}.id "
+            f"FROM lotes_produccion l WHERE l.id = {row}.lote_id")
+
+
+def _lot_consumptions(row: str) -> str:
+    return (f"SELECT 'MATERIA_PRIMA', d.materia_prima_id, date({row}.fecha_produccion), "
+            f"-d.cantidad_utilizada, 'CONSUMO', d.id "
+            f"FROM produccion_detalle d WHERE d.lote_id = {row}.id")
+
+
+def _purchase_movement(row: str) -> str:
+    return (f"SELECT 'MATERIA_PRIMA', {row}.materia_prima_id, date({row}.fecha_compra), "
+            f"{row}.cantidad, 'COMPRA', {row}.id")
+
+
 class DatabaseModels:
     """CREATE TABLE organizados por módulo funcional."""
     
@@ -307,13 +432,803 @@ class DatabaseModels:
             )"""
         ]
     
-    # ===== MÉTODO PRINCIPAL =====
+    # ===== AGREGADOS MATERIALIZADOS =====
     
-    def initialize_all_tables(self):
+    @staticmethod
+    def create_aggregate_tables():
+        """Resumen diario de ventas mantenido por triggers."""
+        return [
+            # producto_id = 0 y metodo_pago_id = 0 significan "todos":
+            #   (fecha, 0, 0)  -> facturas del día (registros = nº de ventas)
+            #   (fecha, p, 0)  -> líneas del producto p en el día
+            #   (fecha, 0, m)  -> pagos con el método m en el día
+            """CREATE TABLE IF NOT EXISTS resumen_ventas_diario (
+                fecha DATE NOT NULL,
+                producto_id INTEGER NOT NULL DEFAULT 0,
+                metodo_pago_id INTEGER NOT NULL DEFAULT 0,
+                registros INTEGER NOT NULL DEFAULT 0,
+                cantidad_unidades INTEGER NOT NULL DEFAULT 0,
+                monto DECIMAL(15,2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (fecha, producto_id, metodo_pago_id)
+            ) WITHOUT ROWID"""
+        ]
+    
+    @staticmethod
+    def create_archive_guard_tables():
+        """Bandera de ARCHIVE_GUARD (una fila solo mientras se archiva)."""
+        return [
+            """CREATE TABLE IF NOT EXISTS archivando (
+                id INTEGER PRIMARY KEY CHECK(id = 1)
+            )"""
+        ]
+    
+    @staticmethod
+    def create_balance_triggers():
+        """
+        Triggers que mantienen ventas.saldo_pendiente/estado,
+        clientes.saldo_credito y bolsillos.saldo_actual.
+        """
+        return [
+            # Una venta nueva queda con saldo = total; el cliente suma lo
+            # insertado y el trigger de saldo suma la diferencia.
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_saldo_ai
+               AFTER INSERT ON ventas
+               BEGIN
+                   UPDATE clientes SET saldo_credito = ROUND(saldo_credito + COALESCE(NEW.saldo_pendiente, 0), 2)
+                   WHERE id = NEW.cliente_id;
+                   {_adjust_sale_balance('NEW.id', 'saldo_pendiente - total')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_total_au
+               AFTER UPDATE OF total ON ventas
+               WHEN NEW.total IS NOT OLD.total
+               BEGIN
+                   {_adjust_sale_balance('NEW.id', 'OLD.total - NEW.total')}
+               END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS trg_ventas_cliente_au
+               AFTER UPDATE OF saldo_pendiente, cliente_id ON ventas
+               BEGIN
+                   UPDATE clientes SET saldo_credito = ROUND(saldo_credito - COALESCE(OLD.saldo_pendiente, 0), 2)
+                   WHERE id = OLD.cliente_id;
+                   UPDATE clientes SET saldo_credito = ROUND(saldo_credito + COALESCE(NEW.saldo_pendiente, 0), 2)
+                   WHERE id = NEW.cliente_id;
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_saldo_ad
+               AFTER DELETE ON ventas
+               {ARCHIVE_GUARD}
+               BEGIN
+                   UPDATE clientes SET saldo_credito = ROUND(saldo_credito - COALESCE(OLD.saldo_pendiente, 0), 2)
+                   WHERE id = OLD.cliente_id;
+               END""",
+            
+            # Pagos de contado: bajan el saldo de la venta (los de CREDITO no)
+            f"""CREATE TRIGGER IF NOT EXISTS trg_pagos_venta_saldo_ai
+               AFTER INSERT ON pagos_venta
+               BEGIN
+                   {_adjust_pocket('NEW.metodo_pago_id', 'NEW.monto')}
+                   {_adjust_sale_balance('NEW.venta_id', _cash_amount('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_pagos_venta_saldo_ad
+               AFTER DELETE ON pagos_venta
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_adjust_pocket('OLD.metodo_pago_id', '-OLD.monto')}
+                   {_adjust_sale_balance('OLD.venta_id', '-' + _cash_amount('OLD'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_pagos_venta_saldo_au
+               AFTER UPDATE OF venta_id, metodo_pago_id, monto ON pagos_venta
+               BEGIN
+                   {_adjust_pocket('OLD.metodo_pago_id', '-OLD.monto')}
+                   {_adjust_sale_balance('OLD.venta_id', '-' + _cash_amount('OLD'))}
+                   {_adjust_pocket('NEW.metodo_pago_id', 'NEW.monto')}
+                   {_adjust_sale_balance('NEW.venta_id', _cash_amount('NEW'))}
+               END""",
+            
+            # Abonos a crédito: siempre bajan el saldo de la factura
+            f"""CREATE TRIGGER IF NOT EXISTS trg_abonos_detalle_saldo_ai
+               AFTER INSERT ON abonos_detalle
+               BEGIN
+                   {_adjust_pocket('NEW.metodo_pago_id', 'NEW.monto')}
+                   {_adjust_sale_balance('NEW.venta_id', 'NEW.monto')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_abonos_detalle_saldo_ad
+               AFTER DELETE ON abonos_detalle
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_adjust_pocket('OLD.metodo_pago_id', '-OLD.monto')}
+                   {_adjust_sale_balance('OLD.venta_id', '-OLD.monto')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_abonos_detalle_saldo_au
+               AFTER UPDATE OF venta_id, metodo_pago_id, monto ON abonos_detalle
+               BEGIN
+                   {_adjust_pocket('OLD.metodo_pago_id', '-OLD.monto')}
+                   {_adjust_sale_balance('OLD.venta_id', '-OLD.monto')}
+                   {_adjust_pocket('NEW.metodo_pago_id', 'NEW.monto')}
+                   {_adjust_sale_balance('NEW.venta_id', 'NEW.monto')}
+               END""",
+            
+            # Todo método de pago nuevo tiene su bolsillo
+            """CREATE TRIGGER IF NOT EXISTS trg_metodos_pago_bolsillo_ai
+               AFTER INSERT ON metodos_pago
+               BEGIN
+                   INSERT OR IGNORE INTO bolsillos (metodo_pago_id, saldo_actual) VALUES (NEW.id, 0);
+               END"""
+        ]
+    
+    @staticmethod
+    def create_daily_summary_triggers():
+        """Triggers que mantienen resumen_ventas_diario."""
+        return [
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_resumen_ai
+               AFTER INSERT ON ventas
+               BEGIN
+                   {_add_to_summary("SELECT date(NEW.fecha_venta), 0, 0, 1, 0, NEW.total")}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_resumen_au
+               AFTER UPDATE OF fecha_venta, total ON ventas
+               BEGIN
+                   {_add_to_summary("SELECT date(OLD.fecha_venta), 0, 0, -1, 0, -OLD.total")}
+                   {_add_to_summary("SELECT date(NEW.fecha_venta), 0, 0, 1, 0, NEW.total")}
+               END""",
+            
+            # Si cambia el día se mueven también las líneas y los pagos
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_resumen_fecha_au
+               AFTER UPDATE OF fecha_venta ON ventas
+               WHEN date(NEW.fecha_venta) IS NOT date(OLD.fecha_venta)
+               BEGIN
+                   {_add_to_summary(_sale_lines_select('OLD', -1))}
+                   {_add_to_summary(_sale_lines_select('NEW', 1))}
+                   {_add_to_summary(_sale_payments_select('OLD', -1))}
+                   {_add_to_summary(_sale_payments_select('NEW', 1))}
+               END""",
+            
+            # BEFORE: las líneas y pagos todavía existen; el borrado en
+            # cascada posterior ya no encuentra la venta y no descuenta dos veces.
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_resumen_bd
+               BEFORE DELETE ON ventas
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_add_to_summary("SELECT date(OLD.fecha_venta), 0, 0, -1, 0, -OLD.total")}
+                   {_add_to_summary(_sale_lines_select('OLD', -1))}
+                   {_add_to_summary(_sale_payments_select('OLD', -1))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_resumen_ai
+               AFTER INSERT ON ventas_detalle
+               BEGIN
+                   {_add_to_summary(_line_select('NEW', 1))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_resumen_ad
+               AFTER DELETE ON ventas_detalle
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_add_to_summary(_line_select('OLD', -1))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_resumen_au
+               AFTER UPDATE OF venta_id, producto_id, cantidad_unidades, subtotal ON ventas_detalle
+               BEGIN
+                   {_add_to_summary(_line_select('OLD', -1))}
+                   {_add_to_summary(_line_select('NEW', 1))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_pagos_venta_resumen_ai
+               AFTER INSERT ON pagos_venta
+               BEGIN
+                   {_add_to_summary(_payment_select('NEW', 1))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_pagos_venta_resumen_ad
+               AFTER DELETE ON pagos_venta
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_add_to_summary(_payment_select('OLD', -1))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_pagos_venta_resumen_au
+               AFTER UPDATE OF venta_id, metodo_pago_id, monto ON pagos_venta
+               BEGIN
+                   {_add_to_summary(_payment_select('OLD', -1))}
+                   {_add_to_summary(_payment_select('NEW', 1))}
+               END"""
+        ]
+    
+    def create_aggregates(self, cursor):
+        """Crea el resumen diario y los triggers, y los calcula desde cero (migración 3)."""
+        from .aggregates import rebuild_aggregates
+        
+        for query in self.create_archive_guard_tables() + self.create_aggregate_tables():
+            cursor.execute(query)
+        for query in self.create_balance_triggers() + self.create_daily_summary_triggers():
+            cursor.execute(query)
+        rebuild_aggregates(cursor.connection)
+    
+    # ===== KARDEX DE INVENTARIO =====
+    
+    @staticmethod
+    def create_stock_ledger_tables():
+        """Movimientos de stock (solo inserción) y cortes periódicos."""
+        return [
+            """CREATE TABLE IF NOT EXISTS movimientos_stock (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo_item TEXT NOT NULL CHECK(tipo_item IN ('PRODUCTO', 'MATERIA_PRIMA')),
+                item_id INTEGER NOT NULL,  -- stock_productos.id o materia_prima.id
+                fecha DATE NOT NULL,
+                cantidad DECIMAL(15,4) NOT NULL,  -- Positiva entra, negativa sale
+                origen TEXT NOT NULL CHECK(origen IN ('INICIAL', 'VENTA', 'PRODUCCION',
+                                                     'CONSUMO', 'COMPRA', 'AJUSTE')),
+                origen_id INTEGER,  -- Fila de la tabla que generó el movimiento
+                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                notas TEXT
+            )""",
+            
+            # Stock acumulado de cada ítem hasta fecha_corte (inclusive)
+            """CREATE TABLE IF NOT EXISTS snapshots_stock (
+                tipo_item TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                fecha_corte DATE NOT NULL,
+                cantidad DECIMAL(15,4) NOT NULL,
+                PRIMARY KEY (tipo_item, item_id, fecha_corte)
+            ) WITHOUT ROWID""",
+            
+            """CREATE INDEX IF NOT EXISTS idx_movimientos_item_fecha
+               ON movimientos_stock(tipo_item, item_id, fecha, cantidad)""",
+            "CREATE INDEX IF NOT EXISTS idx_movimientos_origen ON movimientos_stock(origen, origen_id)",
+            "CREATE INDEX IF NOT EXISTS idx_movimientos_fecha ON movimientos_stock(fecha)"
+        ]
+    
+    @staticmethod
+    def create_stock_ledger_triggers():
+        """
+        Triggers del kardex: el movimiento actualiza el stock actual y los
+        cortes posteriores; ventas, producción y compras generan movimientos.
+        Borrar o modificar una fila de origen inserta el contra-asiento.
+        """
+        return [
+            """CREATE TRIGGER IF NOT EXISTS trg_movimientos_stock_ai
+               AFTER INSERT ON movimientos_stock
+               BEGIN
+                   UPDATE stock_productos SET cantidad = cantidad + NEW.cantidad
+                   WHERE NEW.tipo_item = 'PRODUCTO' AND id = NEW.item_id;
+                   UPDATE materia_prima SET stock_actual = ROUND(stock_actual + NEW.cantidad, 4)
+                   WHERE NEW.tipo_item = 'MATERIA_PRIMA' AND id = NEW.item_id;
+                   -- Movimientos con fecha anterior a un corte ya tomado
+                   UPDATE snapshots_stock SET cantidad = ROUND(cantidad + NEW.cantidad, 4)
+                   WHERE tipo_item = NEW.tipo_item AND item_id = NEW.item_id
+                     AND fecha_corte >= NEW.fecha;
+               END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS trg_movimientos_stock_bu
+               BEFORE UPDATE ON movimientos_stock
+               BEGIN
+                   SELECT RAISE(ABORT, 'movimientos_stock es de solo inserción');
+               END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS trg_movimientos_stock_bd
+               BEFORE DELETE ON movimientos_stock
+               BEGIN
+                   SELECT RAISE(ABORT, 'movimientos_stock es de solo inserción');
+               END""",
+            
+            # ----- Ventas -----
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_stock_ai
+               AFTER INSERT ON ventas_detalle
+               BEGIN
+                   {_ensure_product_stock('NEW')}
+                   {_ledger_insert(_sale_line_movement('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_stock_ad
+               AFTER DELETE ON ventas_detalle
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_ledger_reverse('VENTA', 'OLD.id')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_stock_au
+               AFTER UPDATE OF venta_id, producto_id, presentacion_id, cantidad_unidades ON ventas_detalle
+               BEGIN
+                   {_ledger_reverse('VENTA', 'OLD.id')}
+                   {_ensure_product_stock('NEW')}
+                   {_ledger_insert(_sale_line_movement('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_stock_fecha_au
+               AFTER UPDATE OF fecha_venta ON ventas
+               WHEN date(NEW.fecha_venta) IS NOT date(OLD.fecha_venta)
+               BEGIN
+                   {_ledger_reverse('VENTA', 'SELECT id FROM ventas_detalle WHERE venta_id = NEW.id')}
+                   {_ledger_insert(_sale_movements('NEW'))}
+               END""",
+            
+            # ----- Producción: entra producto terminado, sale materia prima -----
+            f"""CREATE TRIGGER IF NOT EXISTS trg_lotes_produccion_stock_ai
+               AFTER INSERT ON lotes_produccion
+               BEGIN
+                   {_ensure_product_stock('NEW')}
+                   {_ledger_insert(_lot_movement('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_lotes_produccion_stock_ad
+               AFTER DELETE ON lotes_produccion
+               BEGIN
+                   {_ledger_reverse('PRODUCCION', 'OLD.id')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_lotes_produccion_stock_au
+               AFTER UPDATE OF producto_id, presentacion_id, cantidad_producida, fecha_produccion
+               ON lotes_produccion
+               BEGIN
+                   {_ledger_reverse('PRODUCCION', 'OLD.id')}
+                   {_ensure_product_stock('NEW')}
+                   {_ledger_insert(_lot_movement('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_lotes_produccion_consumo_fecha_au
+               AFTER UPDATE OF fecha_produccion ON lotes_produccion
+               WHEN date(NEW.fecha_produccion) IS NOT date(OLD.fecha_produccion)
+               BEGIN
+                   {_ledger_reverse('CONSUMO', 'SELECT id FROM produccion_detalle WHERE lote_id = NEW.id')}
+                   {_ledger_insert(_lot_consumptions('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_produccion_detalle_stock_ai
+               AFTER INSERT ON produccion_detalle
+               BEGIN
+                   {_ledger_insert(_consumption_movement('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_produccion_detalle_stock_ad
+               AFTER DELETE ON produccion_detalle
+               BEGIN
+                   {_ledger_reverse('CONSUMO', 'OLD.id')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_produccion_detalle_stock_au
+               AFTER UPDATE OF lote_id, materia_prima_id, cantidad_utilizada ON produccion_detalle
+               BEGIN
+                   {_ledger_reverse('CONSUMO', 'OLD.id')}
+                   {_ledger_insert(_consumption_movement('NEW'))}
+               END""",
+            
+            # ----- Compras -----
+            f"""CREATE TRIGGER IF NOT EXISTS trg_compras_stock_ai
+               AFTER INSERT ON compras_materia_prima
+               BEGIN
+                   {_ledger_insert(_purchase_movement('NEW'))}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_compras_stock_ad
+               AFTER DELETE ON compras_materia_prima
+               {ARCHIVE_GUARD}
+               BEGIN
+                   {_ledger_reverse('COMPRA', 'OLD.id')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_compras_stock_au
+               AFTER UPDATE OF materia_prima_id, cantidad, fecha_compra ON compras_materia_prima
+               BEGIN
+                   {_ledger_reverse('COMPRA', 'OLD.id')}
+                   {_ledger_insert(_purchase_movement('NEW'))}
+               END"""
+        ]
+    
+    def create_stock_ledger(self, cursor):
+        """
+        Crea el kardex y registra el stock existente como movimiento INICIAL
+        antes de crear los triggers, para no duplicarlo (migración 4).
+        """
+        for query in self.create_stock_ledger_tables():
+            cursor.execute(query)
+        cursor.execute("""
+            INSERT INTO movimientos_stock (tipo_item, item_id, fecha, cantidad, origen)
+            SELECT 'PRODUCTO', id, date('now', 'localtime'), cantidad, 'INICIAL'
+            FROM stock_productos WHERE cantidad <> 0
+        """)
+        cursor.execute("""
+            INSERT INTO movimientos_stock (tipo_item, item_id, fecha, cantidad, origen)
+            SELECT 'MATERIA_PRIMA', id, date('now', 'localtime'), stock_actual, 'INICIAL'
+            FROM materia_prima WHERE stock_actual <> 0
+        """)
+        for query in self.create_stock_ledger_triggers():
+            cursor.execute(query)
+    
+    # ===== COSTEO POR PROMEDIO PONDERADO =====
+    
+    # (tabla, columna) de costo agregadas con ALTER TABLE en la migración 8
+    COST_COLUMNS = (
+        ('stock_productos', 'costo_promedio DECIMAL(15,4) DEFAULT 0'),
+        ('produccion_detalle', 'costo_unitario DECIMAL(15,4) DEFAULT 0'),
+        ('lotes_produccion', 'costo_total DECIMAL(15,4) DEFAULT 0'),
+        ('ventas_detalle', 'costo_unitario DECIMAL(15,4) DEFAULT 0'),
+    )
+    
+    @staticmethod
+    def create_costing_tables():
+        """Costo de partida de cada ítem para el recálculo (el registrado al crearlo)."""
+        return [
+            """CREATE TABLE IF NOT EXISTS costos_iniciales (
+                tipo_item TEXT NOT NULL CHECK(tipo_item IN ('PRODUCTO', 'MATERIA_PRIMA')),
+                item_id INTEGER NOT NULL,
+                costo DECIMAL(15,4) NOT NULL DEFAULT 0,
+                PRIMARY KEY (tipo_item, item_id)
+            ) WITHOUT ROWID"""
+        ]
+    
+    @staticmethod
+    def create_costing_triggers():
         """
-        Ejecuta todos los CREATE TABLE en orden correcto.
+        Triggers de costeo, O(1) por fila:
+        - Compra: promedio ponderado de la materia prima con el stock previo
+          (BEFORE, para leer el stock antes de que el kardex lo sume).
+        - Lote: diluye el costo promedio del producto con las unidades nuevas;
+          cada consumo congela el costo de la materia prima en el detalle y
+          suma su valor al lote y al producto.
+        - Venta: congela el costo promedio del producto en la línea.
+        - Materia prima nueva: su costo cargado es el de partida del recálculo.
+        Editar o borrar compras no revalúa el promedio (no es reversible);
+        para eso está `costing.rebuild_costs()`.
         """
-        table_groups = [
+        material_cost = "(SELECT costo_promedio FROM materia_prima WHERE id = {row}.materia_prima_id)"
+        lot_product = ("(producto_id, presentacion_id) = "
+                       "(SELECT producto_id, presentacion_id FROM lotes_produccion WHERE id = {row}.lote_id)")
+        # Con stock en 0 o negativo el valor del consumo se reparte en las unidades del lote
+        divisor = ("(CASE WHEN cantidad > 0 THEN cantidad "
+                   "ELSE (SELECT cantidad_producida FROM lotes_produccion WHERE id = {row}.lote_id) END)")
+        
+        def revalue_product(row: str, amount: str) -> str:
+            return f"""UPDATE stock_productos
+                       SET costo_promedio = costo_promedio + {amount} * 1.0 / {divisor.format(row=row)}
+                       WHERE {lot_product.format(row=row)} AND {divisor.format(row=row)} > 0;"""
+        
+        def adjust_lot(row: str, amount: str) -> str:
+            return f"UPDATE lotes_produccion SET costo_total = costo_total + {amount} WHERE id = {row}.lote_id;"
+        
+        def freeze_line_cost(row: str) -> str:
+            return f"""UPDATE ventas_detalle SET costo_unitario = COALESCE(
+                           (SELECT costo_promedio FROM stock_productos
+                            WHERE producto_id = {row}.producto_id AND presentacion_id = {row}.presentacion_id), 0)
+                       WHERE id = {row}.id;"""
+        
+        consumed = "NEW.cantidad_utilizada * " + material_cost.format(row='NEW')
+        return [
+            """CREATE TRIGGER IF NOT EXISTS trg_materia_prima_costo_ai
+               AFTER INSERT ON materia_prima
+               BEGIN
+                   INSERT OR IGNORE INTO costos_iniciales (tipo_item, item_id, costo)
+                   VALUES ('MATERIA_PRIMA', NEW.id, COALESCE(NEW.costo_promedio, 0));
+               END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS trg_compras_costo_bi
+               BEFORE INSERT ON compras_materia_prima
+               BEGIN
+                   UPDATE materia_prima SET costo_promedio =
+                       (MAX(stock_actual, 0) * costo_promedio + NEW.precio_definitivo) * 1.0
+                       / (MAX(stock_actual, 0) + NEW.cantidad)
+                   WHERE id = NEW.materia_prima_id AND MAX(stock_actual, 0) + NEW.cantidad > 0;
+               END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS trg_lotes_produccion_costo_bi
+               BEFORE INSERT ON lotes_produccion
+               BEGIN
+                   UPDATE stock_productos SET costo_promedio =
+                       costo_promedio * MAX(cantidad, 0) / (MAX(cantidad, 0) + NEW.cantidad_producida * 1.0)
+                   WHERE producto_id = NEW.producto_id AND presentacion_id = NEW.presentacion_id
+                     AND MAX(cantidad, 0) + NEW.cantidad_producida > 0;
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_produccion_detalle_costo_ai
+               AFTER INSERT ON produccion_detalle
+               BEGIN
+                   UPDATE produccion_detalle SET costo_unitario = {material_cost.format(row='NEW')}
+                   WHERE id = NEW.id;
+                   {adjust_lot('NEW', consumed)}
+                   {revalue_product('NEW', consumed)}
+               END""",
+            
+            # El costo del lote es siempre la suma de sus consumos congelados
+            f"""CREATE TRIGGER IF NOT EXISTS trg_produccion_detalle_costo_ad
+               AFTER DELETE ON produccion_detalle
+               BEGIN
+                   {adjust_lot('OLD', '-OLD.cantidad_utilizada * OLD.costo_unitario')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_produccion_detalle_costo_au
+               AFTER UPDATE OF lote_id, materia_prima_id, cantidad_utilizada ON produccion_detalle
+               BEGIN
+                   {adjust_lot('OLD', '-OLD.cantidad_utilizada * OLD.costo_unitario')}
+                   UPDATE produccion_detalle SET costo_unitario =
+                       CASE WHEN NEW.materia_prima_id = OLD.materia_prima_id THEN OLD.costo_unitario
+                            ELSE {material_cost.format(row='NEW')} END
+                   WHERE id = NEW.id;
+                   UPDATE lotes_produccion SET costo_total = costo_total + NEW.cantidad_utilizada *
+                       (SELECT costo_unitario FROM produccion_detalle WHERE id = NEW.id)
+                   WHERE id = NEW.lote_id;
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_costo_ai
+               AFTER INSERT ON ventas_detalle
+               BEGIN
+                   {freeze_line_cost('NEW')}
+               END""",
+            
+            f"""CREATE TRIGGER IF NOT EXISTS trg_ventas_detalle_costo_au
+               AFTER UPDATE OF producto_id, presentacion_id ON ventas_detalle
+               BEGIN
+                   {freeze_line_cost('NEW')}
+               END"""
+        ]
+    
+    def create_costing(self, cursor):
+        """
+        Agrega las columnas de costo, los triggers y calcula los costos
+        actuales reproduciendo el kardex (migración 8).
+        """
+        from .costing import rebuild_costs
+        
+        for table, column in self.COST_COLUMNS:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+        for query in self.create_costing_tables():
+            cursor.execute(query)
+        # El costo cargado a mano es el de partida (stock INICIAL o consumos antes de comprar)
+        cursor.execute("""
+            INSERT OR IGNORE INTO costos_iniciales (tipo_item, item_id, costo)
+            SELECT 'MATERIA_PRIMA', id, COALESCE(costo_promedio, 0) FROM materia_prima
+        """)
+        for query in self.create_costing_triggers():
+            cursor.execute(query)
+        rebuild_costs(cursor.connection)
+    
+    # ===== VERSIONES DE TABLAS MAESTRAS =====
+    
+    # Tablas de referencia que la caché invalida por versión
+    VERSIONED_TABLES = ('metodos_pago', 'configuraciones', 'departamentos',
+                        'municipios', 'presentaciones_comerciales')
+    
+    @staticmethod
+    def create_table_version_tables():
+        """Contador de cambios por tabla para invalidar la caché."""
+        return [
+            """CREATE TABLE IF NOT EXISTS versiones_tablas (
+                tabla TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )"""
+        ]
+    
+    def create_table_version_triggers(self):
+        """Un trigger por tabla y operación que incrementa su versión."""
+        triggers = []
+        for table in self.VERSIONED_TABLES:
+            for event, suffix in (('INSERT', 'ai'), ('UPDATE', 'au'), ('DELETE', 'ad')):
+                triggers.append(
+                    f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{suffix}
+                       AFTER {event} ON {table}
+                       BEGIN
+                           INSERT INTO versiones_tablas (tabla, version) VALUES ('{table}', 1)
+                           ON CONFLICT (tabla) DO UPDATE SET version = version + 1;
+                       END"""
+                )
+        return triggers
+    
+    def create_table_versions(self, cursor):
+        """Crea el contador de versiones y sus triggers (migración 5)."""
+        for query in self.create_table_version_tables() + self.create_table_version_triggers():
+            cursor.execute(query)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO versiones_tablas (tabla, version) VALUES (?, 0)",
+            [(table,) for table in self.VERSIONED_TABLES]
+        )
+
+    # ===== BÚSQUEDA DE TEXTO =====
+
+    # tabla -> columnas indexadas (la primera es el nombre y pesa más en el ranking)
+    SEARCH_TABLES = {
+        'clientes': ('nombre_comercial', 'identificacion', 'telefono_celular', 'telefono_fijo', 'municipio'),
+        'proveedores': ('nombre_comercial', 'identificacion', 'telefono_celular', 'telefono_fijo'),
+        'productos': ('nombre',),
+        'materia_prima': ('nombre', 'tipo'),
+    }
+
+    # Sin distinción de tildes ("acido" encuentra "Ácido") y con índices de prefijo
+    SEARCH_TOKENIZER = 'unicode61 remove_diacritics 2'
+    SEARCH_PREFIXES = '2 3'
+
+    def create_search_tables(self):
+        """Tablas FTS5 de contenido externo sobre las entidades buscables."""
+        return [
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                {', '.join(columns)},
+                content='{table}', content_rowid='id',
+                tokenize='{self.SEARCH_TOKENIZER}', prefix='{self.SEARCH_PREFIXES}'
+            )"""
+            for table, columns in self.SEARCH_TABLES.items()
+        ]
+
+    def create_search_triggers(self):
+        """
+        Triggers que mantienen los índices FTS5. El de UPDATE solo mira las
+        columnas indexadas: los cambios de saldo_credito o stock no lo disparan.
+        """
+        triggers = []
+        for table, columns in self.SEARCH_TABLES.items():
+            cols = ', '.join(columns)
+            new_values = ', '.join(f"NEW.{c}" for c in columns)
+            old_values = ', '.join(f"OLD.{c}" for c in columns)
+            delete = (f"INSERT INTO {table}_fts ({table}_fts, rowid, {cols}) "
+                      f"VALUES ('delete', OLD.id, {old_values});")
+            insert = f"INSERT INTO {table}_fts (rowid, {cols}) VALUES (NEW.id, {new_values});"
+            triggers += [
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_ai
+                   AFTER INSERT ON {table}
+                   BEGIN
+                       {insert}
+                   END""",
+
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_ad
+                   AFTER DELETE ON {table}
+                   BEGIN
+                       {delete}
+                   END""",
+
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_au
+                   AFTER UPDATE OF {cols} ON {table}
+                   BEGIN
+                       {delete}
+                       {insert}
+                   END"""
+            ]
+        return triggers
+
+    def create_search(self, cursor):
+        """Crea los índices de búsqueda, sus triggers y los llena (migración 6)."""
+        for query in self.create_search_tables() + self.create_search_triggers():
+            cursor.execute(query)
+        for table in self.SEARCH_TABLES:
+            cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+    # ===== ÍNDICES =====
+    
+    # Prefijo de los índices administrados por la aplicación
+    INDEX_PREFIX = 'idx_'
+    
+    @staticmethod
+    def create_indexes():
+        """Índices secundarios para las rutas de acceso frecuentes."""
+        return [
+            # Estado de cuenta del cliente (cubre la consulta completa)
+            """CREATE INDEX IF NOT EXISTS idx_ventas_cliente_fecha
+               ON ventas(cliente_id, fecha_venta, numero_factura, total, saldo_pendiente, estado)""",
+            
+            # Ventas por rango de fechas (cubre totales y cartera)
+            """CREATE INDEX IF NOT EXISTS idx_ventas_fecha
+               ON ventas(fecha_venta, cliente_id, total, saldo_pendiente, estado)""",
+            
+            "CREATE INDEX IF NOT EXISTS idx_ventas_detalle_venta ON ventas_detalle(venta_id)",
+            "CREATE INDEX IF NOT EXISTS idx_ventas_detalle_producto ON ventas_detalle(producto_id, presentacion_id)",
+            "CREATE INDEX IF NOT EXISTS idx_pagos_venta_venta ON pagos_venta(venta_id)",
+            "CREATE INDEX IF NOT EXISTS idx_abonos_credito_cliente ON abonos_credito(cliente_id, fecha_abono)",
+            "CREATE INDEX IF NOT EXISTS idx_abonos_detalle_venta ON abonos_detalle(venta_id)",
+            "CREATE INDEX IF NOT EXISTS idx_abonos_detalle_abono ON abonos_detalle(abono_id)",
+            "CREATE INDEX IF NOT EXISTS idx_produccion_detalle_lote ON produccion_detalle(lote_id)",
+            "CREATE INDEX IF NOT EXISTS idx_analisis_muestras_lote ON analisis_muestras(lote_id)",
+            "CREATE INDEX IF NOT EXISTS idx_compras_fecha ON compras_materia_prima(fecha_compra)",
+            """CREATE INDEX IF NOT EXISTS idx_compras_materia_fecha
+               ON compras_materia_prima(materia_prima_id, fecha_compra)""",
+            """CREATE INDEX IF NOT EXISTS idx_compras_proveedor_fecha
+               ON compras_materia_prima(proveedor_id, fecha_compra)""",
+            "CREATE INDEX IF NOT EXISTS idx_presentaciones_producto ON presentaciones_comerciales(producto_id)",
+            "CREATE INDEX IF NOT EXISTS idx_municipios_departamento ON municipios(departamento_id)"
+        ]
+    
+    @staticmethod
+    def create_pagination_indexes():
+        """
+        Índices (columna de orden, id) para paginar por keyset sin ordenar
+        en memoria: el rowid implícito al final del índice desempata.
+        """
+        return [
+            "CREATE INDEX IF NOT EXISTS idx_ventas_fecha_orden ON ventas(fecha_venta)",
+            "CREATE INDEX IF NOT EXISTS idx_clientes_nombre ON clientes(nombre_comercial)",
+            "CREATE INDEX IF NOT EXISTS idx_proveedores_nombre ON proveedores(nombre_comercial)"
+        ]
+    
+    def create_pagination(self, cursor):
+        """Crea los índices de paginación (migración 7)."""
+        for query in self.create_pagination_indexes():
+            cursor.execute(query)
+    
+    # ===== REGISTRO DE CAMBIOS =====
+    
+    # Tablas transaccionales cuyas filas modificadas se anotan para las vistas abiertas
+    CHANGE_FEED_TABLES = ('ventas', 'ventas_detalle', 'pagos_venta', 'abonos_credito',
+                          'abonos_detalle', 'bolsillos', 'clientes', 'stock_productos',
+                          'materia_prima', 'compras_materia_prima', 'lotes_produccion',
+                          'produccion_detalle')
+    
+    @staticmethod
+    def create_change_feed_tables():
+        """Registro de filas modificadas en orden de commit (seq nunca se reutiliza)."""
+        return [
+            """CREATE TABLE IF NOT EXISTS cambios (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabla TEXT NOT NULL,
+                fila_id INTEGER NOT NULL,
+                operacion TEXT NOT NULL CHECK(operacion IN ('I', 'U', 'D')),
+                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )"""
+        ]
+    
+    def create_change_feed_triggers(self):
+        """Un trigger por tabla y operación que anota (tabla, id, operación)."""
+        triggers = []
+        for table in self.CHANGE_FEED_TABLES:
+            for event, suffix, row in (('INSERT', 'ai', 'NEW'), ('UPDATE', 'au', 'NEW'),
+                                       ('DELETE', 'ad', 'OLD')):
+                triggers.append(
+                    f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_cambios_{suffix}
+                       AFTER {event} ON {table}
+                       BEGIN
+                           INSERT INTO cambios (tabla, fila_id, operacion)
+                           VALUES ('{table}', {row}.id, '{event[0]}');
+                       END"""
+                )
+        return triggers
+    
+    def create_change_feed(self, cursor):
+        """Crea el registro de cambios y sus triggers (migración 9)."""
+        for query in self.create_change_feed_tables() + self.create_change_feed_triggers():
+            cursor.execute(query)
+    
+    def create_archive_guard(self, cursor):
+        """
+        Recrea los triggers de borrado de saldos, resumen y kardex con
+        ARCHIVE_GUARD (migración 10): el archivado ya no los quita y
+        restaura en cada lote, que cambiaba el esquema.
+        """
+        for query in self.create_archive_guard_tables():
+            cursor.execute(query)
+        for query in (self.create_balance_triggers() + self.create_daily_summary_triggers()
+                      + self.create_stock_ledger_triggers()):
+            if ARCHIVE_GUARD in query:
+                # CREATE TRIGGER IF NOT EXISTS <nombre>
+                cursor.execute(f"DROP TRIGGER IF EXISTS {query.split()[5]}")
+                cursor.execute(query)
+    
+    def managed_index_names(self) -> set:
+        """Nombres de los índices administrados (los de cada módulo incluidos)."""
+        names = set()
+        for query in (self.create_indexes() + self.create_stock_ledger_tables()
+                      + self.create_pagination_indexes()):
+            # CREATE INDEX IF NOT EXISTS <nombre> ON ...
+            if query.lstrip().startswith('CREATE INDEX'):
+                names.add(query.split()[5])
+        return names
+    
+    def drop_stale_indexes(self, cursor) -> list:
+        """Elimina índices administrados que ya no están en `create_indexes()`."""
+        existing = cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE ? ESCAPE '\\'",
+            (self.INDEX_PREFIX.replace('_', '\\_') + '%',)
+        ).fetchall()
+        stale = [row[0] for row in existing if row[0] not in self.managed_index_names()]
+        for name in stale:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            logger.info(f"Índice obsoleto eliminado: {name}")
+        return stale
+    
+    # ===== ESQUEMA BASE =====
+    
+    def table_groups(self):
+        """Grupos de CREATE TABLE en el orden que exigen las foreign keys."""
+        return [
             # Orden CRÍTICO para foreign keys
             self.create_location_tables(),
             self.create_config_tables(),
@@ -334,9 +1249,11 @@ class DatabaseModels:
             self.create_production_tables(),
             self.create_payment_tables()
         ]
-        
-        # Datos iniciales obligatorios
-        initial_data = [
+    
+    @staticmethod
+    def initial_data():
+        """Datos iniciales obligatorios."""
+        return [
             # Métodos de pago (exactamente como lo pidieron)
             """INSERT OR IGNORE INTO metodos_pago (nombre, codigo) VALUES
                 ('Efectivo', 'EFECTIVO'),
@@ -355,28 +1272,38 @@ class DatabaseModels:
                 ('rango_precios_habilitado', '1'),
                 ('ruta_imagenes', 'data/images')"""
         ]
+    
+    def create_base_schema(self, cursor):
+        """Crea las tablas y los datos iniciales (migración 1)."""
+        logger.info("Creando tablas...")
+        for group in self.table_groups():
+            for query in group:
+                cursor.execute(query)
+        for query in self.initial_data():
+            cursor.execute(query)
+    
+    def sync_indexes(self, cursor):
+        """Crea los índices administrados y elimina los obsoletos."""
+        for query in self.create_indexes():
+            cursor.execute(query)
+        self.drop_stale_indexes(cursor)
+    
+    # ===== MÉTODO PRINCIPAL =====
+    
+    def initialize_all_tables(self):
+        """
+        Lleva el esquema a la última versión con el migrador.
+        
+        Si `PRAGMA user_version` ya es la versión actual no se ejecuta
+        ningún DDL, así que el arranque no paga la creación de tablas.
+        """
+        from .migrations import migrate
         
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            logger.info("Creando tablas...")
-            
-            # Ejecutar CREATE TABLE
-            for group in table_groups:
-                for query in group:
-                    cursor.execute(query)
-            
-            # Ejecutar datos iniciales
-            for query in initial_data:
-                cursor.execute(query)
-            
-            conn.commit()
+            migrate(db)
             logger.info("✅ Base de datos lista")
-            
         except Exception as e:
             logger.error(f"❌ Error: {e}")
-            conn.rollback()
             raise
 
 
@@ -0,0 +1,48 @@
+"""
+Detección barata de cambios en la base con `PRAGMA data_version`.
+
+`data_version` cambia en una conexión cuando otra conexión (de este u otro
+proceso) confirma cambios, así que el monitor usa una conexión propia que
+nunca escribe. Consultarlo cuesta microsegundos y no toca las tablas.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class ChangeMonitor:
+    """Conexión dedicada que indica si la base cambió desde la última consulta."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            db_path = self._db_path
+            if db_path is None:
+                from .connection import db
+                db.get_pool()  # Asegura que el directorio y la base existan
+                db_path = db.db_path
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA query_only = ON")
+        return self._conn
+
+    def data_version(self) -> int:
+        """Valor actual de PRAGMA data_version para esta conexión."""
+        with self._lock:
+            return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        """Consulta pequeña sobre la conexión del monitor (p. ej. versiones_tablas)."""
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
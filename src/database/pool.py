@@ -0,0 +1,242 @@
+"""
+Pool de conexiones SQLite: lectores por hilo y un único escritor.
+"""
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 30
+
+
+class PoolStats:
+    """Contadores de uso del pool para dimensionarlo bajo carga."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.reader_checkouts = 0
+        self.reader_waits = 0
+        self.reader_wait_time = 0.0
+        self.reader_hold_time = 0.0
+        self.reader_max_hold_time = 0.0
+        self.writer_checkouts = 0
+        self.writer_waits = 0
+        self.writer_wait_time = 0.0
+        self.writer_hold_time = 0.0
+        self.writer_max_hold_time = 0.0
+
+    def record_checkout(self, role: str, waited: bool, wait_time: float):
+        with self._lock:
+            setattr(self, f'{role}_checkouts', getattr(self, f'{role}_checkouts') + 1)
+            if waited:
+                setattr(self, f'{role}_waits', getattr(self, f'{role}_waits') + 1)
+                setattr(self, f'{role}_wait_time', getattr(self, f'{role}_wait_time') + wait_time)
+
+    def record_release(self, role: str, hold_time: float):
+        with self._lock:
+            setattr(self, f'{role}_hold_time', getattr(self, f'{role}_hold_time') + hold_time)
+            if hold_time > getattr(self, f'{role}_max_hold_time'):
+                setattr(self, f'{role}_max_hold_time', hold_time)
+
+    def record_created(self):
+        with self._lock:
+            self.connections_created += 1
+
+    def snapshot(self) -> dict:
+        """Retorna una copia de los contadores con promedios calculados."""
+        with self._lock:
+            data = {k: v for k, v in vars(self).items() if not k.startswith('_')}
+        for role in ('reader', 'writer'):
+            checkouts = data[f'{role}_checkouts']
+            data[f'{role}_avg_hold_time'] = data[f'{role}_hold_time'] / checkouts if checkouts else 0.0
+        return data
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones para una base de datos SQLite en modo WAL.
+
+    Cada hilo obtiene su propia conexión de lectura mientras la usa (hasta
+    `size` conexiones simultáneas) y todas las escrituras se serializan en
+    una única conexión escritora, de modo que las lecturas no esperan a las
+    escrituras.
+    """
+
+    def __init__(self, db_path: Path, size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 on_connect: Optional[Callable[[sqlite3.Connection, str], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._on_connect = on_connect
+        self._on_error = on_error
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._readers: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+        self._local = threading.local()
+        self._closed = False
+        self.stats = PoolStats()
+
+    def _create_connection(self, role: str) -> sqlite3.Connection:
+        """Abre una conexión y aplica los PRAGMA una sola vez."""
+        try:
+            # Timeout para evitar bloqueos en operaciones concurrentes
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.timeout,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")  # Lectores concurrentes
+            conn.execute("PRAGMA synchronous = NORMAL")
+            if role == 'reader':
+                conn.execute("PRAGMA query_only = ON")
+        except sqlite3.Error as e:
+            error_msg = f"Error conectando a la BD: {e}"
+            logger.error(error_msg)
+            if self._on_error:
+                self._on_error(error_msg)
+            raise
+
+        self.stats.record_created()
+        if self._on_connect:
+            self._on_connect(conn, role)
+        return conn
+
+    # ===== LECTORES =====
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+            self.stats.record_checkout('reader', False, 0.0)
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+            create = len(self._readers) < self.size
+            if create:
+                # Reservar el cupo antes de abrir fuera del lock
+                self._readers.append(None)
+
+        if create:
+            try:
+                conn = self._create_connection('reader')
+            except sqlite3.Error:
+                with self._lock:
+                    self._readers.remove(None)
+                raise
+            with self._lock:
+                self._readers[self._readers.index(None)] = conn
+            self.stats.record_checkout('reader', False, 0.0)
+            return conn
+
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Tiempo agotado esperando una conexión de lectura ({self.size} en uso)"
+            ) from None
+        self.stats.record_checkout('reader', True, time.perf_counter() - start)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Presta una conexión de lectura al hilo actual (reentrante)."""
+        conn = getattr(self._local, 'reader', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire_reader()
+        self._local.reader = conn
+        start = time.perf_counter()
+        try:
+            yield conn
+        finally:
+            self._local.reader = None
+            if conn.in_transaction:
+                conn.rollback()
+            self.stats.record_release('reader', time.perf_counter() - start)
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    # ===== ESCRITOR =====
+
+    def writer_connection(self) -> sqlite3.Connection:
+        """Retorna la conexión escritora, creándola si no existe."""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    if self._closed:
+                        raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+                    self._writer = self._create_connection('writer')
+        return self._writer
+
+    def holds_writer(self) -> bool:
+        """Indica si el hilo actual está dentro de `writer()`."""
+        return getattr(self._local, 'writer_depth', 0) > 0
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Bloquea la conexión escritora para el hilo actual (reentrante)."""
+        depth = getattr(self._local, 'writer_depth', 0)
+        if depth:
+            self._local.writer_depth = depth + 1
+            try:
+                yield self.writer_connection()
+            finally:
+                self._local.writer_depth -= 1
+            return
+
+        waited = not self._writer_lock.acquire(blocking=False)
+        wait_start = time.perf_counter()
+        if waited and not self._writer_lock.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Tiempo agotado esperando la conexión escritora")
+        self.stats.record_checkout('writer', waited, time.perf_counter() - wait_start if waited else 0.0)
+
+        self._local.writer_depth = 1
+        start = time.perf_counter()
+        try:
+            yield self.writer_connection()
+        finally:
+            self._local.writer_depth = 0
+            self.stats.record_release('writer', time.perf_counter() - start)
+            self._writer_lock.release()
+
+    # ===== CIERRE =====
+
+    def close(self):
+        """Cierra todas las conexiones inactivas y la escritora."""
+        with self._lock:
+            self._closed = True
+            self._readers = []
+        # Las conexiones prestadas se cierran al devolverse
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
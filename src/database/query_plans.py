@@ -0,0 +1,134 @@
+"""
+Verificación de planes de consulta para las consultas frecuentes.
+
+Ejecuta EXPLAIN QUERY PLAN sobre un registro de consultas calientes y
+falla si alguna recorre una tabla completa (SCAN) en lugar de usar un
+índice. Uso: python -m src.database.query_plans
+"""
+import sqlite3
+import sys
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# nombre -> (consulta, parámetros de ejemplo)
+HOT_QUERIES = {
+    'estado_cuenta_cliente': (
+        """SELECT id, numero_factura, fecha_venta, total, saldo_pendiente, estado
+           FROM ventas
+           WHERE cliente_id = ? AND fecha_venta BETWEEN ? AND ?
+           ORDER BY fecha_venta""",
+        (1, '2024-01-01', '2024-12-31')
+    ),
+    'facturas_pendientes_cliente': (
+        """SELECT numero_factura, fecha_venta, saldo_pendiente
+           FROM ventas
+           WHERE cliente_id = ? AND saldo_pendiente > 0""",
+        (1,)
+    ),
+    'ventas_por_rango': (
+        """SELECT fecha_venta, COUNT(*), SUM(total)
+           FROM ventas
+           WHERE fecha_venta BETWEEN ? AND ?
+           GROUP BY fecha_venta""",
+        ('2024-01-01', '2024-01-31')
+    ),
+    'detalle_venta': (
+        "SELECT * FROM ventas_detalle WHERE venta_id = ?",
+        (1,)
+    ),
+    'ventas_producto': (
+        "SELECT venta_id, cantidad_unidades, subtotal FROM ventas_detalle WHERE producto_id = ?",
+        (1,)
+    ),
+    'pagos_venta': (
+        "SELECT metodo_pago_id, monto, fecha_pago FROM pagos_venta WHERE venta_id = ?",
+        (1,)
+    ),
+    'abonos_venta': (
+        "SELECT abono_id, monto FROM abonos_detalle WHERE venta_id = ?",
+        (1,)
+    ),
+    'abonos_cliente': (
+        "SELECT id, fecha_abono, monto_total FROM abonos_credito WHERE cliente_id = ?",
+        (1,)
+    ),
+    'consumo_lote': (
+        "SELECT materia_prima_id, cantidad_utilizada FROM produccion_detalle WHERE lote_id = ?",
+        (1,)
+    ),
+    'compras_por_rango': (
+        """SELECT materia_prima_id, cantidad, precio_definitivo
+           FROM compras_materia_prima
+           WHERE fecha_compra BETWEEN ? AND ?""",
+        ('2024-01-01', '2024-01-31')
+    ),
+    'compras_materia_prima': (
+        """SELECT fecha_compra, cantidad, precio_definitivo
+           FROM compras_materia_prima
+           WHERE materia_prima_id = ? AND fecha_compra >= ?""",
+        (1, '2024-01-01')
+    ),
+}
+
+
+class QueryPlanError(RuntimeError):
+    """Alguna consulta caliente recorre una tabla completa."""
+
+
+def explain(conn: sqlite3.Connection, query: str, params: tuple = ()) -> list[str]:
+    """Retorna las líneas de EXPLAIN QUERY PLAN de una consulta."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def find_scans(plan: list[str]) -> list[str]:
+    """Pasos del plan que recorren una tabla o índice completo."""
+    return [step for step in plan if step.startswith('SCAN')]
+
+
+def check_hot_queries(conn: Optional[sqlite3.Connection] = None,
+                      queries: Optional[dict] = None) -> dict:
+    """
+    Verifica que ninguna consulta del registro use SCAN.
+
+    Args:
+        conn: Conexión a usar (por defecto una de lectura del pool)
+        queries: Registro a verificar (por defecto HOT_QUERIES)
+
+    Returns:
+        {nombre: plan} de todas las consultas verificadas
+
+    Raises:
+        QueryPlanError: si alguna consulta recorre una tabla completa
+    """
+    queries = HOT_QUERIES if queries is None else queries
+    if conn is None:
+        from .connection import db
+        with db.reader() as reader:
+            return check_hot_queries(reader, queries)
+
+    plans = {}
+    failures = []
+    for name, (query, params) in queries.items():
+        plan = explain(conn, query, params)
+        plans[name] = plan
+        scans = find_scans(plan)
+        if scans:
+            failures.append(f"{name}: {'; '.join(scans)}")
+
+    if failures:
+        message = "Consultas sin índice:\n  " + "\n  ".join(failures)
+        logger.error(message)
+        raise QueryPlanError(message)
+    return plans
+
+
+if __name__ == '__main__':
+    try:
+        for name, plan in check_hot_queries().items():
+            print(f"OK  {name}: {'; '.join(plan)}")
+    except QueryPlanError as e:
+        print(e)
+        sys.exit(1)
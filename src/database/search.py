@@ -0,0 +1,124 @@
+"""
+Búsqueda por prefijo sobre clientes, proveedores, productos y materias primas.
+
+Usa los índices FTS5 que crea la migración 6 (ver
+DatabaseModels.SEARCH_TABLES): cada palabra escrita se busca como prefijo,
+sin distinguir tildes ni mayúsculas, y los resultados se ordenan con bm25
+dando más peso al nombre. Pensado para autocompletar mientras se escribe.
+"""
+import re
+import logging
+from typing import Optional
+
+from .models import DatabaseModels
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+# Palabras tomadas de la consulta (el resto se ignora)
+MAX_TOKENS = 8
+# Peso del nombre frente a las demás columnas en bm25
+NAME_WEIGHT = 10.0
+
+# tabla -> columnas retornadas
+RESULT_COLUMNS = {
+    'clientes': ('id', 'nombre_comercial', 'identificacion', 'telefono_celular', 'municipio',
+                 'saldo_credito'),
+    'proveedores': ('id', 'nombre_comercial', 'tipo', 'identificacion', 'telefono_celular'),
+    'productos': ('id', 'nombre', 'precio_min', 'precio_max'),
+    'materia_prima': ('id', 'nombre', 'tipo', 'unidad_medida', 'stock_actual'),
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def match_expression(text: str) -> Optional[str]:
+    """
+    Convierte lo escrito por el usuario en una expresión MATCH segura.
+
+    "ac cit" -> '"ac"* "cit"*' (todas las palabras, cada una como prefijo).
+    Retorna None si no queda ninguna palabra.
+    """
+    tokens = _TOKEN_RE.findall(text or '')[:MAX_TOKENS]
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _search_query(table: str, only_active: bool) -> str:
+    columns = DatabaseModels.SEARCH_TABLES[table]
+    weights = ', '.join([str(NAME_WEIGHT)] + ['1.0'] * (len(columns) - 1))
+    select = ', '.join(f"t.{c}" for c in RESULT_COLUMNS[table])
+    query = f"""SELECT {select}, bm25({table}_fts, {weights}) AS rank
+                FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid
+                WHERE {table}_fts MATCH ?"""
+    if only_active:
+        query += " AND t.activo = 1"
+    return query + " ORDER BY rank LIMIT ?"
+
+
+def search_entities(table: str, text: str, limit: int = DEFAULT_LIMIT,
+                    only_active: bool = True) -> list[dict]:
+    """
+    Busca en una tabla por prefijo de palabras, ordenado por relevancia.
+
+    Args:
+        table: 'clientes', 'proveedores', 'productos' o 'materia_prima'
+        text: Texto escrito por el usuario
+        limit: Máximo de resultados
+        only_active: Excluir registros inactivos
+
+    Returns:
+        Filas con las columnas de RESULT_COLUMNS y `rank` (menor = mejor)
+    """
+    from .connection import db
+
+    if table not in RESULT_COLUMNS:
+        raise ValueError(f"Tabla sin búsqueda de texto: {table}")
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    return db.fetch_all(_search_query(table, only_active), (expression, limit))
+
+
+def search_all(text: str, limit: int = 5, only_active: bool = True) -> dict[str, list[dict]]:
+    """Busca en todas las entidades; {tabla: resultados}."""
+    return {table: search_entities(table, text, limit, only_active) for table in RESULT_COLUMNS}
+
+
+def search_clients(text: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+    """Clientes por nombre comercial, identificación, teléfono o municipio."""
+    return search_entities('clientes', text, limit)
+
+
+def search_suppliers(text: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+    return search_entities('proveedores', text, limit)
+
+
+def search_products(text: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+    return search_entities('productos', text, limit)
+
+
+def search_materials(text: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+    """Materias primas por nombre o tipo ("acido" encuentra "Ácido Cítrico")."""
+    return search_entities('materia_prima', text, limit)
+
+
+def rebuild_search_index(optimize: bool = True):
+    """
+    Reconstruye los índices desde las tablas base y opcionalmente los
+    compacta (útil después de cargas masivas).
+    """
+    from .connection import db
+
+    with db.writer() as conn:
+        try:
+            for table in DatabaseModels.SEARCH_TABLES:
+                conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+                if optimize:
+                    conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('optimize')")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    logger.info("Índices de búsqueda reconstruidos")
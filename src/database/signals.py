@@ -0,0 +1,108 @@
+"""
+Señales de la capa de datos, con o sin Qt.
+
+Con interfaz gráfica se usa un QObject con Signal de PySide6 (las señales
+emitidas desde hilos de trabajo llegan encoladas al hilo de la UI). En
+modo headless (scripts, workers, reportes por línea de comandos) se usa
+un equivalente en Python puro que no importa Qt.
+"""
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# nombre -> tipos de los argumentos
+SIGNAL_SPEC = {
+    'connection_established': (),
+    'connection_error': (str,),
+    'backup_created': (str,),
+    # Páginas copiadas y páginas totales del backup en curso
+    'backup_progress': (int, int),
+    # Ejecutor asíncrono: id de la consulta y resultado o mensaje
+    'query_finished': (int, object),
+    'query_failed': (int, str),
+    'query_cancelled': (int,),
+    # Miniatura lista en memoria: imagen_path y tamaño
+    'thumbnail_ready': (str, int),
+    # Registro de cambios: tabla y {'inserted'|'updated'|'deleted': [ids]}
+    'data_changed': (str, object),
+    # Se perdieron cambios (registro podado): las vistas deben recargar
+    'data_resync': (),
+}
+
+_qt_class = None
+
+
+def qt_available() -> bool:
+    """Indica si PySide6 se puede importar."""
+    try:
+        import PySide6.QtCore  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _qt_signals_class():
+    """Construye (una sola vez) la clase QObject con las señales de SIGNAL_SPEC."""
+    global _qt_class
+    if _qt_class is None:
+        from PySide6.QtCore import QObject, Signal
+
+        attrs = {name: Signal(*types) for name, types in SIGNAL_SPEC.items()}
+        attrs['__doc__'] = "Señales para comunicación con la UI."
+        _qt_class = type('DatabaseSignals', (QObject,), attrs)
+    return _qt_class
+
+
+class HeadlessSignal:
+    """Señal síncrona en Python puro con la interfaz connect/disconnect/emit."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._slots: list[Callable] = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot: Callable):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot: Callable = None):
+        with self._lock:
+            if slot is None:
+                self._slots.clear()
+            elif slot in self._slots:
+                self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            try:
+                slot(*args)
+            except Exception:
+                logger.exception(f"Error en receptor de la señal {self.name}")
+
+
+class HeadlessSignals:
+    """Mismas señales que DatabaseSignals, sin depender de Qt."""
+
+    def __init__(self):
+        for name in SIGNAL_SPEC:
+            setattr(self, name, HeadlessSignal(name))
+
+
+def create_signals(headless: bool):
+    """Crea el objeto de señales según el modo de ejecución."""
+    if not headless:
+        if qt_available():
+            return _qt_signals_class()()
+        logger.warning("PySide6 no está disponible; se usan señales headless")
+    return HeadlessSignals()
+
+
+def __getattr__(name: str):
+    # Compatibilidad: `from .signals import DatabaseSignals` importa Qt solo aquí
+    if name == 'DatabaseSignals':
+        return _qt_signals_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
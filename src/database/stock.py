@@ -0,0 +1,175 @@
+"""
+Consultas sobre el kardex de inventario (movimientos_stock).
+
+El stock actual sigue en stock_productos.cantidad y materia_prima.stock_actual
+(lectura O(1)), pero ahora lo mantiene el kardex. El stock a una fecha se
+obtiene con el último corte (snapshots_stock) más los movimientos posteriores.
+"""
+import datetime
+import sqlite3
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PRODUCTO = 'PRODUCTO'
+MATERIA_PRIMA = 'MATERIA_PRIMA'
+
+
+def _today() -> str:
+    return datetime.date.today().isoformat()
+
+
+def product_stock(producto_id: int, presentacion_id: int) -> float:
+    """Stock actual de un producto en una presentación."""
+    from .connection import db
+    row = db.fetch_one(
+        "SELECT cantidad FROM stock_productos WHERE producto_id = ? AND presentacion_id = ?",
+        (producto_id, presentacion_id)
+    )
+    return row['cantidad'] if row else 0
+
+
+def material_stock(materia_prima_id: int) -> float:
+    """Stock actual de una materia prima."""
+    from .connection import db
+    row = db.fetch_one("SELECT stock_actual FROM materia_prima WHERE id = ?", (materia_prima_id,))
+    return row['stock_actual'] if row else 0
+
+
+def stock_at(tipo_item: str, item_id: int, fecha: str,
+             conn: Optional[sqlite3.Connection] = None) -> float:
+    """
+    Stock de un ítem al cierre de `fecha` (YYYY-MM-DD).
+
+    Cuesta una lectura del último corte anterior más la suma de los
+    movimientos entre ese corte y la fecha.
+
+    Args:
+        tipo_item: PRODUCTO (item_id = stock_productos.id) o MATERIA_PRIMA
+        item_id: Identificador del ítem
+        fecha: Fecha de consulta (inclusive)
+    """
+    if conn is None:
+        from .connection import db
+        with db.reader() as reader:
+            return stock_at(tipo_item, item_id, fecha, reader)
+
+    snapshot = conn.execute(
+        """SELECT fecha_corte, cantidad FROM snapshots_stock
+           WHERE tipo_item = ? AND item_id = ? AND fecha_corte <= ?
+           ORDER BY fecha_corte DESC LIMIT 1""",
+        (tipo_item, item_id, fecha)
+    ).fetchone()
+    base, desde = (snapshot[1], snapshot[0]) if snapshot else (0, '')
+
+    delta = conn.execute(
+        """SELECT COALESCE(SUM(cantidad), 0) FROM movimientos_stock
+           WHERE tipo_item = ? AND item_id = ? AND fecha > ? AND fecha <= ?""",
+        (tipo_item, item_id, desde, fecha)
+    ).fetchone()[0]
+    return round(base + delta, 4)
+
+
+def record_adjustment(tipo_item: str, item_id: int, cantidad: float,
+                      fecha: Optional[str] = None, notas: Optional[str] = None) -> int:
+    """
+    Registra un ajuste manual (conteo físico, merma...). Es la única forma
+    válida de cambiar el stock fuera de ventas, producción y compras.
+
+    Returns:
+        id del movimiento
+    """
+    from .connection import db
+    if tipo_item not in (PRODUCTO, MATERIA_PRIMA):
+        raise ValueError(f"Tipo de ítem inválido: {tipo_item}")
+    cursor = db.execute_transaction(
+        ["""INSERT INTO movimientos_stock (tipo_item, item_id, fecha, cantidad, origen, notas)
+            VALUES (?, ?, ?, ?, 'AJUSTE', ?)"""],
+        [(tipo_item, item_id, fecha or _today(), cantidad, notas)]
+    )
+    return cursor.lastrowid
+
+
+def last_snapshot_date(conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
+    if conn is None:
+        from .connection import db
+        with db.reader() as reader:
+            return last_snapshot_date(reader)
+    return conn.execute("SELECT MAX(fecha_corte) FROM snapshots_stock").fetchone()[0]
+
+
+def take_snapshot(fecha_corte: Optional[str] = None) -> int:
+    """
+    Toma un corte de stock de todos los ítems al cierre de `fecha_corte`.
+
+    Se calcula desde el corte anterior más los movimientos del periodo,
+    sin recorrer todo el kardex.
+
+    Returns:
+        Número de ítems registrados en el corte
+    """
+    from .connection import db
+    fecha_corte = fecha_corte or _today()
+
+    with db.writer() as conn:
+        try:
+            previous = last_snapshot_date(conn)
+            if previous is not None and fecha_corte <= previous:
+                raise ValueError(f"Ya existe un corte en o después de {fecha_corte} ({previous})")
+
+            cursor = conn.execute(
+                """INSERT INTO snapshots_stock (tipo_item, item_id, fecha_corte, cantidad)
+                   SELECT tipo_item, item_id, :corte, ROUND(SUM(cantidad), 4) FROM (
+                       SELECT tipo_item, item_id, cantidad FROM snapshots_stock
+                       WHERE fecha_corte = :anterior
+                       UNION ALL
+                       SELECT tipo_item, item_id, cantidad FROM movimientos_stock
+                       WHERE fecha > :anterior AND fecha <= :corte
+                   )
+                   GROUP BY tipo_item, item_id""",
+                {'corte': fecha_corte, 'anterior': previous or ''}
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    logger.info(f"Corte de stock {fecha_corte}: {cursor.rowcount} ítems")
+    return cursor.rowcount
+
+
+def take_snapshot_if_due(interval_days: int = 30) -> bool:
+    """Toma un corte si el último tiene más de `interval_days` días."""
+    previous = last_snapshot_date()
+    today = datetime.date.today()
+    if previous and (today - datetime.date.fromisoformat(previous)).days < interval_days:
+        return False
+    # El corte cubre hasta ayer para no cerrar un día en curso
+    take_snapshot((today - datetime.timedelta(days=1)).isoformat())
+    return True
+
+
+def verify_stock(conn: Optional[sqlite3.Connection] = None) -> list[dict]:
+    """Ítems cuyo stock actual no coincide con la suma de su kardex."""
+    if conn is None:
+        from .connection import db
+        with db.reader() as reader:
+            return verify_stock(reader)
+
+    rows = conn.execute(
+        """WITH kardex AS (
+               SELECT tipo_item, item_id, ROUND(SUM(cantidad), 4) AS esperado
+               FROM movimientos_stock GROUP BY tipo_item, item_id
+           ),
+           actual AS (
+               SELECT 'PRODUCTO' AS tipo_item, id AS item_id, cantidad AS actual FROM stock_productos
+               UNION ALL
+               SELECT 'MATERIA_PRIMA', id, stock_actual FROM materia_prima
+           )
+           SELECT a.tipo_item, a.item_id, COALESCE(k.esperado, 0) AS esperado, a.actual
+           FROM actual a LEFT JOIN kardex k
+             ON k.tipo_item = a.tipo_item AND k.item_id = a.item_id
+           WHERE ABS(COALESCE(k.esperado, 0) - COALESCE(a.actual, 0)) > 0.00005"""
+    ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,255 @@
+"""
+Cola de escrituras con un hilo escritor dedicado y commit agrupado.
+
+Los trabajos de escritura (pagos, ajustes de stock, facturas) se encolan y
+un único hilo los ejecuta. Todo lo que está en cola cuando el hilo queda
+libre se confirma en una sola transacción: con carga alta el costo del
+commit (el fsync del WAL) se reparte entre muchos trabajos y el rendimiento
+crece con la carga en vez de quedar limitado por los commits.
+
+Cada trabajo corre en su propio SAVEPOINT, así que si uno falla se deshace
+solo ese trabajo y los demás del grupo se confirman igual. Cada envío
+retorna un concurrent.futures.Future que se resuelve después del COMMIT.
+
+Con synchronous=NORMAL el commit en WAL no hace fsync, así que la ganancia
+sale de ahorrar BEGIN/COMMIT y checkpoints, no del disco. En el benchmark
+50 ventas tardan ~17-22 ms por la cola (write_queue_ventas) contra ~25-35 ms
+con execute_transaction una por una (execute_transaction_ventas). Una
+escritura suelta que se espera enseguida es más lenta por la cola (el
+SAVEPOINT y el paso entre hilos cuestan ~0.1 ms): úsela cuando varios hilos
+escriben a la vez o cuando se envían muchos trabajos sin esperar cada
+resultado. `linger` > 0 solo agrega latencia si los trabajos ya llegan
+juntos; sirve cuando llegan goteando desde muchos hilos.
+"""
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 256  # trabajos por transacción
+DEFAULT_MAX_PENDING = 10000  # trabajos en cola antes de bloquear al que envía
+DEFAULT_LINGER = 0.0  # segundos que se espera a más trabajos si la cola quedó vacía
+
+_ids = itertools.count(1)
+
+
+class WriteJob:
+    """Trabajo de escritura: una función que recibe la conexión escritora."""
+
+    __slots__ = ('id', 'description', 'fn', 'future')
+
+    def __init__(self, description: str, fn: Callable[[sqlite3.Connection], Any]):
+        self.id = next(_ids)
+        self.description = description
+        self.fn = fn
+        self.future: Future = Future()
+
+
+class WriteQueueStats:
+    """Contadores del hilo escritor: tamaño de los grupos y tiempo de commit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.commit_time = 0.0
+        self.busy_time = 0.0
+
+    def record_batch(self, size: int, failed: int, busy_time: float, commit_time: float):
+        with self._lock:
+            self.jobs += size
+            self.failed += failed
+            self.batches += 1
+            self.max_batch = max(self.max_batch, size)
+            self.busy_time += busy_time
+            self.commit_time += commit_time
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = {k: v for k, v in vars(self).items() if not k.startswith('_')}
+        data['avg_batch'] = data['jobs'] / data['batches'] if data['batches'] else 0.0
+        return data
+
+
+class WriteQueue:
+    """Cola de trabajos de escritura atendida por un hilo con commit agrupado."""
+
+    def __init__(self, connection=None, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_pending: int = DEFAULT_MAX_PENDING, linger: float = DEFAULT_LINGER):
+        self._connection = connection
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self.stats = WriteQueueStats()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from .connection import db
+            self._connection = db
+        return self._connection
+
+    def _ensure_thread(self):
+        """Arranca el hilo escritor; se llama con `self._lock` tomado."""
+        if self._shutdown:
+            raise RuntimeError("La cola de escrituras está detenida")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="db-writer", daemon=True)
+            self._thread.start()
+
+    # ===== ENVÍO =====
+
+    def submit(self, queries: list, params: Optional[list] = None) -> Future:
+        """
+        Encola sentencias que se aplican juntas (como `execute_transaction`).
+
+        El Future se resuelve con {'lastrowid', 'rowcount'} de la última
+        sentencia cuando el grupo se confirma, o con la excepción si el
+        trabajo falló (y en ese caso ninguna de sus sentencias se aplica).
+        """
+        queries = list(queries)
+        params = list(params or [])
+        record = self.connection.instrumentation.record
+
+        def run(conn: sqlite3.Connection) -> dict:
+            cursor = conn.cursor()
+            for i, query in enumerate(queries):
+                query_params = params[i] if i < len(params) else ()
+                start = time.perf_counter()
+                try:
+                    cursor.execute(query, query_params)
+                except sqlite3.Error:
+                    record(query, time.perf_counter() - start, error=True)
+                    raise
+                record(query, time.perf_counter() - start, cursor.rowcount, conn=conn,
+                       params=query_params)
+            return {'lastrowid': cursor.lastrowid, 'rowcount': cursor.rowcount}
+
+        description = queries[0].strip().split('\n')[0] if queries else ''
+        return self._enqueue(WriteJob(description, run))
+
+    def submit_call(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Encola `fn(conn, *args, **kwargs)` con la conexión escritora.
+
+        La función corre dentro de la transacción del grupo: no debe hacer
+        commit ni rollback; si lanza una excepción se deshace solo su parte.
+        """
+        name = getattr(fn, '__name__', repr(fn))
+        return self._enqueue(WriteJob(name, lambda conn: fn(conn, *args, **kwargs)))
+
+    def execute(self, queries: list, params: Optional[list] = None,
+                timeout: Optional[float] = None) -> dict:
+        """Variante bloqueante de `submit`: espera el commit y retorna el resultado."""
+        return self.submit(queries, params).result(timeout)
+
+    def _enqueue(self, job: WriteJob) -> Future:
+        # Con el lock tomado ningún trabajo entra a la cola después del
+        # centinela de shutdown(). Si la cola está llena el put espera con
+        # el lock: el hilo escritor no lo usa, así que la cola sigue drenando.
+        with self._lock:
+            self._ensure_thread()
+            self._queue.put(job)
+        return job.future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    # ===== HILO ESCRITOR =====
+
+    def _next_batch(self) -> list:
+        """Bloquea hasta el primer trabajo y agrega todo lo que ya esté en cola."""
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                job = self._queue.get(timeout=self.linger) if self.linger else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(job)
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            stop = None in batch
+            jobs = [job for job in batch if job is not None and job.future.set_running_or_notify_cancel()]
+            if jobs:
+                self._run_batch(jobs)
+            if stop:
+                break
+
+    def _run_batch(self, jobs: list):
+        start = time.perf_counter()
+        results = []
+        failed = 0
+        try:
+            with self.connection.writer() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for job in jobs:
+                        conn.execute("SAVEPOINT write_job")
+                        try:
+                            result = job.fn(conn)
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO write_job")
+                            conn.execute("RELEASE write_job")
+                            failed += 1
+                            logger.warning(f"Escritura {job.id} ({job.description}) falló: {e}")
+                            job.future.set_exception(e)
+                            continue
+                        conn.execute("RELEASE write_job")
+                        results.append((job, result))
+                    commit_start = time.perf_counter()
+                    conn.commit()
+                    commit_time = time.perf_counter() - commit_start
+                except BaseException:
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            # Falló la transacción completa (BEGIN o COMMIT): nada del grupo quedó aplicado
+            logger.error(f"Grupo de {len(jobs)} escrituras falló: {e}")
+            self.connection.db_logger.error(f"Write batch failed: {e}")
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            self.stats.record_batch(len(jobs), len(jobs), time.perf_counter() - start, 0.0)
+            return
+
+        self.stats.record_batch(len(jobs), failed, time.perf_counter() - start, commit_time)
+        for job, result in results:
+            job.future.set_result(result)
+        checkpointer = self.connection.checkpointer
+        if checkpointer is not None:
+            checkpointer.notify_commit()
+
+    # ===== CIERRE =====
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """Detiene el hilo después de confirmar lo que ya estaba en cola."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+        if wait:
+            thread.join(timeout)
+
+
+def get_write_queue() -> WriteQueue:
+    """Cola de escrituras de la conexión global, creada al primer uso."""
+    from .connection import db
+    return db.write_queue
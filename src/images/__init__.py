@@ -0,0 +1,29 @@
+"""
+Módulo de imágenes - almacenamiento deduplicado y miniaturas.
+
+Pillow solo se importa al generar una miniatura.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    'ImageStore': '.store',
+    'default_image_root': '.store',
+    'ThumbnailCache': '.thumbnails',
+    'Thumbnail': '.thumbnails',
+    'THUMBNAIL_SIZES': '.thumbnails',
+    'get_thumbnail_cache': '.thumbnails',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
\ No newline at end of file
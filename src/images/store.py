@@ -0,0 +1,150 @@
+"""
+Almacenamiento de imágenes direccionado por contenido.
+
+Cada archivo se guarda una sola vez bajo el SHA-256 de sus bytes
+(originals/ab/abcdef....jpg), así que subir la misma foto para varios
+productos no duplica el archivo. La ruta relativa retornada es la que se
+guarda en las columnas imagen_path.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+ORIGINALS_DIR = 'originals'
+THUMBNAILS_DIR = 'thumbnails'
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif'}
+_HASH_BUFFER = 1024 * 1024
+
+# tabla -> columna con rutas de imagen
+IMAGE_COLUMNS = {
+    'productos': 'imagen_path',
+    'materia_prima': 'imagen_path',
+    'lotes_produccion': 'imagen_path',
+}
+
+
+def default_image_root() -> Path:
+    """
+    Directorio de imágenes según `ruta_imagenes` en configuraciones.
+
+    Una ruta relativa se toma desde la carpeta de la aplicación (la que
+    contiene data/).
+    """
+    from src.database.cache import reference_cache
+    from src.database.connection import db
+
+    configured = Path(reference_cache.config_value('ruta_imagenes', 'data/images'))
+    if configured.is_absolute():
+        return configured
+    return db.db_path.parent.parent / configured
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 hexadecimal del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BUFFER), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImageStore:
+    """Originales deduplicados por contenido bajo `root`."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self._root = Path(root) if root is not None else None
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._root = default_image_root()
+        return self._root
+
+    def add(self, source: Union[str, Path, bytes], extension: Optional[str] = None) -> str:
+        """
+        Guarda una imagen y retorna su ruta relativa (para imagen_path).
+
+        Args:
+            source: Ruta del archivo o sus bytes
+            extension: Extensión a usar si `source` son bytes (".jpg", ".png"...)
+        """
+        if isinstance(source, bytes):
+            digest = hashlib.sha256(source).hexdigest()
+            extension = (extension or '.jpg').lower()
+        else:
+            source = Path(source)
+            digest = file_digest(source)
+            extension = (extension or source.suffix).lower()
+        if extension == '.jpeg':
+            extension = '.jpg'
+        if extension not in ALLOWED_EXTENSIONS:
+            raise ValueError(f"Formato de imagen no soportado: {extension}")
+
+        relative = f"{ORIGINALS_DIR}/{digest[:2]}/{digest}{extension}"
+        target = self.root / relative
+        if target.exists():
+            return relative
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Copia a un temporal del mismo directorio y renombra: nunca queda un archivo a medias
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(source, bytes):
+                    f.write(source)
+                else:
+                    with open(source, 'rb') as src:
+                        shutil.copyfileobj(src, f, _HASH_BUFFER)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        logger.info(f"Imagen guardada: {relative}")
+        return relative
+
+    def resolve(self, imagen_path: Optional[str]) -> Optional[Path]:
+        """Ruta absoluta de un imagen_path (relativo al almacén o absoluto heredado)."""
+        if not imagen_path:
+            return None
+        path = Path(imagen_path)
+        return path if path.is_absolute() else self.root / path
+
+    @staticmethod
+    def content_key(imagen_path: str) -> Optional[str]:
+        """Hash de contenido si la ruta es del almacén; None para rutas heredadas."""
+        path = Path(imagen_path)
+        if len(path.parts) == 3 and path.parts[0] == ORIGINALS_DIR and len(path.stem) == 64:
+            return path.stem
+        return None
+
+    def referenced_paths(self) -> set:
+        """imagen_path en uso en todas las tablas con imágenes."""
+        from src.database.connection import db
+
+        used = set()
+        for table, column in IMAGE_COLUMNS.items():
+            for row in db.fetch_iter(f"SELECT DISTINCT {column} AS ruta FROM {table} WHERE {column} IS NOT NULL"):
+                used.add(row['ruta'])
+        return used
+
+    def garbage_collect(self, referenced: Optional[Iterable[str]] = None) -> list[Path]:
+        """Elimina originales que ya no usa ninguna fila, con sus miniaturas."""
+        referenced = set(self.referenced_paths() if referenced is None else referenced)
+        removed = []
+        for path in (self.root / ORIGINALS_DIR).glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            if path.relative_to(self.root).as_posix() not in referenced:
+                path.unlink(missing_ok=True)
+                removed.append(path)
+                for thumbnail in self.root.glob(f"{THUMBNAILS_DIR}/*/{path.stem[:2]}/{path.stem}.png"):
+                    thumbnail.unlink(missing_ok=True)
+        if removed:
+            logger.info(f"Imágenes sin uso eliminadas: {len(removed)}")
+        return removed
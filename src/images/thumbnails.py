@@ -0,0 +1,275 @@
+"""
+Miniaturas de imágenes: caché en disco a tamaños fijos y LRU en memoria.
+
+Las vistas llaman `get()`, que nunca bloquea: si la miniatura no está en
+memoria la encarga a un pool de hilos y retorna None; al terminar se emite
+`thumbnail_ready(imagen_path, tamaño)` por las señales de la base (llega
+encolada al hilo de la UI) y el siguiente `get()` la encuentra en memoria.
+Las miniaturas en disco se generan una sola vez por imagen y tamaño.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .store import THUMBNAILS_DIR, ImageStore
+
+logger = logging.getLogger(__name__)
+
+# Lado máximo en píxeles de cada tamaño de miniatura
+THUMBNAIL_SIZES = (64, 128, 256)
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes de píxeles decodificados
+DEFAULT_WORKERS = 2
+
+
+class Thumbnail:
+    """Miniatura decodificada en RGBA, lista para pintar."""
+
+    __slots__ = ('width', 'height', 'data')
+
+    def __init__(self, width: int, height: int, data: bytes):
+        self.width = width
+        self.height = height
+        self.data = data
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def to_qimage(self):
+        """QImage con copia propia de los píxeles."""
+        from PySide6.QtGui import QImage
+
+        image = QImage(self.data, self.width, self.height, self.width * 4, QImage.Format.Format_RGBA8888)
+        return image.copy()
+
+
+class _MemoryLRU:
+    """LRU de miniaturas limitado por bytes."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.bytes = 0
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> Optional[Thumbnail]:
+        thumbnail = self.entries.get(key)
+        if thumbnail is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return thumbnail
+
+    def put(self, key, thumbnail: Thumbnail):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.nbytes
+        self.entries[key] = thumbnail
+        self.bytes += thumbnail.nbytes
+        while self.bytes > self.budget and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+class ThumbnailCache:
+    """Miniaturas en memoria y disco generadas en segundo plano."""
+
+    def __init__(self, store: Optional[ImageStore] = None,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 workers: int = DEFAULT_WORKERS):
+        self.store = store or ImageStore()
+        self.workers = workers
+        self._memory = _MemoryLRU(memory_budget)
+        self._pending: dict[tuple, Future] = {}
+        self._failed: set = set()
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='thumbnails')
+        return self._pool
+
+    @staticmethod
+    def _check_size(size: int) -> int:
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Tamaño de miniatura no soportado: {size} (opciones: {THUMBNAIL_SIZES})")
+        return size
+
+    def cache_path(self, imagen_path: str, size: int) -> Optional[Path]:
+        """
+        Archivo de la miniatura en disco. Para imágenes del almacén la clave
+        es su hash; para rutas heredadas, la ruta con fecha y tamaño del archivo.
+        """
+        key = self.store.content_key(imagen_path)
+        if key is None:
+            source = self.store.resolve(imagen_path)
+            try:
+                stat = source.stat()
+            except OSError:
+                return None
+            key = hashlib.sha256(f"{source}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+        return self.store.root / THUMBNAILS_DIR / str(size) / key[:2] / f"{key}.png"
+
+    # ===== LECTURA =====
+
+    def get(self, imagen_path: Optional[str], size: int) -> Optional[Thumbnail]:
+        """Miniatura en memoria o None (y la encarga en segundo plano). No bloquea."""
+        if not imagen_path:
+            return None
+        key = (imagen_path, self._check_size(size))
+        with self._lock:
+            thumbnail = self._memory.get(key)
+            if thumbnail is not None or key in self._failed:
+                return thumbnail
+        self.request(imagen_path, size)
+        return None
+
+    def request(self, imagen_path: str, size: int) -> Future:
+        """Encarga la miniatura; una sola tarea por imagen y tamaño a la vez."""
+        key = (imagen_path, self._check_size(size))
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor().submit(self._load_and_notify, imagen_path, size)
+                self._pending[key] = future
+        return future
+
+    def prefetch(self, imagen_paths: Iterable[Optional[str]], size: int):
+        """Encarga las miniaturas de las filas que están por mostrarse."""
+        for imagen_path in imagen_paths:
+            self.get(imagen_path, size)
+
+    def cancel_pending(self) -> int:
+        """Descarta los encargos que no han empezado (p. ej. tras un salto de scroll)."""
+        with self._lock:
+            pending = list(self._pending.items())
+        cancelled = 0
+        for key, future in pending:
+            if future.cancel():
+                cancelled += 1
+                with self._lock:
+                    self._pending.pop(key, None)
+        return cancelled
+
+    def load(self, imagen_path: str, size: int) -> Optional[Thumbnail]:
+        """Miniatura desde memoria, disco o generándola. Bloquea; para hilos de trabajo."""
+        key = (imagen_path, self._check_size(size))
+        with self._lock:
+            thumbnail = self._memory.get(key)
+        if thumbnail is not None:
+            return thumbnail
+
+        try:
+            thumbnail = self._load_from_disk(imagen_path, size)
+        except Exception as e:
+            logger.warning(f"No se pudo generar la miniatura de {imagen_path}: {e}")
+            thumbnail = None
+        with self._lock:
+            if thumbnail is None:
+                self._failed.add(key)
+            else:
+                self._memory.put(key, thumbnail)
+        return thumbnail
+
+    def _load_and_notify(self, imagen_path: str, size: int) -> Optional[Thumbnail]:
+        try:
+            thumbnail = self.load(imagen_path, size)
+        finally:
+            with self._lock:
+                self._pending.pop((imagen_path, size), None)
+        if thumbnail is not None:
+            from src.database.connection import db
+            db.signals.thumbnail_ready.emit(imagen_path, size)
+        return thumbnail
+
+    # ===== DISCO =====
+
+    def _load_from_disk(self, imagen_path: str, size: int) -> Optional[Thumbnail]:
+        from PIL import Image
+
+        cached = self.cache_path(imagen_path, size)
+        if cached is None:
+            return None
+        if not cached.exists():
+            self._generate(self.store.resolve(imagen_path), cached, size)
+        with Image.open(cached) as image:
+            image = image.convert('RGBA')
+            return Thumbnail(image.width, image.height, image.tobytes())
+
+    @staticmethod
+    def _generate(source: Path, target: Path, size: int):
+        """Reduce la imagen original a `size` px de lado máximo y la guarda en PNG."""
+        from PIL import Image, ImageOps
+
+        with Image.open(source) as image:
+            # Los JPEG se decodifican ya reducidos: mucho menos trabajo que abrirlos completos
+            image.draft('RGB', (size, size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, 'PNG', optimize=False)
+                os.replace(tmp_name, target)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+
+    # ===== MANTENIMIENTO =====
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._memory.entries),
+                'bytes': self._memory.bytes,
+                'budget': self._memory.budget,
+                'hits': self._memory.hits,
+                'misses': self._memory.misses,
+                'evictions': self._memory.evictions,
+                'pending': len(self._pending),
+                'failed': len(self._failed),
+            }
+
+    def clear_memory(self):
+        """Vacía la LRU y olvida las imágenes que fallaron (p. ej. tras reemplazarlas)."""
+        with self._lock:
+            self._memory.clear()
+            self._failed.clear()
+
+    def shutdown(self, wait: bool = True):
+        self.cancel_pending()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Caché de miniaturas global, creada al primer uso."""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        with _thumbnail_lock:
+            if _thumbnail_cache is None:
+                _thumbnail_cache = ThumbnailCache()
+    return _thumbnail_cache
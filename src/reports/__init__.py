@@ -0,0 +1,32 @@
+"""
+Módulo de reportes - consultas analíticas cacheadas y exportación a Excel.
+
+Los submódulos se importan al primer acceso (requieren pandas y openpyxl).
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    'REPORTS': '.definitions',
+    'report': '.definitions',
+    'ReportEngine': '.engine',
+    'get_report_engine': '.engine',
+    'ParallelReportRunner': '.parallel',
+    'PARALLEL_REPORTS': '.parallel',
+    'export_rows': '.export',
+    'export_query': '.export',
+    'export_frame': '.export',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
\ No newline at end of file
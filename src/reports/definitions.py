@@ -0,0 +1,206 @@
+"""
+Reportes del negocio: SQL con funciones de ventana y post-proceso con pandas.
+
+Cada reporte se registra con @report y es una función
+`fn(fetch, **parámetros) -> DataFrame`, donde `fetch(sql, params)` retorna
+un DataFrame construido por columnas. Las ventas y compras se leen de las
+vistas `<tabla>_historico`, así que incluyen lo que ya se archivó.
+"""
+import inspect
+from typing import Callable, Optional
+
+# nombre -> Report
+REPORTS: dict = {}
+
+# Tramos de antigüedad de cartera: (hasta días, etiqueta)
+AGING_BUCKETS = ((30, '0-30'), (60, '31-60'), (90, '61-90'), (None, '+90'))
+
+# Un lote rinde bajo si el rendimiento real queda más de esto bajo el esperado
+LOW_YIELD_TOLERANCE = 0.05
+
+_MIN_DATE = '0000-01-01'
+_MAX_DATE = '9999-12-31'
+
+
+class Report:
+    """Reporte registrado: función, título y parámetros con sus valores por defecto."""
+
+    def __init__(self, name: str, title: str, fn: Callable):
+        self.name = name
+        self.title = title
+        self.fn = fn
+        self.signature = inspect.signature(fn)
+
+    def bind(self, params: dict) -> dict:
+        """Parámetros completos (con valores por defecto); error si sobra o falta alguno."""
+        bound = self.signature.bind(None, **params)
+        bound.apply_defaults()
+        return dict(list(bound.arguments.items())[1:])
+
+    def __call__(self, fetch: Callable, **params):
+        return self.fn(fetch, **params)
+
+
+def report(name: str, title: str):
+    """Registra una función `fn(fetch, **params) -> DataFrame` como reporte."""
+    def register(fn: Callable):
+        REPORTS[name] = Report(name, title, fn)
+        return fn
+    return register
+
+
+def _range(desde: Optional[str], hasta: Optional[str]) -> tuple:
+    return (desde or _MIN_DATE, hasta or _MAX_DATE)
+
+
+# ===== VENTAS =====
+
+@report('ventas_producto_mes', "Ventas por producto y mes")
+def sales_by_product_month(fetch: Callable, desde: Optional[str] = None,
+                           hasta: Optional[str] = None):
+    """
+    Unidades y monto por producto y mes, con el acumulado del producto, la
+    variación contra el mes anterior y la participación en el mes. Lee el
+    resumen diario (ya agregado por triggers), no el detalle de ventas.
+    """
+    frame = fetch(
+        """WITH mensual AS (
+               SELECT substr(r.fecha, 1, 7) AS mes, r.producto_id,
+                      SUM(r.cantidad_unidades) AS unidades, ROUND(SUM(r.monto), 2) AS monto
+               FROM resumen_ventas_diario r
+               WHERE r.producto_id <> 0 AND r.metodo_pago_id = 0
+                 AND r.fecha BETWEEN ? AND ?
+               GROUP BY mes, r.producto_id
+           )
+           SELECT m.mes, m.producto_id, p.nombre AS producto, m.unidades, m.monto,
+                  SUM(m.monto) OVER (PARTITION BY m.producto_id ORDER BY m.mes) AS monto_acumulado,
+                  LAG(m.monto) OVER (PARTITION BY m.producto_id ORDER BY m.mes) AS monto_mes_anterior,
+                  SUM(m.monto) OVER (PARTITION BY m.mes) AS monto_total_mes,
+                  RANK() OVER (PARTITION BY m.mes ORDER BY m.monto DESC) AS puesto
+           FROM mensual m
+           JOIN productos p ON p.id = m.producto_id
+           ORDER BY m.mes, puesto""",
+        _range(desde, hasta)
+    )
+    previous = frame['monto_mes_anterior']
+    frame['variacion_pct'] = ((frame['monto'] - previous) / previous.where(previous != 0) * 100).round(2)
+    total = frame.pop('monto_total_mes')
+    frame['participacion_pct'] = (frame['monto'] / total.where(total != 0) * 100).round(2)
+    return frame.drop(columns='monto_mes_anterior')
+
+
+@report('cartera_edades', "Cartera por antigüedad")
+def receivables_aging(fetch: Callable, fecha_corte: Optional[str] = None):
+    """
+    Saldo pendiente por cliente repartido en tramos de días desde la
+    factura (0-30, 31-60, 61-90, +90) a la fecha de corte.
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = fetch(
+        """SELECT v.cliente_id, c.nombre_comercial AS cliente, v.saldo_pendiente,
+                  CAST(julianday(COALESCE(?, date('now'))) - julianday(v.fecha_venta) AS INTEGER) AS dias
+           FROM ventas v
+           JOIN clientes c ON c.id = v.cliente_id
+           WHERE v.saldo_pendiente > 0""",
+        (fecha_corte,)
+    )
+    labels = [label for _, label in AGING_BUCKETS]
+    edges = [-np.inf] + [limit for limit, _ in AGING_BUCKETS if limit is not None] + [np.inf]
+    frame['tramo'] = pd.cut(frame['dias'], edges, labels=labels)
+    table = frame.pivot_table(index=['cliente_id', 'cliente'], columns='tramo',
+                              values='saldo_pendiente', aggfunc='sum', fill_value=0.0,
+                              observed=False)
+    table = table.reindex(columns=labels, fill_value=0.0)
+    table.columns = [str(column) for column in table.columns]
+    table['total'] = table[labels].sum(axis=1)
+    table['dias_max'] = frame.groupby(['cliente_id', 'cliente'])['dias'].max()
+    return table.round(2).sort_values('total', ascending=False).reset_index()
+
+
+@report('margen_producto_mes', "Margen por producto y mes")
+def margin_by_product_month(fetch: Callable, desde: Optional[str] = None,
+                            hasta: Optional[str] = None):
+    """
+    Ventas, costo de lo vendido (costo promedio congelado en cada línea) y
+    margen bruto por producto y mes.
+    """
+    frame = fetch(
+        """SELECT substr(v.fecha_venta, 1, 7) AS mes, d.producto_id, p.nombre AS producto,
+                  SUM(d.cantidad_unidades) AS unidades, ROUND(SUM(d.subtotal), 2) AS ventas,
+                  ROUND(SUM(d.cantidad_unidades * COALESCE(d.costo_unitario, 0)), 2) AS costo
+           FROM ventas_detalle_historico d
+           JOIN ventas_historico v ON v.id = d.venta_id
+           JOIN productos p ON p.id = d.producto_id
+           WHERE v.fecha_venta BETWEEN ? AND ?
+           GROUP BY mes, d.producto_id
+           ORDER BY mes, ventas DESC""",
+        _range(desde, hasta)
+    )
+    frame['margen'] = (frame['ventas'] - frame['costo']).round(2)
+    ventas = frame['ventas']
+    frame['margen_pct'] = (frame['margen'] / ventas.where(ventas != 0) * 100).round(2)
+    return frame
+
+
+# ===== PRODUCCIÓN =====
+
+@report('rendimiento_produccion', "Rendimiento de producción por lote")
+def production_yield(fetch: Callable, desde: Optional[str] = None,
+                     hasta: Optional[str] = None, ventana: int = 5):
+    """
+    Rendimiento esperado contra real de cada lote, con la media móvil del
+    rendimiento real de los últimos `ventana` lotes del mismo producto.
+    """
+    frame = fetch(
+        f"""SELECT l.id AS lote_id, l.codigo_lote, l.fecha_produccion, l.producto_id,
+                   p.nombre AS producto, l.cantidad_producida,
+                   l.rendimiento_esperado, l.rendimiento_real,
+                   AVG(l.rendimiento_real) OVER (
+                       PARTITION BY l.producto_id ORDER BY l.fecha_produccion, l.id
+                       ROWS BETWEEN {int(ventana) - 1} PRECEDING AND CURRENT ROW
+                   ) AS rendimiento_movil
+            FROM lotes_produccion l
+            JOIN productos p ON p.id = l.producto_id
+            WHERE l.fecha_produccion BETWEEN ? AND ?
+            ORDER BY l.fecha_produccion, l.id""",
+        _range(desde, hasta)
+    )
+    expected = frame['rendimiento_esperado']
+    frame['diferencia'] = (frame['rendimiento_real'] - expected).round(2)
+    frame['desviacion_pct'] = (frame['diferencia'] / expected.where(expected != 0) * 100).round(2)
+    frame['rendimiento_movil'] = frame['rendimiento_movil'].round(2)
+    frame['bajo_rendimiento'] = frame['rendimiento_real'] < expected * (1 - LOW_YIELD_TOLERANCE)
+    return frame
+
+
+# ===== COMPRAS =====
+
+@report('gasto_proveedores', "Gasto por proveedor y mes")
+def supplier_spend(fetch: Callable, desde: Optional[str] = None,
+                   hasta: Optional[str] = None):
+    """
+    Compras por proveedor y mes con el acumulado del proveedor, su puesto
+    en el mes y su participación en el gasto del mes.
+    """
+    frame = fetch(
+        """WITH mensual AS (
+               SELECT substr(c.fecha_compra, 1, 7) AS mes, c.proveedor_id,
+                      COUNT(*) AS compras, ROUND(SUM(c.precio_definitivo), 2) AS gasto
+               FROM compras_materia_prima_historico c
+               WHERE c.fecha_compra BETWEEN ? AND ?
+               GROUP BY mes, c.proveedor_id
+           )
+           SELECT m.mes, m.proveedor_id, pr.nombre_comercial AS proveedor, m.compras, m.gasto,
+                  SUM(m.gasto) OVER (PARTITION BY m.proveedor_id ORDER BY m.mes) AS gasto_acumulado,
+                  SUM(m.gasto) OVER (PARTITION BY m.mes) AS gasto_total_mes,
+                  RANK() OVER (PARTITION BY m.mes ORDER BY m.gasto DESC) AS puesto
+           FROM mensual m
+           JOIN proveedores pr ON pr.id = m.proveedor_id
+           ORDER BY m.mes, puesto""",
+        _range(desde, hasta)
+    )
+    total = frame.pop('gasto_total_mes')
+    frame['participacion_pct'] = (frame['gasto'] / total.where(total != 0) * 100).round(2)
+    return frame
@@ -0,0 +1,160 @@
+"""
+Motor de reportes con caché invalidada por `PRAGMA data_version`.
+
+Un resultado se guarda con la clave (reporte, parámetros) junto con el
+`data_version` leído antes de calcularlo. Mientras nadie confirme cambios
+en la base el valor no cambia y el reporte se sirve desde memoria; el
+primer commit de cualquier conexión (o proceso) invalida toda la caché.
+"""
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from src.database.monitor import ChangeMonitor
+
+from .definitions import REPORTS, Report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 32
+
+
+class ReportEngine:
+    """Ejecuta reportes registrados y cachea sus DataFrames."""
+
+    def __init__(self, connection=None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._connection = connection
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._monitor: Optional[ChangeMonitor] = None
+        self._parallel = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from src.database.connection import db
+            self._connection = db
+        return self._connection
+
+    @property
+    def monitor(self) -> ChangeMonitor:
+        if self._monitor is None:
+            self._monitor = ChangeMonitor(self.connection.db_path)
+        return self._monitor
+
+    @staticmethod
+    def get_report(name: str) -> Report:
+        if name not in REPORTS:
+            raise KeyError(f"Reporte desconocido: {name} (opciones: {', '.join(REPORTS)})")
+        return REPORTS[name]
+
+    @staticmethod
+    def available() -> dict:
+        """{nombre: título} de los reportes registrados."""
+        return {name: item.title for name, item in REPORTS.items()}
+
+    def _fetch(self, query: str, params: tuple = ()):
+        return self.connection.fetch_frame(query, params)
+
+    def _compute(self, item: Report, params: dict):
+        from src.database.archive import history_reader
+
+        start = time.perf_counter()
+        # La misma conexión de lectura (con las vistas históricas) para todo el reporte
+        with history_reader():
+            frame = item(self._fetch, **params)
+        logger.info(f"Reporte {item.name} calculado en {time.perf_counter() - start:.3f}s "
+                    f"({len(frame)} filas)")
+        return frame
+
+    def _cached(self, key: tuple, compute: Callable, use_cache: bool):
+        # Versión leída antes de calcular: si alguien escribe durante el cálculo se recalcula
+        version = self.monitor.data_version()
+        if use_cache:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+
+        frame = compute()
+        with self._lock:
+            self._entries[key] = (version, frame)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return frame
+
+    def run(self, name: str, use_cache: bool = True, **params):
+        """
+        Ejecuta el reporte `name` y retorna un DataFrame.
+
+        El resultado cacheado se comparte entre llamadas: no lo modifique
+        (use `.copy()` si hace falta).
+        """
+        item = self.get_report(name)
+        params = item.bind(params)
+        key = (name, tuple(sorted(params.items())))
+        return self._cached(key, lambda: self._compute(item, params), use_cache)
+
+    @property
+    def parallel(self):
+        """Pool de procesos para los reportes paralelos (creado al primer uso)."""
+        if self._parallel is None:
+            from .parallel import ParallelReportRunner
+            self._parallel = ParallelReportRunner(self.connection)
+        return self._parallel
+
+    def run_parallel(self, name: str, desde: str, hasta: str,
+                     partitions: Optional[int] = None, use_cache: bool = True):
+        """Ejecuta un reporte de `parallel.PARALLEL_REPORTS` en procesos de trabajo, con caché."""
+        key = ('parallel', name, desde, hasta)
+        return self._cached(key, lambda: self.parallel.run(name, desde, hasta, partitions), use_cache)
+
+    def export(self, name: str, path: Union[str, Path], **params) -> Path:
+        """Ejecuta (o toma de la caché) el reporte y lo escribe en .xlsx."""
+        from .export import export_frame
+
+        frame = self.run(name, **params)
+        return export_frame(frame, path, sheet_title=self.get_report(name).title)
+
+    # ===== MANTENIMIENTO =====
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        self.clear()
+        if self._parallel is not None:
+            self._parallel.shutdown()
+            self._parallel = None
+        if self._monitor is not None:
+            self._monitor.close()
+            self._monitor = None
+
+
+_engine: Optional[ReportEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_report_engine() -> ReportEngine:
+    """Motor de reportes global, creado al primer uso."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ReportEngine()
+    return _engine
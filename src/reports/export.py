@@ -0,0 +1,126 @@
+"""
+Exportación a Excel en modo write-only de openpyxl.
+
+Las filas se escriben a medida que llegan y openpyxl las vuelca a disco
+sin construir el libro en memoria, así que exportar un millón de filas
+desde `db.fetch_iter` usa memoria acotada. Si se supera el límite de
+filas de una hoja se continúa en otra.
+"""
+import datetime
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from src.database.columnar import DATE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Filas de datos por hoja (Excel admite 1.048.576 contando el encabezado)
+MAX_SHEET_ROWS = 1048575
+DEFAULT_COLUMN_WIDTH = 14
+
+
+def _cell_value(value):
+    """Valor apto para openpyxl: NaN/NaT -> vacío y tipos NumPy -> Python."""
+    if value is None:
+        return None
+    if value != value:  # NaN y NaT
+        return None
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes, datetime.date)):
+        value = value.item()
+    return value
+
+
+def _date_value(value):
+    """Fechas ISO guardadas como texto -> date/datetime (Excel las trata como fechas)."""
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            if len(value) == 10:
+                return datetime.date.fromisoformat(value)
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def export_rows(rows: Iterable, headers: list, path: Union[str, Path],
+                sheet_title: str = 'Datos', date_columns: Optional[set] = None) -> Path:
+    """
+    Escribe filas (secuencias en el orden de `headers`) en un .xlsx.
+
+    Args:
+        rows: Iterable de filas; se consume una sola vez
+        headers: Nombres de las columnas
+        date_columns: Columnas con fechas ISO en texto a convertir
+            (por defecto las fechas conocidas del esquema)
+
+    Returns:
+        Ruta del archivo escrito
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    date_columns = DATE_COLUMNS if date_columns is None else date_columns
+    date_indexes = [i for i, name in enumerate(headers) if name in date_columns]
+    title = sheet_title[:31]
+
+    workbook = Workbook(write_only=True)
+    bold = Font(bold=True)
+    sheet = None
+    sheet_rows = MAX_SHEET_ROWS
+    total = 0
+
+    def new_sheet(number: int):
+        sheet = workbook.create_sheet(title if number == 1 else f"{title[:27]} ({number})")
+        sheet.freeze_panes = 'A2'
+        for i, name in enumerate(headers, start=1):
+            sheet.column_dimensions[get_column_letter(i)].width = max(DEFAULT_COLUMN_WIDTH, len(str(name)) + 2)
+        header_cells = []
+        for name in headers:
+            cell = WriteOnlyCell(sheet, value=str(name))
+            cell.font = bold
+            header_cells.append(cell)
+        sheet.append(header_cells)
+        return sheet
+
+    sheets = 0
+    for row in rows:
+        if sheet_rows >= MAX_SHEET_ROWS:
+            sheets += 1
+            sheet = new_sheet(sheets)
+            sheet_rows = 0
+        values = [_cell_value(value) for value in row]
+        for i in date_indexes:
+            values[i] = _date_value(values[i])
+        sheet.append(values)
+        sheet_rows += 1
+        total += 1
+    if sheet is None:
+        new_sheet(1)
+
+    workbook.save(path)
+    logger.info(f"Exportadas {total} filas a {path}")
+    return path
+
+
+def export_query(query: str, path: Union[str, Path], params: tuple = (),
+                 sheet_title: str = 'Datos', connection=None) -> Path:
+    """Ejecuta una consulta y la exporta fila a fila (memoria acotada)."""
+    if connection is None:
+        from src.database.connection import db as connection
+
+    with connection.reader() as conn:
+        # Solo para obtener los nombres de las columnas sin leer filas
+        headers = [d[0] for d in conn.execute(f"SELECT * FROM ({query}) LIMIT 0", params).description]
+    rows = (tuple(row.values()) for row in connection.fetch_iter(query, params))
+    return export_rows(rows, headers, path, sheet_title)
+
+
+def export_frame(frame, path: Union[str, Path], sheet_title: str = 'Datos') -> Path:
+    """Exporta un DataFrame (p. ej. el resultado de un reporte)."""
+    headers = [str(column) for column in frame.columns]
+    return export_rows(frame.itertuples(index=False, name=None), headers, path, sheet_title)
@@ -0,0 +1,294 @@
+"""
+Reportes pesados repartidos en procesos de trabajo.
+
+Cada proceso abre su propia conexión de solo lectura (URI `mode=ro`) a la
+base, calcula agregados parciales de una partición (un tramo de fechas o
+un grupo de clientes) dentro de una única transacción de lectura, y el
+proceso principal los combina. Los lectores en WAL no bloquean a los
+escritores, así que un cierre de año usa todos los núcleos sin frenar la
+aplicación.
+
+Cada trabajador abre su propia foto, así que las particiones no comparten
+un mismo instante. El proceso principal lee el id máximo de cada tabla
+(marca de agua) y los trabajadores ignoran las filas insertadas después,
+pero eso solo cubre inserciones: una modificación, un borrado o un
+archivado entre la foto de un trabajador y la de otro sí se ve distinto.
+Para detectarlo cada trabajador lee el último seq del registro de cambios
+(`cambios`, que anota toda escritura en las tablas transaccionales) dentro
+de su transacción; si no coincide con el que leyó el proceso principal se
+repite el reporte completo, hasta MAX_ATTEMPTS veces, y después se retorna
+con una advertencia de que puede mezclar estados.
+
+Los procesos se crean con 'spawn' (no heredan hilos ni el estado de Qt).
+En el ejecutable empaquetado, main debe llamar a
+multiprocessing.freeze_support().
+"""
+import datetime
+import multiprocessing
+import os
+import sqlite3
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DATE_PARTITION = 'fecha'
+CLIENT_PARTITION = 'cliente'
+
+# Tablas cuya marca de agua se fija antes de repartir
+WATERMARK_TABLES = ('ventas', 'ventas_detalle', 'pagos_venta')
+
+# Corridas completas si alguna partición vio escrituras que otra no
+MAX_ATTEMPTS = 3
+
+# nombre -> ParallelReport
+PARALLEL_REPORTS: dict = {}
+
+
+class ParallelReport:
+    """
+    Reporte en dos fases: `sql` calcula agregados parciales por partición
+    y el proceso principal los suma por `keys`; `finalize` calcula las
+    columnas derivadas (promedios, porcentajes) sobre el total combinado.
+
+    El SQL recibe los parámetros con nombre :desde, :hasta, :particiones,
+    :particion, :desde_particion, :hasta_particion y :max_<tabla>.
+    """
+
+    def __init__(self, name: str, title: str, sql: str, keys: list,
+                 partition: str = DATE_PARTITION,
+                 finalize: Optional[Callable] = None):
+        if partition not in (DATE_PARTITION, CLIENT_PARTITION):
+            raise ValueError(f"Partición inválida: {partition}")
+        self.name = name
+        self.title = title
+        self.sql = sql
+        self.keys = keys
+        self.partition = partition
+        self.finalize = finalize
+
+
+def parallel_report(name: str, title: str, keys: list, partition: str = DATE_PARTITION,
+                    finalize: Optional[Callable] = None):
+    """Registra el SQL retornado por la función como reporte paralelo."""
+    def register(fn: Callable):
+        PARALLEL_REPORTS[name] = ParallelReport(name, title, fn(), keys, partition, finalize)
+        return fn
+    return register
+
+
+# ===== REPORTES =====
+
+def _sales_by_client_finalize(frame):
+    frame['ticket_promedio'] = (frame['total'] / frame['facturas'].where(frame['facturas'] != 0)).round(2)
+    return frame.sort_values('total', ascending=False, ignore_index=True)
+
+
+@parallel_report('ventas_cliente_anual', "Ventas por cliente", ['cliente_id'], CLIENT_PARTITION,
+                 finalize=_sales_by_client_finalize)
+def _sales_by_client():
+    return """
+        SELECT v.cliente_id, COUNT(*) AS facturas,
+               ROUND(SUM(v.total), 2) AS total, ROUND(SUM(v.saldo_pendiente), 2) AS saldo_pendiente
+        FROM ventas_historico v
+        WHERE v.fecha_venta BETWEEN :desde AND :hasta
+          AND v.id <= :max_ventas
+          AND v.cliente_id % :particiones = :particion
+        GROUP BY v.cliente_id
+    """
+
+
+def _sales_by_product_finalize(frame):
+    frame['precio_promedio'] = (frame['subtotal'] / frame['unidades'].where(frame['unidades'] != 0)).round(2)
+    return frame.sort_values(['mes', 'subtotal'], ascending=[True, False], ignore_index=True)
+
+
+@parallel_report('ventas_producto_detalle', "Ventas por producto, presentación y mes",
+                 ['mes', 'producto_id', 'presentacion_id'], finalize=_sales_by_product_finalize)
+def _sales_by_product():
+    return """
+        SELECT substr(v.fecha_venta, 1, 7) AS mes, d.producto_id, d.presentacion_id,
+               COUNT(*) AS lineas, SUM(d.cantidad_unidades) AS unidades,
+               ROUND(SUM(d.subtotal), 2) AS subtotal
+        FROM ventas_detalle_historico d
+        JOIN ventas_historico v ON v.id = d.venta_id
+        WHERE v.fecha_venta BETWEEN :desde_particion AND :hasta_particion
+          AND v.id <= :max_ventas AND d.id <= :max_ventas_detalle
+        GROUP BY mes, d.producto_id, d.presentacion_id
+    """
+
+
+# ===== TRABAJADORES =====
+
+def _open_snapshot(db_path: str, archive_path: Optional[str]) -> sqlite3.Connection:
+    """Conexión de solo lectura con las vistas históricas (archivo adjunto si existe)."""
+    from src.database.archive import ARCHIVE_SCHEMA, check_archive_owner, create_history_views
+
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    conn.execute("PRAGMA mmap_size = 268435456")
+    if archive_path:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (f"{Path(archive_path).resolve().as_uri()}?mode=ro",))
+        check_archive_owner(conn, archive_path)
+    create_history_views(conn)
+    return conn
+
+
+def _change_seq(conn: sqlite3.Connection) -> int:
+    """Último seq del registro de cambios visto por la transacción actual."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+        return 0
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cambios'").fetchone()
+    return row[0] if row else 0
+
+
+def _run_partition(db_path: str, archive_path: Optional[str], sql: str, params: dict):
+    """
+    Corre en el proceso de trabajo: agregados parciales de una partición.
+
+    Returns:
+        (frame, segundos, seq del registro de cambios de la foto)
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    conn = _open_snapshot(db_path, archive_path)
+    try:
+        # Una sola transacción de lectura: la partición ve una foto fija de la base
+        conn.execute("BEGIN")
+        seq = _change_seq(conn)
+        cursor = conn.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        frame = pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return frame, time.perf_counter() - start, seq
+
+
+# ===== EJECUCIÓN =====
+
+def date_partitions(desde: str, hasta: str, count: int) -> list[tuple]:
+    """Divide [desde, hasta] en `count` tramos contiguos de días (inclusive)."""
+    start = datetime.date.fromisoformat(desde)
+    end = datetime.date.fromisoformat(hasta)
+    days = (end - start).days + 1
+    count = max(1, min(count, days))
+    bounds = []
+    for i in range(count):
+        first = start + datetime.timedelta(days=days * i // count)
+        last = start + datetime.timedelta(days=days * (i + 1) // count - 1)
+        bounds.append((first.isoformat(), last.isoformat()))
+    return bounds
+
+
+class ParallelReportRunner:
+    """Pool de procesos que calcula reportes paralelos por particiones."""
+
+    def __init__(self, connection=None, workers: Optional[int] = None):
+        self._connection = connection
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from src.database.connection import db
+            self._connection = db
+        return self._connection
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    @staticmethod
+    def get_report(name: str) -> ParallelReport:
+        if name not in PARALLEL_REPORTS:
+            raise KeyError(f"Reporte paralelo desconocido: {name} (opciones: {', '.join(PARALLEL_REPORTS)})")
+        return PARALLEL_REPORTS[name]
+
+    def watermarks(self) -> tuple[dict, int]:
+        """
+        ({max_<tabla>: id máximo}, seq del registro de cambios) leídos en
+        una sola transacción.
+        """
+        with self.connection.reader() as conn:
+            conn.execute("BEGIN")
+            try:
+                marks = {
+                    f"max_{table}": conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                    for table in WATERMARK_TABLES
+                }
+                return marks, _change_seq(conn)
+            finally:
+                conn.rollback()
+
+    @staticmethod
+    def _partition_params(item: ParallelReport, desde: str, hasta: str, count: int,
+                          marks: dict) -> list[dict]:
+        base = {'desde': desde, 'hasta': hasta, **marks}
+        if item.partition == CLIENT_PARTITION:
+            return [{**base, 'particiones': count, 'particion': k,
+                     'desde_particion': desde, 'hasta_particion': hasta}
+                    for k in range(count)]
+        return [{**base, 'particiones': 1, 'particion': 0,
+                 'desde_particion': first, 'hasta_particion': last}
+                for first, last in date_partitions(desde, hasta, count)]
+
+    def run(self, name: str, desde: str, hasta: str, partitions: Optional[int] = None):
+        """
+        Calcula el reporte repartiendo [desde, hasta] entre los procesos.
+
+        Args:
+            name: Reporte registrado con @parallel_report
+            desde, hasta: Rango de fechas (YYYY-MM-DD, inclusive)
+            partitions: Número de particiones (por defecto, una por proceso)
+
+        Returns:
+            DataFrame combinado
+        """
+        import pandas as pd
+        from src.database.archive import archive_path
+
+        item = self.get_report(name)
+        self.connection.get_pool()  # Asegura que la base exista (y su -shm para mode=ro)
+        archive = archive_path(self.connection.db_path)
+        archive = str(archive) if archive.exists() else None
+
+        start = time.perf_counter()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            marks, seq = self.watermarks()
+            params = self._partition_params(item, desde, hasta, partitions or self.workers, marks)
+            futures = [self._executor().submit(_run_partition, str(self.connection.db_path), archive,
+                                               item.sql, partition)
+                       for partition in params]
+            results = [future.result() for future in futures]
+            seen = {part_seq for _, _, part_seq in results}
+            if seen == {seq}:
+                break
+            if attempt < MAX_ATTEMPTS:
+                logger.info(f"Reporte paralelo {name}: hubo escrituras entre particiones, se repite")
+            else:
+                logger.warning(f"Reporte paralelo {name}: las particiones vieron estados distintos "
+                               f"(seq {seq} vs {sorted(seen)}) tras {MAX_ATTEMPTS} intentos")
+
+        parts = [frame for frame, _, _ in results if not frame.empty]
+        worker_time = sum(elapsed for _, elapsed, _ in results)
+        if parts:
+            merged = pd.concat(parts, ignore_index=True)
+            merged = merged.groupby(item.keys, as_index=False, sort=False).sum(numeric_only=True)
+        else:
+            merged = pd.DataFrame(columns=results[0][0].columns)
+        if item.finalize is not None:
+            merged = item.finalize(merged)
+        logger.info(f"Reporte paralelo {name}: {len(params)} particiones en "
+                    f"{time.perf_counter() - start:.2f}s (trabajo {worker_time:.2f}s, {attempt} intento(s))")
+        return merged
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
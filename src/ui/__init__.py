@@ -0,0 +1,24 @@
+"""
+Módulo de interfaz - Componentes Qt reutilizables.
+
+Los submódulos se importan al primer acceso (requieren PySide6).
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    'PagedTableModel': '.table_model',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
\ No newline at end of file
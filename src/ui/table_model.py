@@ -0,0 +1,267 @@
+"""
+Modelo de tabla Qt que carga las filas por páginas a medida que se hace scroll.
+
+Usa `DatabaseConnection.fetch_page` (keyset), así que abrir una tabla con
+millones de filas solo lee la primera página y cada página siguiente
+cuesta lo mismo sin importar cuánto se haya bajado.
+
+Con el registro de cambios activo (`db.start_change_feed()`) el modelo
+escucha `data_changed` y actualiza solo las filas afectadas de su tabla,
+sin recargar ni perder la posición del scroll.
+"""
+import logging
+from typing import Any, Optional
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Slot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 200
+# Ids por consulta al releer las filas cambiadas
+IDS_PER_QUERY = 500
+
+
+class PagedTableModel(QAbstractTableModel):
+    """QAbstractTableModel sobre una tabla con canFetchMore/fetchMore."""
+
+    def __init__(self, table: str, columns: list, headers: Optional[list] = None,
+                 order_by: tuple = ('id',), descending: bool = False,
+                 filters: Optional[dict] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                 live: bool = True, connection=None, parent=None):
+        """
+        Args:
+            table: Tabla a mostrar
+            columns: Columnas visibles, en orden
+            headers: Títulos de las columnas (por defecto los nombres)
+            order_by: Clave de orden (debe tener índice; se agrega id)
+            descending: Orden descendente
+            filters: Igualdades {columna: valor}
+            page_size: Filas leídas por página
+            live: Aplicar los cambios del registro de cambios (data_changed)
+        """
+        super().__init__(parent)
+        self._connection = connection
+        self.table = table
+        self.columns = list(columns)
+        self.headers = list(headers) if headers else list(columns)
+        self.order_by = tuple(order_by)
+        self.descending = descending
+        self.filters = dict(filters or {})
+        self.page_size = page_size
+        self._rows: list[dict] = []
+        self._last_key: Optional[tuple] = None
+        self._has_more = True
+        self._estimated: Optional[int] = None
+        self._fetch_page()
+        if live:
+            signals = self.connection.signals
+            signals.data_changed.connect(self.apply_changes)
+            signals.data_resync.connect(self.reload)
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from src.database.connection import db
+            self._connection = db
+        return self._connection
+
+    # ===== CARGA =====
+
+    def _next_page(self) -> dict:
+        return self.connection.fetch_page(
+            self.table, self.columns, self.order_by, self._last_key, self.page_size,
+            self.descending, self.filters
+        )
+
+    def _fetch_page(self):
+        page = self._next_page()
+        self._rows.extend(page['rows'])
+        self._last_key = page['last_key']
+        self._has_more = page['has_more']
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        first = len(self._rows)
+        page = self._next_page()
+        self._has_more = page['has_more']
+        if not page['rows']:
+            return
+        self.beginInsertRows(QModelIndex(), first, first + len(page['rows']) - 1)
+        self._rows.extend(page['rows'])
+        self._last_key = page['last_key']
+        self.endInsertRows()
+
+    def reload(self):
+        """Descarta lo cargado y vuelve a la primera página."""
+        self.beginResetModel()
+        self._rows = []
+        self._last_key = None
+        self._has_more = True
+        self._estimated = None
+        self._fetch_page()
+        self.endResetModel()
+
+    def set_filters(self, filters: Optional[dict]):
+        self.filters = dict(filters or {})
+        self.reload()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        """
+        Reordena por la columna indicada (rápido solo si tiene índice). Las
+        columnas que admiten NULL no se pueden usar como clave de keyset:
+        se ignoran para no ocultar filas.
+        """
+        name = self.columns[column]
+        if name != 'id' and name not in self.connection.sortable_columns(self.table):
+            logger.warning(f"No se ordena {self.table} por {name}: la columna admite NULL")
+            return
+        self.order_by = (name,)
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.reload()
+
+    def estimated_row_count(self) -> int:
+        """Total aproximado de filas (para etiquetas o la barra de scroll)."""
+        if self._estimated is None:
+            self._estimated = self.connection.estimate_count(self.table, self.filters)
+        return max(self._estimated, len(self._rows))
+
+    # ===== CAMBIOS =====
+
+    @property
+    def key_columns(self) -> list:
+        """Columnas de la clave de orden (con id al final, como fetch_page)."""
+        key = list(self.order_by)
+        if 'id' not in key:
+            key.append('id')
+        return key
+
+    def _key(self, row: dict) -> tuple:
+        return tuple(row[c] for c in self.key_columns)
+
+    def _before(self, a: tuple, b: tuple) -> bool:
+        """True si la clave `a` va antes que `b` en el orden del modelo."""
+        return a > b if self.descending else a < b
+
+    def _fetch_ids(self, ids: list) -> dict:
+        """{id: fila} releídas de la base; las que ya no cumplen los filtros no vienen."""
+        rows = {}
+        for start in range(0, len(ids), IDS_PER_QUERY):
+            chunk = ids[start:start + IDS_PER_QUERY]
+            page = self.connection.fetch_page(
+                self.table, self.columns, self.order_by, page_size=len(chunk),
+                descending=self.descending, filters=self.filters,
+                where=f"id IN ({', '.join('?' for _ in chunk)})", params=tuple(chunk)
+            )
+            rows.update((row['id'], row) for row in page['rows'])
+        return rows
+
+    def _in_loaded_range(self, key: tuple) -> bool:
+        """La fila cae dentro de lo ya cargado (si no, llegará con fetchMore)."""
+        return not self._has_more or self._last_key is None or not self._before(self._last_key, key)
+
+    def _fits_at(self, position: int, key: tuple) -> bool:
+        if position > 0 and self._before(key, self._key(self._rows[position - 1])):
+            return False
+        if position + 1 < len(self._rows) and self._before(self._key(self._rows[position + 1]), key):
+            return False
+        return True
+
+    def _insert_position(self, key: tuple) -> int:
+        low, high = 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self._before(self._key(self._rows[middle]), key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @Slot(str, object)
+    def apply_changes(self, table: str, changes: dict):
+        """
+        Aplica los cambios de una tabla (ids insertados, modificados y
+        borrados) releyendo solo esas filas: las modificadas se reemplazan
+        en su lugar, y las que cambiaron de posición, se insertaron o dejaron
+        de cumplir los filtros se mueven, agregan o quitan.
+        """
+        if table != self.table:
+            return
+        deleted = set(changes.get('deleted', ()))
+        changed = set(changes.get('updated', ())) | set(changes.get('inserted', ()))
+        if not deleted and not changed:
+            return
+        current = self._fetch_ids(sorted(changed)) if changed else {}
+
+        # Reemplazar en su lugar o marcar para quitar
+        remove = []
+        for position, row in enumerate(self._rows):
+            row_id = row['id']
+            if row_id in deleted or (row_id in changed and row_id not in current):
+                remove.append(position)
+            elif row_id in current:
+                new_row = current.pop(row_id)
+                if self._fits_at(position, self._key(new_row)):
+                    self._rows[position] = new_row
+                    self.dataChanged.emit(self.index(position, 0),
+                                          self.index(position, len(self.columns) - 1))
+                else:
+                    remove.append(position)
+                    current[row_id] = new_row
+
+        for position in reversed(remove):
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self._rows[position]
+            self.endRemoveRows()
+
+        # Nuevas (o movidas) dentro del rango cargado
+        for row in sorted(current.values(), key=self._key, reverse=self.descending):
+            key = self._key(row)
+            if not self._in_loaded_range(key):
+                continue
+            position = self._insert_position(key)
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, row)
+            self.endInsertRows()
+
+        if not self._has_more and self._rows:
+            self._last_key = self._key(self._rows[-1])
+        if deleted or remove or current:
+            self._estimated = None
+
+    # ===== LECTURA =====
+
+    def row(self, row: int) -> dict:
+        """Fila completa cargada en la posición indicada."""
+        return self._rows[row]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        value = self._rows[index.row()][self.columns[index.column()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return '' if value is None else str(value)
+        if role == Qt.ItemDataRole.EditRole:
+            return value
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(value, (int, float)):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role == Qt.ItemDataRole.UserRole:
+            return self._rows[index.row()]
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return str(section + 1)